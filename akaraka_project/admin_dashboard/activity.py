@@ -0,0 +1,178 @@
+"""
+Activity rollups
+The analytics page used to count signups, enrollments and completions with
+live range filters and rank users by joining the whole users table to every
+exercise response. run_activity_rollups() instead aggregates each finished
+day once into fact tables:
+
+- DailyActivity: site-wide totals (signups, enrollments, course and lesson
+  completions, exercise attempts, posts, active users)
+- DailyCourseActivity: enrollments and completions per course
+- DailyUserActivity: attempts, lesson completions and posts per active user
+
+Like the revenue rollups it keeps a watermark (ACTIVITY_WATERMARK) and only
+touches the days since. Any range, including the daily series behind the
+charts, is then a sum over a few hundred small indexed rows.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+
+from .models import DailyActivity, DailyCourseActivity, DailyUserActivity
+from .rollups import day_bounds, run_daily
+
+ACTIVITY_WATERMARK = 'activity'
+SERIES = {
+    'signups': 'New Users',
+    'enrollments': 'Enrollments',
+    'lesson_completions': 'Lessons Completed',
+    'exercise_attempts': 'Exercise Attempts',
+    'posts': 'Community Posts',
+}
+USER_FIELDS = ('exercise_attempts', 'correct_attempts', 'lesson_completions', 'posts')
+
+
+def rollup_courses(day):
+    """Rewrite the day's DailyCourseActivity rows; returns (enrollments, completions)"""
+    from courses.models import CourseEnrollment
+    start, end = day_bounds(day)
+    counts = defaultdict(lambda: [0, 0])
+    for row in CourseEnrollment.objects.filter(enrolled_at__gte=start, enrolled_at__lt=end).values(
+        'course_id'
+    ).annotate(count=Count('id')).order_by():
+        counts[row['course_id']][0] = row['count']
+    for row in CourseEnrollment.objects.filter(completion_date__gte=start, completion_date__lt=end).values(
+        'course_id'
+    ).annotate(count=Count('id')).order_by():
+        counts[row['course_id']][1] = row['count']
+    DailyCourseActivity.objects.filter(date=day).delete()
+    DailyCourseActivity.objects.bulk_create([
+        DailyCourseActivity(date=day, course_id=course_id, enrollments=enrollments, completions=completions)
+        for course_id, (enrollments, completions) in counts.items()
+    ])
+    return sum(row[0] for row in counts.values()), sum(row[1] for row in counts.values())
+
+
+def rollup_users(day):
+    """Rewrite the day's DailyUserActivity rows; returns the rows"""
+    from community.models import Post
+    from courses.models import LessonProgress
+    from exercises.models import UserExerciseResponse
+    start, end = day_bounds(day)
+    counts = defaultdict(dict)
+    for row in UserExerciseResponse.objects.filter(completed_at__gte=start, completed_at__lt=end).values(
+        'user_id'
+    ).annotate(attempts=Count('id'), correct=Count('id', filter=Q(is_correct=True))).order_by():
+        counts[row['user_id']].update(exercise_attempts=row['attempts'], correct_attempts=row['correct'])
+    for row in LessonProgress.objects.filter(
+        is_completed=True, completion_time__gte=start, completion_time__lt=end
+    ).values('user_id').annotate(count=Count('id')).order_by():
+        counts[row['user_id']]['lesson_completions'] = row['count']
+    for row in Post.objects.filter(created_at__gte=start, created_at__lt=end).values(
+        'author_id'
+    ).annotate(count=Count('id')).order_by():
+        counts[row['author_id']]['posts'] = row['count']
+    DailyUserActivity.objects.filter(date=day).delete()
+    return DailyUserActivity.objects.bulk_create([
+        DailyUserActivity(date=day, user_id=user_id, **fields) for user_id, fields in counts.items()
+    ])
+
+
+def rollup_activity(day):
+    """Write the day's per-course, per-user and site-wide activity rows"""
+    start, end = day_bounds(day)
+    enrollments, completions = rollup_courses(day)
+    users = rollup_users(day)
+    totals = {field: sum(getattr(row, field) for row in users) for field in USER_FIELDS}
+    DailyActivity.objects.update_or_create(date=day, defaults={
+        'signups': get_user_model().objects.filter(date_joined__gte=start, date_joined__lt=end).count(),
+        'enrollments': enrollments,
+        'course_completions': completions,
+        'active_users': len(users),
+        **totals,
+    })
+
+
+def _first_day():
+    first = get_user_model().objects.aggregate(first=Min('date_joined'))['first']
+    return timezone.localdate(first) if first else None
+
+
+def run_activity_rollups(through=None, since=None):
+    """
+    Roll up activity for every finished day after the activity watermark
+
+    Returns:
+        int: Number of days processed
+    """
+    return run_daily(ACTIVITY_WATERMARK, [rollup_activity], _first_day, through, since)
+
+
+def activity_summary(start, end):
+    """
+    Activity over a date range
+
+    Returns:
+        dict: SERIES totals plus course_completions and correct_attempts,
+        'days' (one DailyActivity per day of the range, zero-filled) and
+        'charts' (per series: label, total and (day, value, % of the
+        busiest day) bars)
+    """
+    rows = {row.date: row for row in DailyActivity.objects.filter(date__range=(start, end))}
+    days = []
+    day = start
+    while day <= end:
+        days.append(rows.get(day) or DailyActivity(date=day))
+        day += timedelta(days=1)
+    summary = {
+        field: sum(getattr(row, field) for row in days)
+        for field in (*SERIES, 'course_completions', 'correct_attempts')
+    }
+    summary['days'] = days
+    summary['charts'] = []
+    for field, label in SERIES.items():
+        values = [getattr(row, field) for row in days]
+        peak = max(values, default=0) or 1
+        summary['charts'].append({
+            'label': label,
+            'total': summary[field],
+            'bars': [(row.date, value, round(value * 100 / peak)) for row, value in zip(days, values)],
+        })
+    return summary
+
+
+def popular_courses(start, end, limit=10):
+    """Courses with the most enrollments in a date range, with enrollment_count set"""
+    from courses.models import Course
+    ranking = list(
+        DailyCourseActivity.objects.filter(date__range=(start, end))
+        .values('course_id').annotate(total=Sum('enrollments'))
+        .filter(total__gt=0).order_by('-total', 'course_id')[:limit]
+    )
+    courses = Course.objects.in_bulk([row['course_id'] for row in ranking])
+    ranked = []
+    for row in ranking:
+        course = courses.get(row['course_id'])
+        if course:
+            course.enrollment_count = row['total']
+            ranked.append(course)
+    return ranked
+
+
+def most_active_users(start, end, limit=10):
+    """Users with the most exercise attempts in a date range, with exercise_count set"""
+    ranking = list(
+        DailyUserActivity.objects.filter(date__range=(start, end))
+        .values('user_id').annotate(total=Sum('exercise_attempts'))
+        .filter(total__gt=0).order_by('-total', 'user_id')[:limit]
+    )
+    users = get_user_model().objects.in_bulk([row['user_id'] for row in ranking])
+    ranked = []
+    for row in ranking:
+        user = users.get(row['user_id'])
+        if user:
+            user.exercise_count = row['total']
+            ranked.append(user)
+    return ranked
@@ -0,0 +1,44 @@
+"""
+Django management command to update the daily rollups (revenue and
+subscriptions, and learning and community activity)
+Usage: python manage.py update_rollups [--since=2025-01-01] [--through=2025-01-31] [--only=revenue|activity]
+
+Run it daily (e.g. shortly after midnight from cron). Each job processes only
+the finished days after its own watermark; --since reprocesses from a given day.
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from admin_dashboard.activity import ACTIVITY_WATERMARK, run_activity_rollups
+from admin_dashboard.rollups import WATERMARK_NAME, get_watermark, run_rollups
+
+
+class Command(BaseCommand):
+    help = 'Aggregate finished days into the daily revenue, subscription and activity rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=str, help='Reprocess from this day (YYYY-MM-DD)')
+        parser.add_argument('--through', type=str, help='Last day to process (default yesterday)')
+        parser.add_argument('--only', choices=['revenue', 'activity'], help='Run one job only')
+
+    def handle(self, *args, **options):
+        since = self._parse_date(options.get('since'))
+        through = self._parse_date(options.get('through'))
+        jobs = [
+            ('revenue', WATERMARK_NAME, run_rollups),
+            ('activity', ACTIVITY_WATERMARK, run_activity_rollups),
+        ]
+        for label, watermark, run in jobs:
+            if options.get('only') in (None, label):
+                processed = run(through=through, since=since)
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ {label.capitalize()}: rolled up {processed} days; processed through {get_watermark(watermark) or "-"}'
+                ))
+
+    @staticmethod
+    def _parse_date(value):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'Invalid date: {value}')
@@ -0,0 +1,131 @@
+"""
+Dashboard metrics snapshots
+The dashboard's headline figures (user, course, enrollment, subscription,
+post, certificate and badge counts, and the top courses) are whole-table
+counts that take seconds on large tables. compute_metrics() gets them all in
+two queries: one UNION ALL of per-table COUNTs and one grouped count of
+enrollments per course. The result is stored as a MetricsSnapshot, and page
+loads read the latest row (one lookup on the computed_at index) instead of
+counting, so a refresh by any process or by cron is seen everywhere at once.
+
+A snapshot older than DASHBOARD_METRICS_MAX_AGE is still served, and a fresh
+one is computed in the background. The page load that wins a conditional
+UPDATE of the snapshot's refresh_claimed_at does it, so it runs once across
+all processes whatever the number of concurrent page loads; a claim older
+than REFRESH_CLAIM_TIMEOUT (a crashed refresh) can be taken over. Admins can
+also refresh it from the dashboard, and the refresh_metrics command can do
+it on a schedule.
+"""
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import CharField, Count, Q, Value
+from django.utils import timezone
+
+from akaraka.background import run_after_commit
+from .models import MetricsSnapshot
+from .rollups import day_bounds
+
+REFRESH_CLAIM_TIMEOUT = timedelta(minutes=5)
+TOP_COURSES = 5
+RETENTION = timedelta(days=7)
+
+
+def _counts():
+    """Labelled querysets counted into the snapshot"""
+    from courses.models import Course, CourseEnrollment
+    from community.models import Post
+    from payments.models import UserSubscription
+    from certificates.models import Certificate
+    from gamification.models import UserBadge
+    User = get_user_model()
+    now = timezone.now()
+    today, _ = day_bounds(timezone.localdate())
+    return {
+        'total_users': User.objects.all(),
+        'new_users_today': User.objects.filter(date_joined__gte=today),
+        'new_users_week': User.objects.filter(date_joined__gte=now - timedelta(days=7)),
+        'total_courses': Course.objects.all(),
+        'published_courses': Course.objects.filter(is_published=True),
+        'total_enrollments': CourseEnrollment.objects.all(),
+        'completed_enrollments': CourseEnrollment.objects.filter(is_completed=True),
+        'active_subscriptions': UserSubscription.objects.filter(status='active'),
+        'total_posts': Post.objects.all(),
+        'total_certificates': Certificate.objects.all(),
+        'total_badges_earned': UserBadge.objects.all(),
+    }
+
+
+def compute_metrics():
+    """
+    All dashboard figures, in two queries
+
+    Returns:
+        dict: Counts by name, plus 'top_courses' as [course id, enrollments] pairs
+    """
+    from courses.models import CourseEnrollment
+    counts = [
+        queryset.order_by().values(metric=Value(name, output_field=CharField())).annotate(count=Count('*'))
+        for name, queryset in _counts().items()
+    ]
+    data = {row['metric']: row['count'] for row in counts[0].union(*counts[1:], all=True)}
+    data['top_courses'] = [
+        [row['course_id'], row['count']]
+        for row in CourseEnrollment.objects.values('course_id').annotate(
+            count=Count('id')
+        ).order_by('-count', 'course_id')[:TOP_COURSES]
+    ]
+    return data
+
+
+def refresh_snapshot():
+    """Compute and store a new snapshot"""
+    started = time.monotonic()
+    data = compute_metrics()
+    snapshot = MetricsSnapshot.objects.create(
+        computed_at=timezone.now(),
+        duration_ms=int((time.monotonic() - started) * 1000),
+        data=data,
+    )
+    MetricsSnapshot.objects.filter(computed_at__lt=snapshot.computed_at - RETENTION).delete()
+    return snapshot
+
+
+def claim_refresh(snapshot):
+    """True for exactly one caller per stale snapshot (or per expired claim)"""
+    now = timezone.now()
+    return bool(MetricsSnapshot.objects.filter(
+        Q(refresh_claimed_at__isnull=True) | Q(refresh_claimed_at__lt=now - REFRESH_CLAIM_TIMEOUT),
+        id=snapshot.id,
+    ).update(refresh_claimed_at=now))
+
+
+def get_snapshot():
+    """
+    Latest snapshot, computed now only if there has never been one
+
+    A stale snapshot is returned as is and refreshed in the background.
+
+    Returns:
+        MetricsSnapshot
+    """
+    snapshot = MetricsSnapshot.objects.first()
+    if snapshot is None:
+        return refresh_snapshot()
+    if snapshot.age.total_seconds() > settings.DASHBOARD_METRICS_MAX_AGE and claim_refresh(snapshot):
+        run_after_commit(refresh_snapshot)
+    return snapshot
+
+
+def top_courses(snapshot):
+    """The snapshot's top courses, with enrollment_count set"""
+    from courses.models import Course
+    ranking = snapshot.data.get('top_courses', [])
+    courses = Course.objects.in_bulk([course_id for course_id, _ in ranking])
+    ranked = []
+    for course_id, count in ranking:
+        if course_id in courses:
+            courses[course_id].enrollment_count = count
+            ranked.append(courses[course_id])
+    return ranked
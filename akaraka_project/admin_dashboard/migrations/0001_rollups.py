@@ -0,0 +1,59 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySubscriptionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('new', models.PositiveIntegerField(default=0)),
+                ('renewed', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('expired', models.PositiveIntegerField(default=0)),
+                ('active', models.PositiveIntegerField(default=0)),
+                ('mrr', models.DecimalField(decimal_places=2, default=0, help_text='Monthly recurring revenue', max_digits=14)),
+            ],
+            options={
+                'db_table': 'admin_dashboard_daily_subscription_stats',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('processed_through', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'admin_dashboard_rollup_watermark',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('currency', models.CharField(max_length=3)),
+                ('plan', models.CharField(blank=True, max_length=100)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'db_table': 'admin_dashboard_daily_revenue',
+                'ordering': ['date', 'currency', 'plan'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'currency', 'plan'), name='unique_daily_revenue')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0001_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_at', models.DateTimeField(db_index=True)),
+                ('duration_ms', models.PositiveIntegerField(default=0, help_text='Time taken to compute')),
+                ('data', models.JSONField(default=dict)),
+            ],
+            options={
+                'db_table': 'admin_dashboard_metrics_snapshot',
+                'ordering': ['-computed_at'],
+            },
+        ),
+    ]
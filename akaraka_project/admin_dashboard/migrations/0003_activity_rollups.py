@@ -0,0 +1,68 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0002_metrics_snapshot'),
+        ('courses', '0008_enrollment_date_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('signups', models.PositiveIntegerField(default=0)),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+                ('course_completions', models.PositiveIntegerField(default=0)),
+                ('lesson_completions', models.PositiveIntegerField(default=0)),
+                ('exercise_attempts', models.PositiveIntegerField(default=0)),
+                ('correct_attempts', models.PositiveIntegerField(default=0)),
+                ('posts', models.PositiveIntegerField(default=0)),
+                ('active_users', models.PositiveIntegerField(default=0, help_text='Users who attempted, completed or posted anything')),
+            ],
+            options={
+                'db_table': 'admin_dashboard_daily_activity',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCourseActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to='courses.course')),
+            ],
+            options={
+                'db_table': 'admin_dashboard_daily_course_activity',
+                'ordering': ['date', 'course'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'course'), name='unique_daily_course_activity')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyUserActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('exercise_attempts', models.PositiveIntegerField(default=0)),
+                ('correct_attempts', models.PositiveIntegerField(default=0)),
+                ('lesson_completions', models.PositiveIntegerField(default=0)),
+                ('posts', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'admin_dashboard_daily_user_activity',
+                'ordering': ['date', 'user'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'user'), name='unique_daily_user_activity')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0003_activity_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='metricssnapshot',
+            name='refresh_claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a process claimed the refresh of this stale snapshot', null=True),
+        ),
+    ]
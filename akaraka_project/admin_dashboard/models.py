@@ -1,2 +1,135 @@
-# Admin Dashboard Models - Currently using existing app models
-# This file can be extended in the future for admin-specific functionality
+from django.db import models
+from django.contrib.auth import get_user_model
+from courses.models import Course
+
+User = get_user_model()
+
+
+class RollupWatermark(models.Model):
+    """Last day an incremental rollup job has fully processed"""
+    name = models.CharField(max_length=50, unique=True)
+    processed_through = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'admin_dashboard_rollup_watermark'
+
+    def __str__(self):
+        return f"{self.name} through {self.processed_through}"
+
+
+class DailyRevenue(models.Model):
+    """Completed payments of one day, by currency and plan"""
+    date = models.DateField()
+    currency = models.CharField(max_length=3)
+    plan = models.CharField(max_length=100, blank=True)
+    payment_count = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'admin_dashboard_daily_revenue'
+        ordering = ['date', 'currency', 'plan']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'currency', 'plan'], name='unique_daily_revenue'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.plan or '-'}: {self.amount} {self.currency}"
+
+
+class DailySubscriptionStats(models.Model):
+    """Subscription movements of one day and the state at its end"""
+    date = models.DateField(unique=True)
+    new = models.PositiveIntegerField(default=0)
+    renewed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    expired = models.PositiveIntegerField(default=0)
+    active = models.PositiveIntegerField(default=0)
+    mrr = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Monthly recurring revenue")
+
+    class Meta:
+        db_table = 'admin_dashboard_daily_subscription_stats'
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date}: {self.active} active, MRR {self.mrr}"
+
+
+class MetricsSnapshot(models.Model):
+    """Dashboard headline figures as computed at one moment"""
+    computed_at = models.DateTimeField(db_index=True)
+    duration_ms = models.PositiveIntegerField(default=0, help_text="Time taken to compute")
+    data = models.JSONField(default=dict)
+    refresh_claimed_at = models.DateTimeField(
+        null=True, blank=True, help_text="When a process claimed the refresh of this stale snapshot"
+    )
+
+    class Meta:
+        db_table = 'admin_dashboard_metrics_snapshot'
+        ordering = ['-computed_at']
+
+    def __str__(self):
+        return f"Metrics at {self.computed_at}"
+
+    @property
+    def age(self):
+        from django.utils import timezone
+        return timezone.now() - self.computed_at
+
+
+class DailyActivity(models.Model):
+    """Site-wide learning and community activity of one day"""
+    date = models.DateField(unique=True)
+    signups = models.PositiveIntegerField(default=0)
+    enrollments = models.PositiveIntegerField(default=0)
+    course_completions = models.PositiveIntegerField(default=0)
+    lesson_completions = models.PositiveIntegerField(default=0)
+    exercise_attempts = models.PositiveIntegerField(default=0)
+    correct_attempts = models.PositiveIntegerField(default=0)
+    posts = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(default=0, help_text="Users who attempted, completed or posted anything")
+
+    class Meta:
+        db_table = 'admin_dashboard_daily_activity'
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date}: {self.signups} signups, {self.exercise_attempts} attempts"
+
+
+class DailyCourseActivity(models.Model):
+    """Enrollments in and completions of one course on one day"""
+    date = models.DateField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_activity')
+    enrollments = models.PositiveIntegerField(default=0)
+    completions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'admin_dashboard_daily_course_activity'
+        ordering = ['date', 'course']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'course'], name='unique_daily_course_activity'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} course {self.course_id}: {self.enrollments} enrollments"
+
+
+class DailyUserActivity(models.Model):
+    """What one user did on one day (only users who did something get a row)"""
+    date = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_activity')
+    exercise_attempts = models.PositiveIntegerField(default=0)
+    correct_attempts = models.PositiveIntegerField(default=0)
+    lesson_completions = models.PositiveIntegerField(default=0)
+    posts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'admin_dashboard_daily_user_activity'
+        ordering = ['date', 'user']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'user'], name='unique_daily_user_activity'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} user {self.user_id}: {self.exercise_attempts} attempts"
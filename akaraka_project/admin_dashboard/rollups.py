@@ -0,0 +1,210 @@
+"""
+Revenue and subscription rollups
+Summing Payment.amount or scanning UserSubscription on every admin page load
+gets slower as the tables grow. run_rollups() instead aggregates each
+finished day once into DailyRevenue (by currency and plan) and
+DailySubscriptionStats (new, renewed, cancelled and expired subscriptions,
+active count and MRR at the end of the day). A watermark records the last
+day processed, so each run only touches the days since.
+
+Admin pages read any date range with one indexed range query on the rollup
+tables. Figures run through the watermark (normally yesterday).
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Exists, Min, OuterRef, Q, Sum
+from django.utils import timezone
+
+from payments.models import Payment, UserSubscription
+from .models import RollupWatermark, DailyRevenue, DailySubscriptionStats
+
+WATERMARK_NAME = 'revenue'
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366 * 3
+
+
+def day_bounds(day):
+    """Aware [start, end) datetimes of a day in the current time zone"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def rollup_revenue(day):
+    """Rewrite the day's DailyRevenue rows; returns the number of rows"""
+    start, end = day_bounds(day)
+    rows = Payment.objects.filter(
+        status='completed', paid_at__gte=start, paid_at__lt=end
+    ).values('currency', 'subscription__name').annotate(
+        count=Count('id'), total=Sum('amount')
+    ).order_by()
+    DailyRevenue.objects.filter(date=day).delete()
+    return len(DailyRevenue.objects.bulk_create([
+        DailyRevenue(
+            date=day,
+            currency=row['currency'],
+            plan=row['subscription__name'] or '',
+            payment_count=row['count'],
+            amount=row['total'],
+        )
+        for row in rows
+    ]))
+
+
+def rollup_subscriptions(day):
+    """Write the day's DailySubscriptionStats row"""
+    start, end = day_bounds(day)
+    # A completed payment is a renewal if the user had paid before
+    earlier = Payment.objects.filter(
+        user_id=OuterRef('user_id'), status='completed', paid_at__lt=OuterRef('paid_at')
+    )
+    movements = Payment.objects.filter(
+        status='completed', paid_at__gte=start, paid_at__lt=end
+    ).annotate(is_renewal=Exists(earlier)).aggregate(
+        new=Count('id', filter=Q(is_renewal=False)),
+        renewed=Count('id', filter=Q(is_renewal=True)),
+    )
+    active = (
+        Q(start_date__lt=end, end_date__gte=end)
+        & (Q(cancelled_at__isnull=True) | Q(cancelled_at__gte=end))
+        # Cancelled before cancelled_at was recorded
+        & ~Q(status='cancelled', cancelled_at__isnull=True)
+    )
+    state = UserSubscription.objects.aggregate(
+        cancelled=Count('id', filter=Q(cancelled_at__gte=start, cancelled_at__lt=end)),
+        expired=Count('id', filter=Q(end_date__gte=start, end_date__lt=end)),
+        active=Count('id', filter=active),
+        mrr=Sum('subscription__price_monthly', filter=active),
+    )
+    stats, _ = DailySubscriptionStats.objects.update_or_create(
+        date=day,
+        defaults={
+            'new': movements['new'],
+            'renewed': movements['renewed'],
+            'cancelled': state['cancelled'],
+            'expired': state['expired'],
+            'active': state['active'],
+            'mrr': state['mrr'] or Decimal('0'),
+        },
+    )
+    return stats
+
+
+def get_watermark(name=WATERMARK_NAME):
+    """Last day a rollup job has processed, or None before its first run"""
+    return RollupWatermark.objects.filter(name=name).values_list('processed_through', flat=True).first()
+
+
+def _first_day():
+    first = Payment.objects.filter(status='completed').aggregate(first=Min('paid_at'))['first']
+    first_subscription = UserSubscription.objects.aggregate(first=Min('start_date'))['first']
+    candidates = [timezone.localdate(value) for value in (first, first_subscription) if value]
+    return min(candidates) if candidates else None
+
+
+def run_daily(name, steps, first_day, through=None, since=None):
+    """
+    Run a rollup job's steps for every finished day after its watermark
+
+    Args:
+        name: Watermark name of the job
+        steps: Callables taking a day, run in order
+        first_day: Callable returning the first day with data (or None)
+        through: Last day to process (default yesterday)
+        since: Reprocess from this day instead of the watermark
+
+    Returns:
+        int: Number of days processed
+    """
+    through = through or timezone.localdate() - timedelta(days=1)
+    if since:
+        day = since
+    else:
+        watermark = get_watermark(name)
+        day = watermark + timedelta(days=1) if watermark else first_day()
+    if day is None:
+        return 0
+
+    processed = 0
+    while day <= through:
+        # Each day commits with its watermark, so an interrupted run resumes where it stopped
+        with transaction.atomic():
+            for step in steps:
+                step(day)
+            RollupWatermark.objects.update_or_create(
+                name=name, defaults={'processed_through': day}
+            )
+        day += timedelta(days=1)
+        processed += 1
+    return processed
+
+
+def run_rollups(through=None, since=None):
+    """
+    Roll up revenue and subscriptions for every finished day after the watermark
+
+    Returns:
+        int: Number of days processed
+    """
+    return run_daily(WATERMARK_NAME, [rollup_revenue, rollup_subscriptions], _first_day, through, since)
+
+
+def parse_date_range(request, default_days=DEFAULT_RANGE_DAYS):
+    """
+    (start, end) dates from ?start=&end= (YYYY-MM-DD), ending yesterday by default
+    """
+    end = timezone.localdate() - timedelta(days=1)
+    try:
+        end = datetime.strptime(request.GET['end'], '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        pass
+    start = end - timedelta(days=default_days - 1)
+    try:
+        start = datetime.strptime(request.GET['start'], '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        pass
+    start = max(min(start, end), end - timedelta(days=MAX_RANGE_DAYS))
+    return start, end
+
+
+def revenue_by_plan(start, end):
+    """
+    Revenue over a date range
+
+    Returns:
+        list: dicts with currency, plan, payments, amount; largest first
+    """
+    return list(
+        DailyRevenue.objects.filter(date__range=(start, end))
+        .values('currency', 'plan')
+        .annotate(payments=Sum('payment_count'), amount=Sum('amount'))
+        .order_by('currency', '-amount')
+    )
+
+
+def revenue_totals(rows):
+    """Sum revenue_by_plan() rows per currency"""
+    totals = defaultdict(Decimal)
+    for row in rows:
+        totals[row['currency']] += row['amount']
+    return dict(totals)
+
+
+def subscription_summary(start, end):
+    """
+    Subscription movements over a date range
+
+    Returns:
+        dict: days (DailySubscriptionStats list) plus new/renewed/cancelled/
+        expired totals and the active count and MRR at the end of the range
+    """
+    days = list(DailySubscriptionStats.objects.filter(date__range=(start, end)))
+    summary = {
+        field: sum(getattr(stats, field) for stats in days)
+        for field in ('new', 'renewed', 'cancelled', 'expired')
+    }
+    summary['days'] = days
+    summary['active'] = days[-1].active if days else 0
+    summary['mrr'] = days[-1].mrr if days else Decimal('0')
+    return summary
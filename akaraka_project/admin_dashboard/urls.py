@@ -6,6 +6,7 @@ app_name = 'admin_dashboard'
 urlpatterns = [
     # Dashboard
     path('', views.dashboard, name='dashboard'),
+    path('metrics/refresh/', views.refresh_metrics, name='refresh_metrics'),
     
     # User Management
     path('users/', views.user_management, name='user_management'),
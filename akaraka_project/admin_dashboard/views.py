@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.contrib import messages
 from django.db.models import Count, Sum, Q
 from django.utils import timezone
+from django.views.decorators.http import require_POST
 from datetime import timedelta
 from courses.models import Course, CourseEnrollment, Lesson
 from community.models import Post, Comment
@@ -10,7 +11,12 @@ from payments.models import UserSubscription, Payment
 from certificates.models import Certificate
 from gamification.models import Badge, UserBadge
 from exercises.models import UserExerciseResponse
+from akaraka.pagination import paginate
 from .decorators import admin_required
+from .models import DailySubscriptionStats
+from .activity import ACTIVITY_WATERMARK, activity_summary, most_active_users, popular_courses
+from .metrics import get_snapshot, refresh_snapshot, top_courses
+from .rollups import get_watermark, parse_date_range, revenue_by_plan, revenue_totals, subscription_summary
 
 User = get_user_model()
 
@@ -19,62 +25,47 @@ User = get_user_model()
 def dashboard(request):
     """Main admin dashboard with statistics"""
     
-    # User statistics
-    total_users = User.objects.count()
-    new_users_today = User.objects.filter(
-        date_joined__date=timezone.now().date()
-    ).count()
-    new_users_week = User.objects.filter(
-        date_joined__gte=timezone.now() - timedelta(days=7)
-    ).count()
+    # Headline counts come from the periodically refreshed snapshot
+    snapshot = get_snapshot()
     
-    # Course statistics
-    total_courses = Course.objects.count()
-    published_courses = Course.objects.filter(is_published=True).count()
-    total_enrollments = CourseEnrollment.objects.count()
-    
-    # Revenue statistics
-    active_subscriptions = UserSubscription.objects.filter(status='active').count()
-    
-    # Activity statistics
-    total_posts = Post.objects.count()
-    total_certificates = Certificate.objects.count()
-    total_badges_earned = UserBadge.objects.count()
+    # Revenue statistics (from the daily rollups)
+    revenue_start, revenue_end = parse_date_range(request)
+    revenue_30_days = revenue_totals(revenue_by_plan(revenue_start, revenue_end))
+    latest_stats = DailySubscriptionStats.objects.order_by('-date').first()
     
     # Recent users
     recent_users = User.objects.order_by('-date_joined')[:10]
     
-    # Top courses
-    top_courses = Course.objects.annotate(
-        enrollment_count=Count('enrollments')
-    ).order_by('-enrollment_count')[:5]
-    
     # Recent activity
     recent_exercises = UserExerciseResponse.objects.order_by('-completed_at')[:5]
     
     context = {
-        'total_users': total_users,
-        'new_users_today': new_users_today,
-        'new_users_week': new_users_week,
-        'total_courses': total_courses,
-        'published_courses': published_courses,
-        'total_enrollments': total_enrollments,
-        'active_subscriptions': active_subscriptions,
-        'total_posts': total_posts,
-        'total_certificates': total_certificates,
-        'total_badges_earned': total_badges_earned,
+        **snapshot.data,
+        'metrics_computed_at': snapshot.computed_at,
+        'revenue_30_days': revenue_30_days,
+        'mrr': latest_stats.mrr if latest_stats else 0,
+        'rollups_through': latest_stats.date if latest_stats else None,
         'recent_users': recent_users,
-        'top_courses': top_courses,
+        'top_courses': top_courses(snapshot),
         'recent_exercises': recent_exercises,
     }
     
     return render(request, 'admin_dashboard/dashboard.html', context)
 
 
+@admin_required
+@require_POST
+def refresh_metrics(request):
+    """Recompute the dashboard metrics snapshot now"""
+    snapshot = refresh_snapshot()
+    messages.success(request, f'Dashboard metrics refreshed in {snapshot.duration_ms} ms.')
+    return redirect('admin_dashboard:dashboard')
+
+
 @admin_required
 def user_management(request):
     """Manage all users"""
-    users = User.objects.all().order_by('-date_joined')
+    users = User.objects.all()
     
     # Search
     search_query = request.GET.get('search', '')
@@ -96,10 +87,7 @@ def user_management(request):
         users = users.filter(is_active=False)
     
     # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(users, 20)
-    page = request.GET.get('page', 1)
-    users = paginator.get_page(page)
+    users = paginate(request, users, ('-date_joined', '-id'), 20)
     
     context = {
         'users': users,
@@ -167,7 +155,7 @@ def toggle_staff_status(request, user_id):
 @admin_required
 def course_management(request):
     """Manage all courses"""
-    courses = Course.objects.all().order_by('-created_at')
+    courses = Course.objects.all()
     
     # Filter by status
     status_filter = request.GET.get('status', '')
@@ -184,10 +172,7 @@ def course_management(request):
         courses = courses.filter(title__icontains=search_query)
     
     # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(courses, 15)
-    page = request.GET.get('page', 1)
-    courses = paginator.get_page(page)
+    courses = paginate(request, courses, ('-created_at', '-id'), 15)
     
     context = {
         'courses': courses,
@@ -228,12 +213,12 @@ def toggle_course_publish(request, course_id):
 @admin_required
 def community_management(request):
     """Manage community posts and comments"""
-    posts = Post.objects.all().order_by('-created_at')
+    posts = Post.objects.select_related('author')
     
     # Filter
     filter_type = request.GET.get('filter', '')
     if filter_type == 'reported':
-        posts = posts.filter(is_reported=True)
+        posts = posts.filter(reports__status='pending').distinct()
     elif filter_type == 'featured':
         posts = posts.filter(is_featured=True)
     
@@ -243,10 +228,7 @@ def community_management(request):
         posts = posts.filter(title__icontains=search_query)
     
     # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(posts, 20)
-    page = request.GET.get('page', 1)
-    posts = paginator.get_page(page)
+    posts = paginate(request, posts, ('-created_at', '-id'), 20)
     
     context = {
         'posts': posts,
@@ -282,7 +264,7 @@ def delete_post(request, post_id):
 @admin_required
 def subscription_management(request):
     """Manage subscriptions"""
-    subscriptions = UserSubscription.objects.all().order_by('-start_date')
+    subscriptions = UserSubscription.objects.select_related('user', 'subscription')
     
     # Filter
     status_filter = request.GET.get('status', '')
@@ -290,20 +272,27 @@ def subscription_management(request):
         subscriptions = subscriptions.filter(status=status_filter)
     
     # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(subscriptions, 20)
-    page = request.GET.get('page', 1)
-    subscriptions = paginator.get_page(page)
+    subscriptions = paginate(request, subscriptions, ('-start_date', '-id'), 20)
     
     # Stats
     active_subs = UserSubscription.objects.filter(status='active').count()
     cancelled_subs = UserSubscription.objects.filter(status='cancelled').count()
     
+    # Revenue and movements over the selected range, from the daily rollups
+    start_date, end_date = parse_date_range(request)
+    revenue_rows = revenue_by_plan(start_date, end_date)
+    
     context = {
         'subscriptions': subscriptions,
         'status_filter': status_filter,
         'active_count': active_subs,
         'cancelled_count': cancelled_subs,
+        'start_date': start_date,
+        'end_date': end_date,
+        'revenue_rows': revenue_rows,
+        'revenue_totals': revenue_totals(revenue_rows),
+        'movements': subscription_summary(start_date, end_date),
+        'rollups_through': get_watermark(),
     }
     return render(request, 'admin_dashboard/subscription_management.html', context)
 
@@ -312,48 +301,31 @@ def subscription_management(request):
 def analytics(request):
     """View analytics and reports"""
     
-    # Time period filter
+    # Time period filter (a preset length, or ?start=&end=)
     period = request.GET.get('period', '30')
+    if period not in ('7', '30', '90'):
+        period = '30'
+    start_date, end_date = parse_date_range(request, default_days=int(period))
     
-    if period == '7':
-        start_date = timezone.now() - timedelta(days=7)
-    elif period == '90':
-        start_date = timezone.now() - timedelta(days=90)
-    else:  # 30 days default
-        start_date = timezone.now() - timedelta(days=30)
-    
-    # User growth
-    new_users = User.objects.filter(date_joined__gte=start_date).count()
-    
-    # Course enrollments growth
-    new_enrollments = CourseEnrollment.objects.filter(
-        enrolled_at__gte=start_date
-    ).count()
-    
-    # Course completion rate
-    total_enrollments = CourseEnrollment.objects.count()
-    completed_enrollments = CourseEnrollment.objects.filter(
-        is_completed=True
-    ).count()
-    completion_rate = (completed_enrollments / total_enrollments * 100) if total_enrollments > 0 else 0
-    
-    # Most popular courses
-    popular_courses = Course.objects.annotate(
-        enrollment_count=Count('enrollments')
-    ).order_by('-enrollment_count')[:10]
-    
-    # Most active users
-    active_users = User.objects.annotate(
-        exercise_count=Count('exercise_responses')
-    ).order_by('-exercise_count')[:10]
+    # Everything below is summed from the daily activity rollups
+    activity = activity_summary(start_date, end_date)
+    
+    # Course completion rate (all time, from the metrics snapshot)
+    snapshot = get_snapshot().data
+    total_enrollments = snapshot.get('total_enrollments', 0)
+    completion_rate = (snapshot.get('completed_enrollments', 0) / total_enrollments * 100) if total_enrollments > 0 else 0
     
     context = {
         'period': period,
-        'new_users': new_users,
-        'new_enrollments': new_enrollments,
+        'start_date': start_date,
+        'end_date': end_date,
+        'activity': activity,
+        'new_users': activity['signups'],
+        'new_enrollments': activity['enrollments'],
         'completion_rate': round(completion_rate, 2),
-        'popular_courses': popular_courses,
-        'active_users': active_users,
+        'popular_courses': popular_courses(start_date, end_date),
+        'active_users': most_active_users(start_date, end_date),
+        'rollups_through': get_watermark(ACTIVITY_WATERMARK),
     }
     return render(request, 'admin_dashboard/analytics.html', context)
 
@@ -603,6 +575,12 @@ def exercise_detail(request, exercise_id):
     if exercise.exercise_type == 'listening':
         listening_exercise = ListeningExercise.objects.filter(exercise=exercise).first()
     
+    # Item statistics come from counters maintained at grading time
+    question_stats = []
+    if exercise.exercise_type == 'mcq':
+        from exercises.item_stats import question_statistics
+        question_stats = question_statistics(exercise)
+    
     # Get linked lessons
     linked_lessons = exercise.lesson_links.all().select_related('lesson', 'lesson__course')
     all_lessons = Lesson.objects.select_related('course').filter(is_published=True)
@@ -614,6 +592,7 @@ def exercise_detail(request, exercise_id):
     context = {
         'exercise': exercise,
         'listening_exercise': listening_exercise,
+        'question_stats': question_stats,
         'linked_lessons': linked_lessons,
         'available_lessons': available_lessons,
     }
@@ -634,6 +613,9 @@ def edit_exercise(request, exercise_id):
             exercise.difficulty = request.POST.get('difficulty', exercise.difficulty)
             exercise.xp_reward = request.POST.get('xp_reward', exercise.xp_reward)
             exercise.is_published = request.POST.get('is_published') == 'on'
+            if exercise.exercise_type == 'mcq':
+                exercise.questions_per_attempt = request.POST.get('questions_per_attempt') or 0
+                exercise.stratify_by_difficulty = request.POST.get('stratify_by_difficulty') == 'on'
             exercise.save()
             
             messages.success(request, f'Exercise "{exercise.title}" updated successfully!')
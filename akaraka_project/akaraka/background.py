@@ -0,0 +1,46 @@
+"""
+Background work
+Slow follow-up work of a request (rendering invoices and certificates) runs
+on a small per-process thread pool once the request's transaction commits,
+so the user never waits on it and the work never sees uncommitted rows.
+
+Work is not persisted: anything lost to a restart is picked up by the
+catch-up commands (generate_invoices, issue_certificates), which find
+unfinished rows with a query. BACKGROUND_WORKERS=0 runs the work inline
+after commit instead (tests, one-off scripts).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.BACKGROUND_WORKERS, thread_name_prefix='background')
+        return _executor
+
+
+def _run(func, args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception(f"Background task {func.__module__}.{func.__name__}{args} failed")
+    finally:
+        connection.close()
+
+
+def run_after_commit(func, *args):
+    """Call func(*args) in the background once the current transaction commits"""
+    if settings.BACKGROUND_WORKERS <= 0:
+        transaction.on_commit(lambda: func(*args))
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run, func, args))
@@ -0,0 +1,191 @@
+"""
+Keyset (cursor) pagination
+OFFSET pagination makes the database read and discard every row before the
+page, and Django's Paginator adds a COUNT(*) per request. CursorPaginator
+instead orders on an indexed (sort key, id) tuple and fetches the rows after
+(or before) the boundary row of the previous page, so every page costs one
+index range scan of per_page + 1 rows, however deep it is.
+
+Cursors are opaque URL-safe tokens carrying the boundary row's sort values,
+the direction, and the boundary's position, so lists can still number
+their rows (e.g. leaderboard ranks) without counting.
+"""
+import base64
+import json
+from collections.abc import Sequence
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import JsonResponse
+
+DEFAULT_CURSOR_PARAM = 'cursor'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _field_name(ordering):
+    return ordering.lstrip('-')
+
+
+def _json_value(value):
+    # Full precision isoformat: a truncated timestamp would skip or repeat rows
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class CursorPage(Sequence):
+    """One page of a CursorPaginator"""
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor, start_index):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._start_index = start_index
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def start_index(self):
+        """1-based position of the first row in the whole list"""
+        return self._start_index
+
+    def end_index(self):
+        return self._start_index + len(self.object_list) - 1
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset by keyset
+
+    Args:
+        queryset: Rows to paginate
+        ordering: Sort fields, e.g. ('-created_at', '-id'); the last one must
+            be unique and none may be NULL
+        per_page: Rows per page
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+
+    def encode_cursor(self, row, direction, position):
+        values = [_json_value(getattr(row, _field_name(field))) for field in self.ordering]
+        payload = json.dumps([direction, position, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            direction, position, values = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError):
+            raise InvalidCursor(token)
+        if direction not in ('next', 'prev') or not isinstance(position, int) or position < 1:
+            raise InvalidCursor(token)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor(token)
+        return direction, position, values
+
+    def _boundary(self, values, after):
+        """Rows strictly after (or before) the boundary row in sort order"""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = _field_name(field)
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == after else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[index]})
+            for previous_field, previous_value in zip(self.ordering[:index], values[:index]):
+                term &= Q(**{_field_name(previous_field): previous_value})
+            condition |= term
+        return condition
+
+    def _reversed_ordering(self):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+
+    def get_page(self, cursor=None):
+        """Return the page a cursor points to; a missing or bad cursor gives the first page"""
+        if cursor:
+            try:
+                return self._page(*self.decode_cursor(cursor))
+            except (InvalidCursor, ValueError, ValidationError):
+                pass
+        return self._page('next', 1, None)
+
+    def _page(self, direction, position, values):
+        if direction == 'next':
+            rows = self.queryset.order_by(*self.ordering)
+            if values is not None:
+                rows = rows.filter(self._boundary(values, after=True))
+            rows = list(rows[:self.per_page + 1])
+            more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            start = position if values is None else position + 1
+            has_next, has_previous = more, values is not None
+        else:
+            rows = self.queryset.order_by(*self._reversed_ordering()).filter(self._boundary(values, after=False))
+            rows = list(rows[:self.per_page + 1])
+            more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            start = max(position - len(rows), 1)
+            has_next, has_previous = True, more
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1], 'next', start + len(rows) - 1)
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(rows[0], 'prev', start)
+        return CursorPage(rows, self, next_cursor, previous_cursor, start)
+
+
+class CursorPaginationMixin:
+    """
+    ListView mixin replacing OFFSET pagination with CursorPaginator
+
+    Set cursor_ordering (or override get_cursor_ordering); templates get
+    page_obj.next_cursor / previous_cursor and page_obj.start_index.
+    """
+    cursor_ordering = ('-id',)
+    cursor_param = DEFAULT_CURSOR_PARAM
+
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, self.get_cursor_ordering(), page_size)
+        page = paginator.get_page(self.request.GET.get(self.cursor_param))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+def carried_query_string(request, param=DEFAULT_CURSOR_PARAM):
+    """Current filters as '&...' for appending to a ?cursor= link"""
+    params = request.GET.copy()
+    params.pop(param, None)
+    params.pop('page', None)
+    return f'&{params.urlencode()}' if params else ''
+
+
+def paginate(request, queryset, ordering, per_page, param=DEFAULT_CURSOR_PARAM):
+    """Cursor page for function-based views"""
+    return CursorPaginator(queryset, ordering, per_page).get_page(request.GET.get(param))
+
+
+def cursor_json_response(page, serialize):
+    """JSON API response: serialized rows plus next/previous cursors"""
+    return JsonResponse({
+        'results': [serialize(row) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
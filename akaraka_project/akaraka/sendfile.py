@@ -0,0 +1,49 @@
+"""
+Serving stored files
+Private files (certificates) are checked by Django but should be streamed by
+the front-end server, not a Python worker. With SENDFILE_BACKEND set,
+sendfile_response() only returns a header pointing at the file:
+
+    'nginx'  - X-Accel-Redirect: SENDFILE_URL_PREFIX + <storage name>, served
+               from an ``internal`` location aliased to MEDIA_ROOT
+    'apache' - X-Sendfile: <absolute path> (mod_xsendfile)
+
+Without a backend (development) Django streams the file itself. Either way
+the response carries an ETag, so a repeat download that still has the file
+gets a 304 without touching it. Only local filesystem storage is supported
+by the header backends.
+"""
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, quote_etag
+
+PRIVATE_MAX_AGE = 60 * 60 * 24
+
+
+def sendfile_response(request, fieldfile, filename, etag, content_type='application/pdf'):
+    """
+    Download response for a stored FieldFile
+
+    Args:
+        fieldfile: The FileField value to send
+        filename: Download file name
+        etag: Opaque version of the file's content (e.g. its content hash)
+    """
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        backend = settings.SENDFILE_BACKEND
+        if backend == 'nginx':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = quote(settings.SENDFILE_URL_PREFIX + fieldfile.name)
+        elif backend == 'apache':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = fieldfile.path
+        else:
+            response = FileResponse(fieldfile.open('rb'), content_type=content_type)
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=PRIVATE_MAX_AGE)
+    return response
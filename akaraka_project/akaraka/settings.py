@@ -110,6 +110,11 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Private downloads are handed to the front-end server: '' (Django streams
+# them), 'nginx' (X-Accel-Redirect) or 'apache' (X-Sendfile); see akaraka/sendfile.py
+SENDFILE_BACKEND = config('SENDFILE_BACKEND', default='')
+SENDFILE_URL_PREFIX = config('SENDFILE_URL_PREFIX', default='/protected-media/')
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom User Model
@@ -135,6 +140,23 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 # Stripe Configuration (for payments)
 STRIPE_PUBLIC_KEY = config('STRIPE_PUBLIC_KEY', default='pk_test_xxx')
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='sk_test_xxx')
+# Required by StripeGateway: without it anyone could forge webhook events
+STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default='')
+# payments.gateway.FakeStripeGateway stands in for Stripe in development and load runs;
+# with StripeGateway the payments.E002 system check requires STRIPE_WEBHOOK_SECRET
+PAYMENT_GATEWAY = config(
+    'PAYMENT_GATEWAY',
+    default='payments.gateway.FakeStripeGateway' if DEBUG else 'payments.gateway.StripeGateway',
+)
+
+# Name shown as the issuer on invoice PDFs
+INVOICE_ISSUER = config('INVOICE_ISSUER', default='Akaraka')
+
+# Threads per process for after-commit work such as PDF rendering (0 runs it inline)
+BACKGROUND_WORKERS = config('BACKGROUND_WORKERS', default=2, cast=int)
+
+# Seconds before the admin dashboard's metrics snapshot is recomputed in the background
+DASHBOARD_METRICS_MAX_AGE = config('DASHBOARD_METRICS_MAX_AGE', default=600, cast=int)
 
 # Cache Configuration
 CACHES = {
@@ -154,9 +176,11 @@ SESSION_COOKIE_SECURE = config('SESSION_COOKIE_SECURE', default=False, cast=bool
 CSRF_COOKIE_SECURE = config('CSRF_COOKIE_SECURE', default=False, cast=bool)
 
 # XP and Gamification Settings
+# Defaults; individual values can be overridden in the admin (gamification.XPRule)
 XP_SETTINGS = {
     'lesson_complete': 10,
     'exercise_correct': 5,
+    'post_create': 2,
     'post_like': 1,
     'comment': 2,
     'daily_streak_bonus': 5,
@@ -0,0 +1,51 @@
+"""
+Text folding shared by answer matching and forum search
+fold_text() maps Dari and Latin text to one canonical form, so spellings
+that differ only in Unicode form, Arabic vs Persian letter forms, digits,
+typographic quotes, ZWNJ, tatweel, diacritics or case compare equal.
+"""
+import unicodedata
+
+# Arabic code points that Dari text should use the Persian form of
+_DARI_CHAR_MAP = {
+    'ي': 'ی',  # ARABIC LETTER YEH -> FARSI YEH
+    'ى': 'ی',  # ARABIC LETTER ALEF MAKSURA -> FARSI YEH
+    'ك': 'ک',  # ARABIC LETTER KAF -> KEHEH
+    'ة': 'ه',  # TEH MARBUTA -> HEH
+    'ۀ': 'ه',  # HEH WITH YEH ABOVE -> HEH
+    'أ': 'ا',  # ALEF WITH HAMZA ABOVE -> ALEF
+    'إ': 'ا',  # ALEF WITH HAMZA BELOW -> ALEF
+    'ٱ': 'ا',  # ALEF WASLA -> ALEF
+}
+
+# Characters dropped entirely: ZWNJ/ZWJ, tatweel and Arabic diacritics
+_DROPPED_CHARS = ['‌', '‍', '‏', '‎', 'ـ'] + [
+    chr(code) for code in range(0x064B, 0x0653)
+] + ['ٰ']
+
+# Arabic-Indic and Persian digits -> ASCII digits
+_DIGIT_MAP = {}
+for _i in range(10):
+    _DIGIT_MAP[chr(0x0660 + _i)] = str(_i)
+    _DIGIT_MAP[chr(0x06F0 + _i)] = str(_i)
+
+# Typographic quotes are folded to ASCII before contractions are expanded
+_QUOTE_MAP = {
+    '‘': "'", '’': "'", 'ʼ': "'", '`': "'",
+    '“': '"', '”': '"',
+}
+
+_TRANSLATION_TABLE = str.maketrans({
+    **_DARI_CHAR_MAP,
+    **_DIGIT_MAP,
+    **_QUOTE_MAP,
+    **{char: None for char in _DROPPED_CHARS},
+})
+
+
+def fold_text(text):
+    """
+    Fold text to a canonical form: NFKC, Persian letter forms, ASCII digits,
+    no ZWNJ/tatweel/diacritics, case-folded
+    """
+    return unicodedata.normalize('NFKC', text).translate(_TRANSLATION_TABLE).casefold()
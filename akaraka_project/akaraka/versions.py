@@ -0,0 +1,66 @@
+"""
+Database-backed cache versions
+The default cache is per process (LocMemCache), so deleting a key only
+clears it in the process that made the change. Data that every process
+caches is instead keyed on a version number kept in a database row: a change
+bumps the row once it commits, and each process reads the row at most every
+CHECK_INTERVAL seconds, so all of them move to the new version within that
+interval for one tiny query. gamification.config uses the same scheme for
+its single ConfigVersion row.
+
+An app declares a concrete VersionRow model and one DBVersion per cache:
+
+    class CacheVersion(VersionRow):
+        class Meta:
+            db_table = 'exercises_cache_version'
+
+    BANK_VERSION = DBVersion(CacheVersion, 'question_bank')
+"""
+import time
+from django.db import models, transaction
+from django.db.models import F
+
+CHECK_INTERVAL = 5  # seconds a process trusts the version it last read
+
+
+class VersionRow(models.Model):
+    """A named counter bumped whenever the data it versions changes"""
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=1)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class DBVersion:
+    """One named version row, read at most every check_interval seconds"""
+
+    def __init__(self, model, name, check_interval=CHECK_INTERVAL):
+        self.model = model
+        self.name = name
+        self.check_interval = check_interval
+        self._version = None
+        self._checked_at = 0
+
+    def get(self):
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= self.check_interval:
+            version = self.model.objects.filter(name=self.name).values_list('version', flat=True).first()
+            self._version, self._checked_at = version or 1, now
+        return self._version
+
+    def bump(self):
+        """Move every process to a new version; this process sees it immediately"""
+        if not self.model.objects.filter(name=self.name).update(version=F('version') + 1):
+            self.model.objects.get_or_create(name=self.name, defaults={'version': 2})
+        self._version = None
+
+    def bump_on_commit(self):
+        """
+        bump() once the current transaction commits, so no process can cache
+        the old rows under the new version
+        """
+        transaction.on_commit(self.bump)
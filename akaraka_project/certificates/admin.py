@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Certificate, CertificateTemplate
+from .models import Certificate, CertificateTemplate, RevokedCertificate
+from .verification import revoke
 
 
 @admin.register(Certificate)
@@ -8,6 +9,13 @@ class CertificateAdmin(admin.ModelAdmin):
     list_filter = ('is_verified', 'issue_date')
     search_fields = ('user__username', 'course__title', 'certificate_number')
     readonly_fields = ('issue_date', 'certificate_number', 'verification_code')
+    actions = ['revoke_certificates']
+    
+    @admin.action(description='Revoke selected certificates')
+    def revoke_certificates(self, request, queryset):
+        numbers = list(queryset.values_list('certificate_number', flat=True))
+        revoke(numbers, reason=f'Revoked by {request.user.username}')
+        self.message_user(request, f'{len(numbers)} certificate(s) revoked.')
 
 
 @admin.register(CertificateTemplate)
@@ -15,3 +23,10 @@ class CertificateTemplateAdmin(admin.ModelAdmin):
     list_display = ('name', 'course', 'is_active')
     list_filter = ('is_active',)
     search_fields = ('name',)
+
+
+@admin.register(RevokedCertificate)
+class RevokedCertificateAdmin(admin.ModelAdmin):
+    list_display = ('certificate_number', 'reason', 'revoked_at')
+    search_fields = ('certificate_number',)
+    readonly_fields = ('revoked_at',)
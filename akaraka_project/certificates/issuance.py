@@ -0,0 +1,201 @@
+"""
+Certificate issuance
+An enrollment that reaches 100% gets its certificate automatically:
+CourseEnrollment.update_progress() calls issue_certificate(), which creates
+the row and renders the PDF on the background pool after commit.
+
+issue_pending() catches up in bulk (the issue_certificates command): one
+anti-join finds completed enrollments without a certificate, rows are
+created with bulk_create, and PDFs are rendered in parallel when given a
+process pool. Rows are read and written by the calling process only.
+
+Certificate numbers are 64 random bits. bulk_create(ignore_conflicts=True)
+would silently drop a row whose number happened to be taken, so each batch
+checks which rows were really inserted and re-draws numbers for the rest.
+"""
+import logging
+import uuid
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from akaraka.background import run_after_commit
+from .rendering import (
+    certificate_data, ensure_certificate_pdf, pdf_key, render_certificate_pdf, store_certificate_pdf,
+    template_for_course,
+)
+from .verification import make_verification_code
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCORE = 100
+ISSUE_ATTEMPTS = 3  # bulk inserts per batch before giving up on number collisions
+
+
+def new_certificate(user, course, score=DEFAULT_SCORE):
+    """Unsaved Certificate with a fresh number and signed verification code"""
+    from .models import Certificate
+    number = f'CERT-{uuid.uuid4().hex[:16].upper()}'
+    return Certificate(
+        user=user,
+        course=course,
+        certificate_number=number,
+        verification_code=make_verification_code(
+            number, user.get_full_name() or user.username, course.title, timezone.localdate()
+        ),
+        score=score,
+    )
+
+
+def completed_uncertified():
+    """Completed enrollments that have no certificate yet (one anti-join)"""
+    from courses.models import CourseEnrollment
+    from .models import Certificate
+    certified = Certificate.objects.filter(user_id=OuterRef('user_id'), course_id=OuterRef('course_id'))
+    return CourseEnrollment.objects.filter(
+        Q(is_completed=True) | Q(progress_percentage__gte=100)
+    ).filter(~Exists(certified))
+
+
+def issue_certificate(user, course):
+    """
+    Certificate for a completed course, created if needed; the PDF is
+    rendered in the background once the transaction commits
+
+    Returns:
+        tuple: (Certificate, created)
+    """
+    from .models import Certificate
+    certificate = new_certificate(user, course)
+    certificate, created = Certificate.objects.get_or_create(
+        user=user,
+        course=course,
+        defaults={
+            'certificate_number': certificate.certificate_number,
+            'verification_code': certificate.verification_code,
+            'score': certificate.score,
+        }
+    )
+    if created or not certificate.pdf_file:
+        run_after_commit(render_certificate, certificate.id)
+    return certificate, created
+
+
+def render_certificate(certificate_id):
+    """Render one certificate's PDF unless it is current"""
+    from .models import Certificate
+    certificate = Certificate.objects.select_related('user', 'course').filter(id=certificate_id).first()
+    if certificate is not None:
+        ensure_certificate_pdf(certificate)
+
+
+def render_batch(certificates, pool=None, chunksize=1):
+    """
+    Render and store the PDFs of certificates (with user and course loaded)
+
+    Args:
+        pool: Executor to render on (e.g. a ProcessPoolExecutor); None renders here
+        chunksize: Certificates sent to a pool worker at a time
+
+    Returns:
+        int: Bytes rendered
+    """
+    jobs = []
+    for certificate in certificates:
+        data = certificate_data(certificate)
+        source = template_for_course(certificate.course_id)
+        jobs.append((certificate, pdf_key(data, source), data, source))
+    if pool is None:
+        pdfs = map(render_certificate_pdf, [job[2] for job in jobs], [job[3] for job in jobs])
+    else:
+        pdfs = pool.map(render_certificate_pdf, [job[2] for job in jobs], [job[3] for job in jobs], chunksize=chunksize)
+    rendered = 0
+    for (certificate, key, _, _), pdf in zip(jobs, pdfs):
+        store_certificate_pdf(certificate, key, pdf)
+        rendered += len(pdf)
+    return rendered
+
+
+def _create_certificates(enrollments):
+    """
+    Insert certificates for enrollments and return those really created
+
+    A row is skipped by ignore_conflicts either because the learner's own
+    request issued one meanwhile (fine) or because its random number was
+    already taken; the latter are retried with fresh numbers.
+    """
+    from .models import Certificate
+    created = []
+    pending = enrollments
+    for _ in range(ISSUE_ATTEMPTS):
+        rows = [new_certificate(enrollment.user, enrollment.course) for enrollment in pending]
+        Certificate.objects.bulk_create(rows, ignore_conflicts=True)
+        # A colliding number matches someone else's certificate, so check the owner too
+        owners = {row.certificate_number: (row.user_id, row.course_id) for row in rows}
+        created.extend(
+            certificate for certificate in Certificate.objects.filter(
+                certificate_number__in=owners
+            ).select_related('user', 'course')
+            if owners[certificate.certificate_number] == (certificate.user_id, certificate.course_id)
+        )
+        if len(created) == len(enrollments):
+            break
+        pending = list(completed_uncertified().filter(
+            id__in=[enrollment.id for enrollment in pending]
+        ).select_related('user', 'course'))
+        if not pending:
+            break
+    else:
+        logger.warning(f"Could not issue {len(pending)} certificate(s) after {ISSUE_ATTEMPTS} attempts")
+    return created
+
+
+def issue_pending(batch_size=500, limit=None, pool=None, chunksize=1, progress=None):
+    """
+    Issue certificates for all completed, uncertified enrollments
+
+    Args:
+        pool, chunksize: Executor to render PDFs on, see render_batch()
+        progress: Optional callable(issued) after each batch
+
+    Returns:
+        tuple: (certificates issued, bytes rendered)
+    """
+    issued = rendered = 0
+    last_id = 0
+    while limit is None or issued < limit:
+        size = batch_size if limit is None else min(batch_size, limit - issued)
+        enrollments = list(
+            completed_uncertified().filter(id__gt=last_id).order_by('id').select_related('user', 'course').only(
+                'user__username', 'user__first_name', 'user__last_name', 'course__title'
+            )[:size]
+        )
+        if not enrollments:
+            break
+        last_id = enrollments[-1].id
+
+        certificates = _create_certificates(enrollments)
+        rendered += render_batch(certificates, pool=pool, chunksize=chunksize)
+        issued += len(certificates)
+        if progress:
+            progress(issued)
+    return issued, rendered
+
+
+def render_missing(batch_size=500, pool=None, chunksize=1):
+    """
+    Render certificates that have no PDF yet (e.g. lost background renders)
+
+    Returns:
+        int: Certificates rendered
+    """
+    from .models import Certificate
+    missing = Certificate.objects.filter(Q(pdf_file='') | Q(pdf_file__isnull=True)).select_related('user', 'course')
+    done = 0
+    last_id = 0
+    while True:
+        certificates = list(missing.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not certificates:
+            return done
+        last_id = certificates[-1].id
+        render_batch(certificates, pool=pool, chunksize=chunksize)
+        done += len(certificates)
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0003_initial'),
+        ('courses', '0007_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['user', '-issue_date'], name='certificate_user_id_a35f41_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='pdf_key',
+            field=models.CharField(blank=True, editable=False, help_text='Content hash the PDF was rendered from', max_length=64),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0005_certificate_pdf_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificatetemplate',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='certificatetemplate',
+            name='template_html',
+            field=models.TextField(help_text='HTML template with {user_name}, {course_title}, {date}, {certificate_number}, {score}, {verification_code} and {verification_url}'),
+        ),
+    ]
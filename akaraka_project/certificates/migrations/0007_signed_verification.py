@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0006_certificatetemplate_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedCertificate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('certificate_number', models.CharField(max_length=255, unique=True)),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('revoked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'certificates_revoked_certificate',
+                'ordering': ['-revoked_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='verification_code',
+            field=models.CharField(blank=True, max_length=300, unique=True),
+        ),
+    ]
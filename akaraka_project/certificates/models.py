@@ -1,7 +1,10 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth import get_user_model
 from courses.models import Course
 from datetime import datetime
+from akaraka.versions import VersionRow
+from .templating import CompiledTemplate, TemplateError, TemplateSource
 
 User = get_user_model()
 
@@ -13,14 +16,18 @@ class Certificate(models.Model):
     certificate_number = models.CharField(max_length=255, unique=True)
     issue_date = models.DateTimeField(auto_now_add=True)
     pdf_file = models.FileField(upload_to='certificates/', null=True, blank=True)
+    pdf_key = models.CharField(max_length=64, blank=True, editable=False, help_text="Content hash the PDF was rendered from")
     score = models.PositiveIntegerField(default=100, help_text="Final course score")
     is_verified = models.BooleanField(default=False)
-    verification_code = models.CharField(max_length=50, unique=True, blank=True)
+    verification_code = models.CharField(max_length=300, unique=True, blank=True)
     
     class Meta:
         db_table = 'certificates_certificate'
         unique_together = ('user', 'course')
         ordering = ['-issue_date']
+        indexes = [
+            models.Index(fields=['user', '-issue_date']),
+        ]
     
     def __str__(self):
         return f"Certificate: {self.user.username} - {self.course.title}"
@@ -29,16 +36,53 @@ class Certificate(models.Model):
         return f"https://akaraka.com/verify/{self.verification_code}/"
 
 
+class RevokedCertificate(models.Model):
+    """Certificate numbers that must no longer verify (kept after the certificate is deleted)"""
+    certificate_number = models.CharField(max_length=255, unique=True)
+    reason = models.CharField(max_length=255, blank=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'certificates_revoked_certificate'
+        ordering = ['-revoked_at']
+    
+    def __str__(self):
+        return f"Revoked: {self.certificate_number}"
+
+
 class CertificateTemplate(models.Model):
     """Template for certificate design"""
     name = models.CharField(max_length=255, unique=True)
     course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True, help_text="If null, applies to all courses")
-    template_html = models.TextField(help_text="HTML template with {user_name}, {course_title}, {date}, etc.")
+    template_html = models.TextField(help_text="HTML template with {user_name}, {course_title}, {date}, {certificate_number}, {score}, {verification_code} and {verification_url}")
     custom_css = models.TextField(blank=True)
     is_active = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=1, editable=False)
     
     class Meta:
         db_table = 'certificates_certificatetemplate'
     
     def __str__(self):
         return self.name
+    
+    def source(self):
+        """TemplateSource for rendering; its key changes with every edit"""
+        return TemplateSource(f'{self.id}:{self.version}', self.template_html, self.custom_css)
+    
+    def clean(self):
+        try:
+            CompiledTemplate(TemplateSource('preview', self.template_html, self.custom_css))
+        except TemplateError as e:
+            raise ValidationError({'template_html': str(e)})
+    
+    def save(self, *args, **kwargs):
+        if self.pk:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+
+class CacheVersion(VersionRow):
+    """Versions of certificate data every process caches (template choices, revocations)"""
+    
+    class Meta:
+        db_table = 'certificates_cache_version'
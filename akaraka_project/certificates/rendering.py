@@ -0,0 +1,153 @@
+"""
+Certificate PDFs
+A certificate's PDF is rendered once and persisted to Certificate.pdf_file;
+downloads then only stream the stored file (see akaraka.sendfile).
+
+The layout comes from the course's active CertificateTemplate (or the
+global one), compiled once per process by certificates.templating. The
+choice is cached under a database version (akaraka.versions) bumped when a
+template is saved or deleted, so every process sees an edit within a few
+seconds at the cost of one tiny query per interval.
+
+Each PDF is keyed by a hash of everything it shows plus the template
+version (Certificate.pdf_key). When the inputs change, e.g. the learner
+fixes the spelling of their name or the template is edited, the key no
+longer matches and the next download renders a new file. Files are stored
+under certificates/<aa>/<key>.pdf.
+
+render_certificate_pdf() only takes plain data and a TemplateSource, so it
+can run in worker processes.
+"""
+import hashlib
+import json
+import logging
+from django.core.cache import cache
+from django.db.models import F, Q
+
+from .templating import DEFAULT_TEMPLATE, TemplateError, compile_template
+
+logger = logging.getLogger(__name__)
+
+CERTIFICATE_DIRECTORY = 'certificates'
+# Bump when rendering changes in a way that should re-render existing PDFs
+LAYOUT_VERSION = 2
+TEMPLATE_CACHE_TIMEOUT = 60 * 60
+
+# DBVersion of the template choices, created on first use so worker
+# processes can import this module without the app registry
+_template_version = None
+
+
+def certificate_data(certificate):
+    """Everything the PDF shows, as plain picklable values"""
+    user = certificate.user
+    return {
+        'user_name': user.get_full_name() or user.username,
+        'course_title': certificate.course.title,
+        'date': certificate.issue_date.strftime('%B %d, %Y'),
+        'certificate_number': certificate.certificate_number,
+        'score': certificate.score,
+        'verification_code': certificate.verification_code,
+        'verification_url': certificate.get_verification_url(),
+    }
+
+
+def pdf_key(data, source):
+    """Content hash of a certificate's data and template"""
+    payload = json.dumps(
+        {'layout': LAYOUT_VERSION, 'template': source.key, 'data': data},
+        sort_keys=True, separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def pdf_path(key):
+    return f'{CERTIFICATE_DIRECTORY}/{key[:2]}/{key}.pdf'
+
+
+def template_for_course(course_id):
+    """
+    Source of the active template for a course, else the active global one,
+    else the built-in layout. Cached until a template is saved or deleted.
+
+    Returns:
+        TemplateSource
+    """
+    from .models import CertificateTemplate
+    key = f'certificate_template:{_template_generation()}:{course_id}'
+    source = cache.get(key)
+    if source is None:
+        template = CertificateTemplate.objects.filter(is_active=True).filter(
+            Q(course_id=course_id) | Q(course__isnull=True)
+        ).order_by(F('course_id').asc(nulls_last=True), '-id').first()
+        source = template.source() if template else DEFAULT_TEMPLATE
+        cache.set(key, source, TEMPLATE_CACHE_TIMEOUT)
+    return source
+
+
+def _versions():
+    global _template_version
+    if _template_version is None:
+        from akaraka.versions import DBVersion
+        from .models import CacheVersion
+        _template_version = DBVersion(CacheVersion, 'templates')
+    return _template_version
+
+
+def _template_generation():
+    return _versions().get()
+
+
+def invalidate_templates():
+    """Make every process choose templates afresh once the current transaction commits"""
+    _versions().bump_on_commit()
+
+
+def render_certificate_pdf(data, source=DEFAULT_TEMPLATE):
+    """
+    Render a certificate
+
+    Args:
+        data: dict from certificate_data()
+        source: TemplateSource to render with
+
+    Returns:
+        bytes: The PDF; identical data and template give identical bytes
+    """
+    try:
+        template = compile_template(source)
+    except TemplateError as e:
+        logger.error(f"Certificate template {source.key} is invalid ({e}); using the default layout")
+        template = compile_template(DEFAULT_TEMPLATE)
+    return template.render(data)
+
+
+def store_certificate_pdf(certificate, key, pdf):
+    """Save a rendered PDF under its key and attach it to the certificate"""
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from .models import Certificate
+    name = pdf_path(key)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(pdf))
+    Certificate.objects.filter(id=certificate.id).update(pdf_file=name, pdf_key=key)
+    certificate.pdf_file.name, certificate.pdf_key = name, key
+    return certificate
+
+
+def ensure_certificate_pdf(certificate):
+    """
+    Render and persist the certificate's PDF unless the stored one is current
+
+    The certificate should have user and course loaded.
+
+    Returns:
+        bool: True if a PDF was rendered
+    """
+    data = certificate_data(certificate)
+    source = template_for_course(certificate.course_id)
+    key = pdf_key(data, source)
+    if certificate.pdf_file and certificate.pdf_key == key:
+        return False
+    store_certificate_pdf(certificate, key, render_certificate_pdf(data, source))
+    return True
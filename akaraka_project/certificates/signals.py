@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from courses.models import Course
+from .models import Certificate, CertificateTemplate, RevokedCertificate
+from .rendering import invalidate_templates
+from .verification import invalidate_revocations, revoke
+
+
+@receiver(post_delete, sender=Certificate)
+def revoke_deleted_certificate(sender, instance, **kwargs):
+    """Signed verification codes outlive the row, so a deleted certificate is revoked"""
+    revoke([instance.certificate_number], reason='Certificate deleted')
+
+
+@receiver(post_save, sender=CertificateTemplate)
+@receiver(post_delete, sender=CertificateTemplate)
+@receiver(post_delete, sender=Course)
+def refresh_templates(sender, instance, **kwargs):
+    """Template edits, and courses whose templates become global, change the choice"""
+    invalidate_templates()
+
+
+@receiver(post_save, sender=RevokedCertificate)
+@receiver(post_delete, sender=RevokedCertificate)
+def refresh_revocations(sender, instance, **kwargs):
+    invalidate_revocations()
@@ -0,0 +1,287 @@
+"""
+Compiled certificate templates
+A CertificateTemplate is HTML with {placeholder} fields plus custom CSS.
+compile_template() parses it once into a CompiledTemplate: a page setup and
+a list of blocks (headings, paragraphs, rules) with their reportlab styles
+resolved from the CSS. Blocks without placeholders are built into
+reportlab flowables at compile time; the others keep their markup split
+into literal parts and field names, so rendering a certificate only escapes
+and joins its field values.
+
+Compiled templates are cached per process by TemplateSource.key (template id
+and version), so a batch of certificates parses each template once.
+
+Supported HTML: h1-h4, p and div blocks, hr, and b/strong, i/em, u, br,
+sup, sub and span inline. CSS: tag, .class and tag.class selectors, body
+(defaults for every block), @page (size: A4|letter [landscape]; margin),
+inline style attributes, and font-size, line-height, color, text-align,
+font-weight, font-style, font-family and margin-top/-bottom.
+"""
+import copy
+import re
+import string
+from collections import namedtuple
+from html.parser import HTMLParser
+from io import BytesIO
+from xml.sax.saxutils import escape, quoteattr
+
+FIELDS = ('user_name', 'course_title', 'date', 'certificate_number', 'score', 'verification_code', 'verification_url')
+
+# Source of a template; key changes whenever the template is edited
+TemplateSource = namedtuple('TemplateSource', ['key', 'html', 'css'])
+
+DEFAULT_TEMPLATE = TemplateSource(
+    key='default:1',
+    html=(
+        '<h1>Certificate of Completion</h1>'
+        '<p>This is to certify that<br/><b>{user_name}</b><br/>has successfully completed the<br/>'
+        '<b>{course_title}</b> course<br/>on {date}<br/><br/>Certificate Number: {certificate_number}</p>'
+    ),
+    css=(
+        'h1 { font-size: 36pt; line-height: 44pt; color: #1e40af; text-align: center; margin-bottom: 30pt; }'
+        'p { font-size: 14pt; line-height: 22pt; text-align: center; margin-top: 14pt; margin-bottom: 36pt; }'
+    ),
+)
+
+BLOCK_TAGS = {'h1': 24, 'h2': 18, 'h3': 14, 'h4': 12, 'p': 12, 'div': 12}
+INLINE_TAGS = {'b': 'b', 'strong': 'b', 'i': 'i', 'em': 'i', 'u': 'u', 'sup': 'super', 'sub': 'sub'}
+ALIGNMENTS = {'left': 0, 'center': 1, 'right': 2, 'justify': 4}
+FONT_FAMILIES = {
+    'serif': ('Times-Roman', 'Times-Bold', 'Times-Italic', 'Times-BoldItalic'),
+    'sans-serif': ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique', 'Helvetica-BoldOblique'),
+    'monospace': ('Courier', 'Courier-Bold', 'Courier-Oblique', 'Courier-BoldOblique'),
+}
+FONT_ALIASES = {'times': 'serif', 'georgia': 'serif', 'helvetica': 'sans-serif', 'arial': 'sans-serif',
+                'courier': 'monospace'}
+_UNITS = {'pt': 1, 'px': 0.75, 'in': 72, 'cm': 72 / 2.54, 'mm': 72 / 25.4}
+_LENGTH = re.compile(r'^(-?[\d.]+)\s*(pt|px|in|cm|mm|em)?$')
+_CSS_RULE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+
+MAX_COMPILED = 64
+_compiled = {}
+
+
+class TemplateError(ValueError):
+    """The template cannot be compiled"""
+
+
+def _length(value, font_size=12):
+    match = _LENGTH.match(value.strip().lower())
+    if not match:
+        raise TemplateError(f'Invalid length: {value}')
+    number, unit = float(match.group(1)), match.group(2) or 'px'
+    return number * font_size if unit == 'em' else number * _UNITS[unit]
+
+
+def _line_height(value, font_size):
+    if not value or value == 'normal':
+        return font_size * 1.2
+    try:
+        return float(value) * font_size  # unitless: a multiple of the font size
+    except ValueError:
+        return _length(value, font_size)
+
+
+def _declarations(text):
+    """CSS declarations as a dict"""
+    declarations = {}
+    for item in text.split(';'):
+        if ':' in item:
+            name, value = item.split(':', 1)
+            declarations[name.strip().lower()] = value.strip()
+    return declarations
+
+
+def parse_css(css):
+    """
+    Rules of a stylesheet
+
+    Returns:
+        dict: selector ('body', 'h1', '.title', 'p.note', '@page') -> declarations
+    """
+    css = re.sub(r'/\*.*?\*/', '', css or '', flags=re.S)
+    rules = {}
+    for selectors, body in _CSS_RULE.findall(css):
+        for selector in selectors.split(','):
+            rules.setdefault(selector.strip().lower(), {}).update(_declarations(body))
+    return rules
+
+
+class _Block:
+    """One paragraph or rule of a compiled template"""
+
+    def __init__(self, style, markup=None, flowable=None):
+        self.style = style
+        self.flowable = flowable
+        self.parts = None
+        if markup is not None:
+            self.parts = _split_fields(markup)
+            if all(field is None for _, field in self.parts):
+                from reportlab.platypus import Paragraph
+                self.flowable = Paragraph(markup.replace('{{', '{').replace('}}', '}'), style)
+                self.parts = None
+
+    def build(self, values):
+        if self.flowable is not None:
+            # Pre-parsed static block; the copy keeps per-document layout state apart
+            return copy.copy(self.flowable)
+        from reportlab.platypus import Paragraph
+        return Paragraph(''.join(literal + (values[field] if field else '') for literal, field in self.parts), self.style)
+
+
+def _split_fields(markup):
+    """Markup as (literal, field or None) parts"""
+    parts = []
+    try:
+        for literal, field, spec, conversion in string.Formatter().parse(markup):
+            if field is not None and field not in FIELDS:
+                raise TemplateError(f'Unknown placeholder {{{field}}}; available: {", ".join(FIELDS)}')
+            parts.append((literal, field))
+    except ValueError as e:
+        if isinstance(e, TemplateError):
+            raise
+        raise TemplateError(f'Unbalanced braces in template: {e}')
+    return parts
+
+
+class _Compiler(HTMLParser):
+    def __init__(self, rules):
+        super().__init__(convert_charrefs=True)
+        self.rules = rules
+        self.blocks = []
+        self.styles = [self._style('body', [], '')]
+        self.markup = []
+        self.inline = []
+
+    def _style(self, tag, classes, inline_style):
+        from reportlab.lib import colors
+        from reportlab.lib.styles import ParagraphStyle
+        declarations = dict(self.rules.get('body', {})) if tag != 'body' else {}
+        for selector in [tag] + [f'.{name}' for name in classes] + [f'{tag}.{name}' for name in classes]:
+            declarations.update(self.rules.get(selector, {}))
+        declarations.update(_declarations(inline_style))
+
+        font_size = _length(declarations['font-size']) if 'font-size' in declarations else BLOCK_TAGS.get(tag, 12)
+        family = declarations.get('font-family', 'sans-serif').split(',')[0].strip(' "\'').lower()
+        fonts = FONT_FAMILIES.get(FONT_ALIASES.get(family, family), FONT_FAMILIES['sans-serif'])
+        bold = declarations.get('font-weight', 'bold' if tag.startswith('h') else 'normal') in ('bold', '600', '700', '800', '900')
+        italic = declarations.get('font-style') == 'italic'
+        try:
+            color = colors.toColor(declarations.get('color', 'black'))
+        except ValueError:
+            raise TemplateError(f"Invalid color: {declarations['color']}")
+        return ParagraphStyle(
+            f'{tag}.{".".join(classes)}',
+            fontName=fonts[bold + 2 * italic],
+            fontSize=font_size,
+            leading=_line_height(declarations.get('line-height'), font_size),
+            textColor=color,
+            alignment=ALIGNMENTS.get(declarations.get('text-align', 'left'), 0),
+            spaceBefore=_length(declarations.get('margin-top', '0'), font_size),
+            spaceAfter=_length(declarations.get('margin-bottom', '0'), font_size),
+        )
+
+    def _flush(self):
+        markup = ''.join(self.markup).strip()
+        if markup:
+            self.blocks.append(_Block(self.styles[-1], markup=markup))
+        self.markup = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in BLOCK_TAGS:
+            self._flush()
+            self.styles.append(self._style(tag, (attrs.get('class') or '').lower().split(), attrs.get('style') or ''))
+        elif tag == 'hr':
+            from reportlab.platypus import HRFlowable
+            self._flush()
+            self.blocks.append(_Block(None, flowable=HRFlowable(width='100%', spaceBefore=6, spaceAfter=6)))
+        elif tag == 'br':
+            self.markup.append('<br/>')
+        elif tag in INLINE_TAGS:
+            self.markup.append(f'<{INLINE_TAGS[tag]}>')
+            self.inline.append(INLINE_TAGS[tag])
+        elif tag == 'span':
+            color = _declarations(attrs.get('style') or '').get('color')
+            if color:
+                self.markup.append(f'<font color={quoteattr(color)}>')
+                self.inline.append('font')
+            else:
+                self.inline.append(None)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in ('br', 'hr'):
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS and len(self.styles) > 1:
+            self._flush()
+            self.styles.pop()
+        elif (tag in INLINE_TAGS or tag == 'span') and self.inline:
+            closing = self.inline.pop()
+            if closing:
+                self.markup.append(f'</{closing}>')
+
+    def handle_data(self, data):
+        self.markup.append(escape(data))
+
+    def close(self):
+        super().close()
+        while self.inline:
+            closing = self.inline.pop()
+            if closing:
+                self.markup.append(f'</{closing}>')
+        self._flush()
+
+
+class CompiledTemplate:
+    """A parsed certificate template, ready to render many certificates"""
+
+    def __init__(self, source):
+        from reportlab.lib.pagesizes import A4, letter, landscape
+        rules = parse_css(source.css)
+        page = rules.get('@page', {})
+        size = page.get('size', 'A4').lower().split()
+        self.pagesize = letter if 'letter' in size else A4
+        if 'landscape' in size:
+            self.pagesize = landscape(self.pagesize)
+        self.margin = _length(page['margin']) if 'margin' in page else 72
+
+        compiler = _Compiler(rules)
+        compiler.feed(source.html or '')
+        compiler.close()
+        if not compiler.blocks:
+            raise TemplateError('The template has no content')
+        self.blocks = compiler.blocks
+        self.key = source.key
+
+    def render(self, data):
+        """
+        Render one certificate
+
+        Args:
+            data: dict of FIELDS values
+
+        Returns:
+            bytes: The PDF
+        """
+        from reportlab.platypus import SimpleDocTemplate
+        values = {field: escape(str(data.get(field, ''))) for field in FIELDS}
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            buffer, pagesize=self.pagesize,
+            topMargin=self.margin, bottomMargin=self.margin, leftMargin=self.margin, rightMargin=self.margin,
+            title=f"Certificate {data.get('certificate_number', '')}", invariant=1,
+        )
+        doc.build([block.build(values) for block in self.blocks])
+        return buffer.getvalue()
+
+
+def compile_template(source):
+    """CompiledTemplate for a TemplateSource, cached per process by its key"""
+    compiled = _compiled.get(source.key)
+    if compiled is None:
+        if len(_compiled) >= MAX_COMPILED:
+            _compiled.clear()
+        compiled = _compiled[source.key] = CompiledTemplate(source)
+    return compiled
@@ -0,0 +1,85 @@
+from datetime import date
+
+from django.core import signing
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .verification import CODE_LENGTH, NAME_LENGTH, SALT, make_verification_code, read_verification_code, revoke
+
+
+class VerificationCodeTests(SimpleTestCase):
+    issued = date(2026, 3, 1)
+
+    def test_round_trip(self):
+        code = make_verification_code('CERT-0123456789ABCDEF', 'Zahra Ahmadi', 'Dari for Beginners', self.issued)
+        self.assertEqual(read_verification_code(code), {
+            'certificate_number': 'CERT-0123456789ABCDEF',
+            'user_name': 'Zahra Ahmadi',
+            'course_title': 'Dari for Beginners',
+            'issue_date': self.issued,
+        })
+
+    def test_non_ascii_names_fit_the_column(self):
+        for name, course in [
+            ('山田太郎' * 20, '日本語の基礎コース' * 10),
+            ('زهرا احمدی' * 10, 'آموزش زبان دری برای مبتدیان' * 5),
+        ]:
+            code = make_verification_code('CERT-0123456789ABCDEF', name, course, self.issued)
+            self.assertLessEqual(len(code), CODE_LENGTH)
+            details = read_verification_code(code)
+            self.assertEqual(details['certificate_number'], 'CERT-0123456789ABCDEF')
+            self.assertTrue(name.startswith(details['user_name']))
+            self.assertTrue(course.startswith(details['course_title']))
+
+    def test_short_non_ascii_names_are_kept_whole(self):
+        code = make_verification_code('CERT-0123456789ABCDEF', '山田太郎', '日本語の基礎', self.issued)
+        details = read_verification_code(code)
+        self.assertEqual((details['user_name'], details['course_title']), ('山田太郎', '日本語の基礎'))
+
+    def test_long_latin_names_are_capped(self):
+        code = make_verification_code('CERT-0123456789ABCDEF', 'x' * 500, 'y' * 500, self.issued)
+        self.assertLessEqual(len(code), CODE_LENGTH)
+        self.assertLessEqual(len(read_verification_code(code)['user_name']), NAME_LENGTH)
+
+    def test_codes_signed_with_ascii_json_still_verify(self):
+        code = signing.dumps(
+            {'n': 'CERT-EF1775AC', 'u': 'Ōsaka', 'c': 'Dari', 'd': self.issued.isoformat()},
+            salt=SALT, compress=True,
+        )
+        self.assertEqual(read_verification_code(code)['user_name'], 'Ōsaka')
+
+    def test_tampered_code_is_rejected(self):
+        code = make_verification_code('CERT-0123456789ABCDEF', 'Zahra', 'Dari', self.issued)
+        self.assertIsNone(read_verification_code(code[:-1] + ('A' if code[-1] != 'A' else 'B')))
+
+
+class VerifyCertificateViewTests(TestCase):
+    # Each test uses its own number: the revocation list is kept per process
+
+    def verify_url(self, number):
+        code = make_verification_code(number, 'Zahra Ahmadi', 'Dari', date(2026, 3, 1))
+        return reverse('certificates:verify', args=[code])
+
+    def test_valid_code_is_checked_without_a_query(self):
+        url = self.verify_url('CERT-00000000000000A1')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertTrue(response.context['is_valid'])
+        self.assertIn('max-age=21600', response['Cache-Control'])
+
+    def test_revocation_is_seen_on_the_next_request(self):
+        url = self.verify_url('CERT-00000000000000A2')
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            revoke(['CERT-00000000000000A2'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['is_valid'])
+        self.assertIn('max-age=300', response['Cache-Control'])
+
+    def test_unchanged_page_revalidates(self):
+        url = self.verify_url('CERT-00000000000000A3')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
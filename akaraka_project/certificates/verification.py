@@ -0,0 +1,116 @@
+"""
+Stateless certificate verification
+A verification code is the certificate's public details (number, holder's
+name, course, issue date) signed with django.core.signing (HMAC-SHA256 of
+SECRET_KEY). The verification page checks the signature and reads the
+details from the code itself, so a valid code never needs a Certificate
+query. The only state consulted is the revocation list, a small set of
+certificate numbers each process keeps in memory. It is reloaded when the
+'revocations' CacheVersion row moves (akaraka.versions): revoking bumps the
+row once it commits, so every process sees a revocation within seconds and
+a verification costs no query in between.
+
+Revoking (or deleting) a certificate adds its number to RevokedCertificate.
+Codes issued before signing was introduced are plain tokens and are still
+looked up in the database.
+
+The payload is serialized as UTF-8 rather than escaped ASCII, and the
+name and course are shortened until the code fits CODE_LENGTH, so long or
+non-Latin names never overflow the column.
+"""
+import json
+from datetime import date
+from django.core import signing
+
+SALT = 'certificates.verification'
+CODE_LENGTH = 300  # Certificate.verification_code's max_length
+NAME_LENGTH = 60  # longest name or course title a code carries
+NAME_STEP = 4  # characters dropped per try when a code is too long
+
+
+class PayloadSerializer:
+    """Compact JSON as UTF-8 (escaped non-ASCII text would be up to 6 bytes a character)"""
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data.decode('utf-8'))
+
+
+def make_verification_code(certificate_number, user_name, course_title, issued):
+    """Signed code carrying a certificate's public details, at most CODE_LENGTH long"""
+    for length in range(NAME_LENGTH, -1, -NAME_STEP):
+        payload = {
+            'n': certificate_number,
+            'u': user_name[:length],
+            'c': course_title[:length],
+            'd': issued.isoformat(),
+        }
+        code = signing.dumps(payload, salt=SALT, serializer=PayloadSerializer, compress=True)
+        if len(code) <= CODE_LENGTH:
+            return code
+    raise ValueError(f'Certificate number {certificate_number!r} is too long for a verification code')
+
+
+def read_verification_code(code):
+    """
+    Details from a signed code
+
+    Returns:
+        dict: certificate_number, user_name, course_title, issue_date; None if
+        the code is not a genuine signed code
+    """
+    try:
+        payload = signing.loads(code, salt=SALT, serializer=PayloadSerializer)
+        return {
+            'certificate_number': payload['n'],
+            'user_name': payload['u'],
+            'course_title': payload['c'],
+            'issue_date': date.fromisoformat(payload['d']),
+        }
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+# (version, frozenset of revoked numbers) of this process
+_revoked = (None, frozenset())
+_revocations_version = None
+
+
+def _versions():
+    global _revocations_version
+    if _revocations_version is None:
+        from akaraka.versions import DBVersion
+        from .models import CacheVersion
+        _revocations_version = DBVersion(CacheVersion, 'revocations')
+    return _revocations_version
+
+
+def revoked_numbers():
+    """Numbers of all revoked certificates, reloaded when the revocations version moves"""
+    global _revoked
+    from .models import RevokedCertificate
+    version = _versions().get()
+    if _revoked[0] != version:
+        _revoked = (version, frozenset(RevokedCertificate.objects.order_by().values_list('certificate_number', flat=True)))
+    return _revoked[1]
+
+
+def is_revoked(certificate_number):
+    return certificate_number in revoked_numbers()
+
+
+def invalidate_revocations():
+    """Make every process reload the revocation list once the current transaction commits"""
+    _versions().bump_on_commit()
+
+
+def revoke(certificate_numbers, reason=''):
+    """Revoke certificates by number (already revoked ones are left as they are)"""
+    from .models import RevokedCertificate
+    RevokedCertificate.objects.bulk_create(
+        [RevokedCertificate(certificate_number=number, reason=reason) for number in certificate_numbers],
+        ignore_conflicts=True,
+    )
+    invalidate_revocations()
@@ -1,21 +1,33 @@
-from django.shortcuts import render, get_object_or_404
+import hashlib
+from django.shortcuts import render, redirect, get_object_or_404
+from django.db.models import Count, Exists, OuterRef, Q
 from django.views.generic import View, ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import FileResponse, HttpResponse
+from django.http import HttpResponse, Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django.template.loader import render_to_string
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-import uuid
 from .models import Certificate, CertificateTemplate
-from courses.models import Course
+from .issuance import issue_certificate
+from .rendering import ensure_certificate_pdf
+from .verification import is_revoked, read_verification_code
+from courses.models import Course, LessonProgress
+from akaraka.pagination import CursorPaginationMixin
+from akaraka.sendfile import sendfile_response
 
+# Revocations reach clients holding a cached valid page within VERIFY_MAX_AGE;
+# after that they revalidate with the ETag and mostly get a 304
+VERIFY_MAX_AGE = 60 * 60 * 6
+REVOKED_MAX_AGE = 60 * 5
 
-class MyCertificatesView(LoginRequiredMixin, ListView):
+
+class MyCertificatesView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """User's earned certificates"""
     model = Certificate
     template_name = 'certificates/my_certificates.html'
     context_object_name = 'certificates'
     paginate_by = 10
+    cursor_ordering = ('-issue_date', '-id')
     
     def get_queryset(self):
         return Certificate.objects.filter(user=self.request.user).select_related('course')
@@ -35,74 +47,56 @@ class CertificateDetailView(LoginRequiredMixin, View):
 class DownloadCertificateView(LoginRequiredMixin, View):
     """Download certificate as PDF"""
     def get(self, request, certificate_id):
-        certificate = get_object_or_404(Certificate, id=certificate_id, user=request.user)
-        
-        if certificate.pdf_file:
-            return FileResponse(certificate.pdf_file.open('rb'), as_attachment=True, filename=f'{certificate.certificate_number}.pdf')
-        
-        # Generate PDF if not exists
-        return self.generate_pdf(certificate)
-    
-    def generate_pdf(self, certificate):
-        """Generate PDF certificate"""
-        from io import BytesIO
-        from reportlab.lib.units import inch
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib import colors
-        from datetime import datetime
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=1*inch, bottomMargin=1*inch)
-        elements = []
-        
-        # Title
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=36,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=30,
-            alignment=1,
+        certificate = get_object_or_404(
+            Certificate.objects.select_related('user', 'course'),
+            id=certificate_id,
+            user=request.user
         )
         
-        elements.append(Paragraph("Certificate of Completion", title_style))
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Body
-        body_text = f"""
-        This is to certify that<br/>
-        <b>{certificate.user.get_full_name()}</b><br/>
-        has successfully completed the<br/>
-        <b>{certificate.course.title}</b> course<br/>
-        on {certificate.issue_date.strftime('%B %d, %Y')}<br/>
-        <br/>
-        Certificate Number: {certificate.certificate_number}
-        """
-        
-        elements.append(Paragraph(body_text, styles['Normal']))
-        elements.append(Spacer(1, 0.5*inch))
-        
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
-        
-        response = HttpResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{certificate.certificate_number}.pdf"'
-        return response
+        # Renders only the first time, or after the certificate's details changed
+        ensure_certificate_pdf(certificate)
+        return sendfile_response(
+            request,
+            certificate.pdf_file,
+            filename=f'{certificate.certificate_number}.pdf',
+            etag=certificate.pdf_key,
+        )
 
 
 class VerifyCertificateView(View):
-    """Verify certificate authenticity"""
+    """
+    Verify certificate authenticity
+    
+    Public and hit by employers and scrapers: signed codes are checked
+    without a database query, and the page is the same for every visitor
+    (no session or user), so browsers and shared caches may keep it and
+    then revalidate with the ETag.
+    """
     def get(self, request, verification_code):
-        certificate = get_object_or_404(Certificate, verification_code=verification_code)
-        context = {
-            'certificate': certificate,
-            'user': certificate.user,
-            'is_valid': True,
-        }
-        return render(request, 'certificates/verify_certificate.html', context)
+        details = read_verification_code(verification_code)
+        if details is None:
+            # Codes issued before signing was introduced
+            certificate = Certificate.objects.filter(
+                verification_code=verification_code
+            ).select_related('user', 'course').first()
+            if certificate is None:
+                raise Http404('Unknown certificate')
+            details = {
+                'certificate_number': certificate.certificate_number,
+                'user_name': certificate.user.get_full_name() or certificate.user.username,
+                'course_title': certificate.course.title,
+                'issue_date': certificate.issue_date.date(),
+            }
+        
+        is_valid = not is_revoked(details['certificate_number'])
+        etag = quote_etag(hashlib.sha256(f'{verification_code}:{is_valid}'.encode()).hexdigest()[:32])
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            context = {'certificate': details, 'is_valid': is_valid}
+            response = HttpResponse(render_to_string('certificates/verify_certificate.html', context))
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=VERIFY_MAX_AGE if is_valid else REVOKED_MAX_AGE)
+        return response
 
 
 class GenerateCertificateView(LoginRequiredMixin, View):
@@ -111,22 +105,15 @@ class GenerateCertificateView(LoginRequiredMixin, View):
         course = get_object_or_404(Course, id=course_id)
         user = request.user
         
-        # Check if user completed the course
-        lesson_progress = user.lesson_progress.filter(lesson__course=course, is_completed=True)
-        total_lessons = course.lessons.count()
-        
-        if lesson_progress.count() < total_lessons:
+        # Check if user completed the course (one query for both counts)
+        completed = LessonProgress.objects.filter(lesson_id=OuterRef('id'), user=user, is_completed=True)
+        lessons = course.lessons.annotate(done=Exists(completed)).aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(done=True)),
+        )
+        if lessons['completed'] < lessons['total']:
             return HttpResponse('Course not completed yet', status=400)
         
-        # Generate certificate
-        certificate, created = Certificate.objects.get_or_create(
-            user=user,
-            course=course,
-            defaults={
-                'certificate_number': f'CERT-{uuid.uuid4().hex[:8].upper()}',
-                'verification_code': uuid.uuid4().hex,
-                'score': 100,
-            }
-        )
+        certificate, created = issue_certificate(user, course)
         
         return redirect('certificates:download', certificate_id=certificate.id)
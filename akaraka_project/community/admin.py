@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post, Comment, Testimony, Report, CommunityModerator
+from .models import Post, Tag, Comment, Testimony, Report, CommunityModerator
 
 
 @admin.register(Post)
@@ -17,6 +17,13 @@ class PostAdmin(admin.ModelAdmin):
         queryset.update(is_pinned=True)
 
 
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'post_count')
+    search_fields = ('name', 'slug')
+    readonly_fields = ('post_count',)
+
+
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('author', 'post', 'is_approved', 'created_at')
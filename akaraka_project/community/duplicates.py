@@ -0,0 +1,257 @@
+"""
+Near-duplicate pre-filter for forum posts and comments
+Spam waves arrive as many near-identical messages. Each new post or comment
+gets a MinHash signature of its word shingles, and the signature is split
+into LSH bands stored as SignatureBucket keys. Only earlier content sharing
+a bucket is compared, so checking a new message is one indexed lookup plus
+a handful of signature comparisons instead of a scan of the whole forum.
+
+Near-duplicates are reported as spam for moderators. When a wave is in
+progress (several near-duplicates seen recently) the new message is also
+held back: posts are unpublished and comments unapproved until reviewed.
+"""
+import hashlib
+import logging
+import random
+import struct
+import zlib
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+
+from .search import normalize_search_text
+
+logger = logging.getLogger(__name__)
+
+# NumPy makes signatures and the bulk indexing much faster but is optional
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+SHINGLE_SIZE = 3  # words per shingle
+MIN_SHINGLES = 5  # shorter texts ("thanks!") are too generic to compare
+NUM_PERM = 64
+BANDS = 16  # 16 bands of 4 rows: pairs above ~0.6 similarity nearly always share a bucket
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.8  # estimated Jaccard similarity
+MAX_CANDIDATES = 50
+WAVE_WINDOW = timedelta(hours=24)
+HOLD_AFTER = 3  # recent near-duplicates before new copies are held back
+
+_MASK32 = (1 << 32) - 1
+_MERSENNE_PRIME = (1 << 61) - 1
+_SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+
+# Fixed seed: signatures must stay comparable across processes and deploys
+_random = random.Random(5381)
+_PERM_A = [_random.randrange(1, _MERSENNE_PRIME) for _ in range(NUM_PERM)]
+_PERM_B = [_random.randrange(0, _MERSENNE_PRIME) for _ in range(NUM_PERM)]
+if NUMPY_AVAILABLE:
+    _NP_A = np.array(_PERM_A, dtype=np.uint64)
+    _NP_B = np.array(_PERM_B, dtype=np.uint64)
+
+
+def shingle_hashes(text):
+    """32-bit hashes of the text's overlapping word shingles"""
+    words = normalize_search_text(text).split()
+    return {
+        zlib.crc32(' '.join(words[i:i + SHINGLE_SIZE]).encode())
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(hashes):
+    """
+    MinHash signature of a set of shingle hashes
+
+    Permutations are (a * h + b) mod 2**64 mod p, truncated to 32 bits; the
+    pure Python path emulates the uint64 wrap-around so both paths agree.
+
+    Returns:
+        tuple: NUM_PERM unsigned 32-bit ints
+    """
+    if NUMPY_AVAILABLE:
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(values, _NP_A) + _NP_B) % np.uint64(_MERSENNE_PRIME)
+        return tuple(int(value) for value in (permuted & np.uint64(_MASK32)).min(axis=0))
+    mask64 = (1 << 64) - 1
+    return tuple(
+        min((((a * h + b) & mask64) % _MERSENNE_PRIME) & _MASK32 for h in hashes)
+        for a, b in zip(_PERM_A, _PERM_B)
+    )
+
+
+def pack_signature(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data):
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(data))
+
+
+def band_keys(signature):
+    """One signed 64-bit bucket key per LSH band"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<B{ROWS}I', band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
+
+
+def content_text(instance):
+    from .models import Post
+    if isinstance(instance, Post):
+        return f"{instance.title}\n{instance.content}"
+    return instance.content
+
+
+def find_near_duplicates(signature, keys, exclude_id=None):
+    """
+    Earlier content whose signature is estimated to be a near-duplicate
+
+    Returns:
+        list: (ContentSignature, similarity) pairs, most similar first
+    """
+    from .models import ContentSignature, SignatureBucket
+    candidate_ids = SignatureBucket.objects.filter(key__in=keys)
+    if exclude_id:
+        candidate_ids = candidate_ids.exclude(signature_id=exclude_id)
+    candidate_ids = candidate_ids.values_list('signature_id', flat=True).distinct().order_by('-signature_id')
+    candidates = ContentSignature.objects.filter(id__in=list(candidate_ids[:MAX_CANDIDATES]))
+
+    matches = []
+    for candidate in candidates:
+        score = similarity(signature, unpack_signature(candidate.minhash))
+        if score >= DUPLICATE_THRESHOLD:
+            matches.append((candidate, score))
+    matches.sort(key=lambda match: -match[1])
+    return matches
+
+
+def index_content(instance, content_type):
+    """
+    Store the signature and LSH buckets of a post or comment
+
+    Returns:
+        tuple: (ContentSignature or None if the text is too short, band keys)
+    """
+    from .models import ContentSignature, SignatureBucket
+    hashes = shingle_hashes(content_text(instance))
+    if len(hashes) < MIN_SHINGLES:
+        return None, []
+    signature = minhash(hashes)
+    keys = band_keys(signature)
+    with transaction.atomic():
+        record, created = ContentSignature.objects.get_or_create(
+            content_type=content_type,
+            object_id=instance.id,
+            defaults={
+                'author_id': instance.author_id,
+                'minhash': pack_signature(signature),
+                'created_at': instance.created_at or timezone.now(),
+            },
+        )
+        if created:
+            SignatureBucket.objects.bulk_create([SignatureBucket(signature=record, key=key) for key in keys])
+    return record, keys
+
+
+def screen_content(instance, content_type):
+    """
+    Index a new post or comment and flag it if it repeats recent content
+
+    Staff content is indexed but never flagged.
+
+    Returns:
+        str: 'ok', 'flagged' or 'held'
+    """
+    from .models import Post, Comment, Report
+    record, keys = index_content(instance, content_type)
+    if record is None or instance.author.is_staff:
+        return 'ok'
+    matches = find_near_duplicates(unpack_signature(record.minhash), keys, exclude_id=record.id)
+    if not matches:
+        return 'ok'
+
+    recent = [match for match, _ in matches if match.created_at >= timezone.now() - WAVE_WINDOW]
+    held = len(recent) >= HOLD_AFTER
+    original, score = matches[0]
+    description = (
+        f"Automatic: {score:.0%} similar to {original.content_type} #{original.object_id}"
+        f" ({len(matches)} near-duplicates, {len(recent)} in the last day)."
+    )
+    with transaction.atomic():
+        if content_type == 'post':
+            if held:
+                Post.objects.filter(id=instance.id).update(is_published=False)
+                instance.is_published = False
+            Report.objects.create(reported_post=instance, report_type='spam', description=description)
+        else:
+            if held:
+                Comment.objects.filter(id=instance.id).update(is_approved=False)
+                instance.is_approved = False
+            Report.objects.create(
+                reported_post_id=instance.post_id, reported_comment=instance,
+                report_type='spam', description=description,
+            )
+    logger.info(f"{'Held' if held else 'Flagged'} {content_type} #{instance.id}: {description}")
+    return 'held' if held else 'flagged'
+
+
+def index_existing(batch_size=500):
+    """
+    Index all posts and comments that have no signature yet (no flagging)
+
+    Returns:
+        int: Number of signatures created
+    """
+    from .models import Post, Comment, ContentSignature
+    created = 0
+    sources = (
+        ('post', Post.objects.only('id', 'author_id', 'title', 'content', 'created_at')),
+        ('comment', Comment.objects.only('id', 'author_id', 'content', 'created_at')),
+    )
+    for content_type, queryset in sources:
+        indexed = ContentSignature.objects.filter(content_type=content_type).values('object_id')
+        items = queryset.exclude(id__in=indexed).order_by('id')
+        batch = []
+        for item in items.iterator(chunk_size=batch_size):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                created += _index_batch(content_type, batch)
+                batch = []
+        if batch:
+            created += _index_batch(content_type, batch)
+    return created
+
+
+def _index_batch(content_type, items):
+    from .models import ContentSignature, SignatureBucket
+    records, keys = [], []
+    for item in items:
+        hashes = shingle_hashes(content_text(item))
+        if len(hashes) < MIN_SHINGLES:
+            continue
+        signature = minhash(hashes)
+        records.append(ContentSignature(
+            content_type=content_type, object_id=item.id, author_id=item.author_id,
+            minhash=pack_signature(signature), created_at=item.created_at,
+        ))
+        keys.append(band_keys(signature))
+    with transaction.atomic():
+        records = ContentSignature.objects.bulk_create(records)
+        SignatureBucket.objects.bulk_create([
+            SignatureBucket(signature_id=record.id, key=key)
+            for record, record_keys in zip(records, keys)
+            for key in record_keys
+        ], batch_size=1000)
+    return len(records)
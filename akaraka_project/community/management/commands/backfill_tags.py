@@ -0,0 +1,24 @@
+"""
+Django management command to build the tag index from Post.tags strings
+Usage: python manage.py backfill_tags [--batch-size=1000]
+
+Safe to re-run: existing links are kept and tag counts are recomputed.
+"""
+from django.core.management.base import BaseCommand
+from community.tags import backfill_tags
+
+
+class Command(BaseCommand):
+    help = 'Create Tag rows and post-tag links from the comma-separated Post.tags field'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of posts processed per batch'
+        )
+
+    def handle(self, *args, **options):
+        processed, linked = backfill_tags(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed tags of {processed} posts ({linked} links)'))
@@ -0,0 +1,31 @@
+"""
+Django management command to index existing forum content for duplicate detection
+Usage: python manage.py index_duplicates [--batch-size=500]
+
+New posts and comments are indexed as they are created; run this once to
+add the signatures of older content so new copies of it are caught too.
+Existing content is only indexed, never flagged.
+"""
+import time
+from django.core.management.base import BaseCommand
+from community.duplicates import index_existing, NUMPY_AVAILABLE
+
+
+class Command(BaseCommand):
+    help = 'Compute MinHash signatures and LSH buckets for posts and comments not indexed yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of posts or comments indexed per batch'
+        )
+
+    def handle(self, *args, **options):
+        if not NUMPY_AVAILABLE:
+            self.stdout.write(self.style.WARNING('NumPy is not installed; using the slower pure Python signatures'))
+        started = time.monotonic()
+        created = index_existing(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed {created} posts and comments in {elapsed:.1f}s'))
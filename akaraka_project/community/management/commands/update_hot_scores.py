@@ -0,0 +1,25 @@
+"""
+Django management command to re-decay forum hot scores
+Usage: python manage.py update_hot_scores [--batch-size=1000]
+
+Run it periodically (e.g. every 15 minutes from cron) so trending order
+reflects post age between likes and comments.
+"""
+from django.core.management.base import BaseCommand
+from community.ranking import refresh_hot_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute the time-decayed hot score of recent forum posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of posts updated per statement'
+        )
+
+    def handle(self, *args, **options):
+        updated = refresh_hot_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Refreshed hot scores of {updated} posts'))
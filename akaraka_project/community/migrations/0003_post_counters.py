@@ -0,0 +1,55 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:41
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_likes_and_comments(apps, schema_editor):
+    from community.ranking import hot_score
+
+    Post = apps.get_model('community', 'Post')
+    posts = list(Post.objects.only('id', 'created_at').annotate(
+        likes_total=Count('likes', distinct=True),
+        comments_total=Count('comments', distinct=True),
+    ))
+    for post in posts:
+        post.like_count = post.likes_total
+        post.comment_count = post.comments_total
+        post.hot_score = hot_score(post.like_count, post.comment_count, post.created_at)
+    Post.objects.bulk_update(posts, ['like_count', 'comment_count', 'hot_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False, help_text='Likes and comments decayed by age'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_published', '-hot_score'], name='community_p_is_publ_e8828a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_published', '-created_at'], name='community_p_is_publ_dbdb1b_idx'),
+        ),
+        migrations.RunPython(count_likes_and_comments, migrations.RunPython.noop),
+    ]
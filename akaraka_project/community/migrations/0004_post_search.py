@@ -0,0 +1,99 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:44
+
+from django.db import migrations, models
+
+
+def build_search_documents(apps, schema_editor):
+    from community.search import build_search_document
+
+    Post = apps.get_model('community', 'Post')
+    posts = list(Post.objects.only('id', 'title', 'content'))
+    for post in posts:
+        post.search_document = build_search_document(post.title, post.content)
+    Post.objects.bulk_update(posts, ['search_document'], batch_size=500)
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE community_post ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', split_part(search_document, E'\\n', 1)), 'A') ||
+        setweight(to_tsvector('simple', search_document), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX community_post_search_vector_idx ON community_post USING gin (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS community_post_search_vector_idx",
+    "ALTER TABLE community_post DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE community_post_fts USING fts5(
+        search_document, content='community_post', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER community_post_fts_insert AFTER INSERT ON community_post BEGIN
+        INSERT INTO community_post_fts(rowid, search_document) VALUES (new.id, new.search_document);
+    END
+    """,
+    """
+    CREATE TRIGGER community_post_fts_delete AFTER DELETE ON community_post BEGIN
+        INSERT INTO community_post_fts(community_post_fts, rowid, search_document)
+        VALUES ('delete', old.id, old.search_document);
+    END
+    """,
+    """
+    CREATE TRIGGER community_post_fts_update AFTER UPDATE OF search_document ON community_post BEGIN
+        INSERT INTO community_post_fts(community_post_fts, rowid, search_document)
+        VALUES ('delete', old.id, old.search_document);
+        INSERT INTO community_post_fts(rowid, search_document) VALUES (new.id, new.search_document);
+    END
+    """,
+    "INSERT INTO community_post_fts(community_post_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS community_post_fts_insert",
+    "DROP TRIGGER IF EXISTS community_post_fts_delete",
+    "DROP TRIGGER IF EXISTS community_post_fts_update",
+    "DROP TABLE IF EXISTS community_post_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0003_post_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False, help_text='Normalized title and content for search'),
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:45
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_paths(apps, schema_editor):
+    from community.threads import encode_segment
+
+    Comment = apps.get_model('community', 'Comment')
+    # A parent is always older than its replies, so id order visits it first
+    comments = list(Comment.objects.only('id', 'parent_comment_id').annotate(
+        likes_total=Count('likes')
+    ).order_by('id'))
+    by_id = {}
+    for comment in comments:
+        parent = by_id.get(comment.parent_comment_id)
+        comment.path = (parent.path if parent else '') + encode_segment(comment.id)
+        comment.depth = parent.depth + 1 if parent else 0
+        comment.like_count = comment.likes_total
+        by_id[comment.id] = comment
+    Comment.objects.bulk_update(comments, ['path', 'depth', 'like_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0004_post_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, help_text='Materialized path of ancestor ids', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='community_c_post_id_a98548_idx'),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
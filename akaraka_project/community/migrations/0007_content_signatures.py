@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0006_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='report',
+            name='reporter',
+            field=models.ForeignKey(blank=True, help_text='Empty for automatic reports', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reports_made', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='ContentSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('minhash', models.BinaryField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='content_signatures', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'community_content_signature',
+            },
+        ),
+        migrations.CreateModel(
+            name='SignatureBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True)),
+                ('signature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='community.contentsignature')),
+            ],
+            options={
+                'db_table': 'community_signature_bucket',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='contentsignature',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_content_signature'),
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.text import slugify
+from .search import build_search_document
+from .threads import assign_path, reply_parent
+from .tags import sync_post_tags
 
 User = get_user_model()
 
@@ -23,6 +27,10 @@ class Post(models.Model):
     tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
     likes = models.ManyToManyField(User, related_name='liked_posts', blank=True)
     views_count = models.PositiveIntegerField(default=0)
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    hot_score = models.FloatField(default=0, editable=False, help_text="Likes and comments decayed by age")
+    search_document = models.TextField(blank=True, editable=False, help_text="Normalized title and content for search")
     is_pinned = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False)
     is_published = models.BooleanField(default=True)
@@ -32,6 +40,12 @@ class Post(models.Model):
     class Meta:
         db_table = 'community_post'
         ordering = ['-is_pinned', '-is_featured', '-created_at']
+        indexes = [
+            models.Index(fields=['is_published', '-hot_score']),
+            models.Index(fields=['is_published', '-created_at']),
+            models.Index(fields=['is_published', '-views_count']),
+            models.Index(fields=['-created_at', '-id']),
+        ]
     
     def __str__(self):
         return self.title
@@ -39,13 +53,53 @@ class Post(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'title', 'content'} & set(update_fields):
+            self.search_document = build_search_document(self.title, self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'search_document'}
         super().save(*args, **kwargs)
+        if update_fields is None or 'tags' in update_fields:
+            sync_post_tags(self)
     
     def get_like_count(self):
-        return self.likes.count()
+        return self.like_count
     
     def get_comment_count(self):
-        return self.comments.count()
+        return self.comment_count
+
+
+class Tag(models.Model):
+    """Normalized post tag"""
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=50, unique=True, allow_unicode=True)
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    posts = models.ManyToManyField(Post, through='PostTag', related_name='tag_set')
+    
+    class Meta:
+        db_table = 'community_tag'
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['-post_count']),
+        ]
+    
+    def __str__(self):
+        return self.name
+
+
+class PostTag(models.Model):
+    """Post to tag link"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='post_links')
+    
+    class Meta:
+        db_table = 'community_post_tag'
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'post'], name='unique_post_tag'),
+        ]
+    
+    def __str__(self):
+        return f"{self.post_id} #{self.tag_id}"
 
 
 class Comment(models.Model):
@@ -62,6 +116,9 @@ class Comment(models.Model):
         blank=True,
         help_text="For nested/reply comments"
     )
+    path = models.CharField(max_length=255, blank=True, editable=False, help_text="Materialized path of ancestor ids")
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    like_count = models.PositiveIntegerField(default=0, editable=False)
     is_approved = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -69,12 +126,23 @@ class Comment(models.Model):
     class Meta:
         db_table = 'community_comment'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'path']),
+        ]
     
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
     
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        if is_new and self.parent_comment_id:
+            self.parent_comment = reply_parent(self.parent_comment)
+        super().save(*args, **kwargs)
+        if is_new and not self.path:
+            assign_path(self)
+    
     def get_like_count(self):
-        return self.likes.count()
+        return self.like_count
 
 
 class Testimony(models.Model):
@@ -115,7 +183,14 @@ class Report(models.Model):
         ('dismissed', 'Dismissed'),
     ]
     
-    reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reports_made')
+    reporter = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reports_made',
+        null=True,
+        blank=True,
+        help_text="Empty for automatic reports"
+    )
     reported_post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='reports', null=True, blank=True)
     reported_comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='reports', null=True, blank=True)
     report_type = models.CharField(max_length=20, choices=REPORT_TYPES)
@@ -131,7 +206,44 @@ class Report(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"Report by {self.reporter.username} - {self.report_type}"
+        reporter = self.reporter.username if self.reporter_id else 'system'
+        return f"Report by {reporter} - {self.report_type}"
+
+
+class ContentSignature(models.Model):
+    """MinHash signature of a post or comment for near-duplicate detection"""
+    
+    CONTENT_TYPES = [
+        ('post', 'Post'),
+        ('comment', 'Comment'),
+    ]
+    
+    content_type = models.CharField(max_length=10, choices=CONTENT_TYPES)
+    object_id = models.PositiveIntegerField()
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='content_signatures')
+    minhash = models.BinaryField()
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'community_content_signature'
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_content_signature'),
+        ]
+    
+    def __str__(self):
+        return f"Signature of {self.content_type} #{self.object_id}"
+
+
+class SignatureBucket(models.Model):
+    """LSH band of a content signature; equal keys mean candidate duplicates"""
+    signature = models.ForeignKey(ContentSignature, on_delete=models.CASCADE, related_name='buckets')
+    key = models.BigIntegerField(db_index=True)
+    
+    class Meta:
+        db_table = 'community_signature_bucket'
+    
+    def __str__(self):
+        return f"{self.key}"
 
 
 class CommunityModerator(models.Model):
@@ -0,0 +1,114 @@
+"""
+Forum post counters and hot score
+Post.like_count and Post.comment_count are kept in step with the likes
+through table and the comments table using F() updates, and hot_score (likes
+and comments, decayed by post age) is recomputed in the same UPDATE. A
+periodic job re-decays hot scores so "trending" is a plain index scan.
+Comment.like_count is recounted whenever a comment's likes change.
+"""
+import logging
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Post, Comment
+
+logger = logging.getLogger(__name__)
+
+COMMENT_WEIGHT = 2
+# Hacker News style gravity: score / (age_hours + 2) ** GRAVITY
+GRAVITY = 1.5
+# Posts older than this are left to decay towards zero
+HOT_WINDOW_DAYS = 30
+
+
+def _decay(created_at, now=None):
+    age_hours = max(((now or timezone.now()) - created_at).total_seconds() / 3600, 0)
+    return (age_hours + 2) ** GRAVITY
+
+
+def hot_score(like_count, comment_count, created_at, now=None):
+    return (like_count + COMMENT_WEIGHT * comment_count) / _decay(created_at, now)
+
+
+def adjust_counts(post_id, created_at, likes=0, comments=0):
+    """Atomically change a post's counters and refresh its hot score in one UPDATE"""
+    like_count = Greatest(F('like_count') + likes, Value(0))
+    comment_count = Greatest(F('comment_count') + comments, Value(0))
+    Post.objects.filter(id=post_id).update(
+        like_count=like_count,
+        comment_count=comment_count,
+        hot_score=(like_count + COMMENT_WEIGHT * comment_count) / Value(_decay(created_at)),
+    )
+
+
+def toggle_like(post, user):
+    """
+    Like the post, or unlike it if the user already does
+
+    Deleting first and inserting only when nothing was deleted keeps this to
+    one or two statements against the through table, without loading likers.
+
+    Returns:
+        bool: True if the post is now liked by the user
+    """
+    through = Post.likes.through
+    post_field = Post.likes.field.m2m_field_name()
+    user_field = Post.likes.field.m2m_reverse_field_name()
+    link = {f'{post_field}_id': post.id, f'{user_field}_id': user.id}
+
+    with transaction.atomic():
+        deleted, _ = through.objects.filter(**link).delete()
+        if deleted:
+            adjust_counts(post.id, post.created_at, likes=-1)
+            return False
+        try:
+            with transaction.atomic():
+                through.objects.create(**link)
+        except IntegrityError:
+            # A concurrent request liked it first
+            return True
+        adjust_counts(post.id, post.created_at, likes=1)
+        return True
+
+
+def refresh_comment_like_counts(comment_ids):
+    """Recount likes of the given comments in one UPDATE"""
+    through = Comment.likes.through
+    comment_field = f'{Comment.likes.field.m2m_field_name()}_id'
+    likes = through.objects.filter(**{comment_field: OuterRef('id')}).order_by().values(comment_field)
+    Comment.objects.filter(id__in=comment_ids).update(
+        like_count=Coalesce(Subquery(likes.annotate(total=Count('id')).values('total')), Value(0))
+    )
+
+
+def refresh_hot_scores(batch_size=1000, now=None):
+    """
+    Re-decay hot scores of recent posts and zero out posts that aged out
+
+    Returns:
+        int: Number of posts updated
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=HOT_WINDOW_DAYS)
+    updated = Post.objects.filter(created_at__lt=cutoff).exclude(hot_score=0).update(hot_score=0)
+
+    posts = Post.objects.filter(created_at__gte=cutoff).only(
+        'id', 'like_count', 'comment_count', 'created_at', 'hot_score'
+    ).order_by('id')
+    batch = []
+    for post in posts.iterator(chunk_size=batch_size):
+        post.hot_score = hot_score(post.like_count, post.comment_count, post.created_at, now)
+        batch.append(post)
+        if len(batch) >= batch_size:
+            Post.objects.bulk_update(batch, ['hot_score'])
+            updated += len(batch)
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['hot_score'])
+        updated += len(batch)
+
+    logger.info(f"Refreshed hot scores of {updated} posts")
+    return updated
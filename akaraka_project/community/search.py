@@ -0,0 +1,123 @@
+"""
+Forum full-text search
+Post.search_document holds the post's title and content folded to one
+canonical form (Persian letter forms, no diacritics or ZWNJ, case-folded,
+punctuation removed) and is refreshed on save. Queries are folded the same
+way, so Arabic vs Persian spellings of the same Dari word match.
+
+The index itself depends on the database:
+    postgresql - a generated, weighted tsvector column with a GIN index,
+                 ranked with ts_rank and highlighted with ts_headline
+    sqlite     - an external-content FTS5 table kept in sync by triggers,
+                 ranked with bm25() and highlighted with snippet()
+    others     - icontains over search_document, newest first
+
+All three are created by community migration 0004.
+"""
+import re
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from akaraka.text import fold_text
+
+MAX_RESULTS = 500
+SNIPPET_WORDS = 30
+
+_NON_WORD_RE = re.compile(r'[^\w\s]', re.UNICODE)
+_WHITESPACE_RE = re.compile(r'[^\S\n]+')
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# Private-use markers wrapped around matches by the database; the snippet is
+# HTML-escaped first and only then are the markers turned into <mark> tags
+_START, _STOP = '\ue000', '\ue001'
+
+
+def normalize_search_text(text):
+    """Fold text for indexing and querying"""
+    if not text:
+        return ''
+    text = _NON_WORD_RE.sub(' ', fold_text(text))
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def build_search_document(title, content):
+    """Title on the first line (weighted higher where supported), then the content"""
+    return f"{normalize_search_text(title)}\n{normalize_search_text(content)}"
+
+
+def query_terms(query):
+    return _TERM_RE.findall(normalize_search_text(query))[:10]
+
+
+def _highlight(snippet):
+    return mark_safe(escape(snippet or '').replace(_START, '<mark>').replace(_STOP, '</mark>'))
+
+
+class PostgresSearchBackend:
+    SQL = """
+        SELECT p.id,
+               ts_rank(p.search_vector, q.query) AS rank,
+               ts_headline('simple', p.search_document, q.query, %s) AS snippet
+        FROM community_post p, to_tsquery('simple', %s) AS q(query)
+        WHERE p.is_published AND p.search_vector @@ q.query
+        ORDER BY rank DESC, p.id DESC
+        LIMIT %s
+    """
+
+    def search(self, terms, limit):
+        # Every term must match; the last one may be a prefix (search-as-you-type)
+        tsquery = ' & '.join(f"'{term}'" for term in terms[:-1])
+        tsquery = f"{tsquery} & '{terms[-1]}':*" if tsquery else f"'{terms[-1]}':*"
+        options = f'StartSel={_START}, StopSel={_STOP}, MaxWords={SNIPPET_WORDS}, MinWords=10'
+        with connection.cursor() as cursor:
+            cursor.execute(self.SQL, [options, tsquery, limit])
+            return [(post_id, snippet) for post_id, _, snippet in cursor.fetchall()]
+
+
+class SQLiteSearchBackend:
+    SQL = """
+        SELECT p.id, snippet(community_post_fts, 0, %s, %s, '…', %s) AS snippet
+        FROM community_post_fts
+        JOIN community_post p ON p.id = community_post_fts.rowid
+        WHERE community_post_fts MATCH %s AND p.is_published
+        ORDER BY bm25(community_post_fts), p.id DESC
+        LIMIT %s
+    """
+
+    def search(self, terms, limit):
+        match = ' '.join(f'"{term}"' for term in terms[:-1])
+        match = f'{match} "{terms[-1]}"*'.strip()
+        with connection.cursor() as cursor:
+            cursor.execute(self.SQL, [_START, _STOP, min(SNIPPET_WORDS, 64), match, limit])
+            return cursor.fetchall()
+
+
+class BasicSearchBackend:
+    def search(self, terms, limit):
+        from .models import Post
+        posts = Post.objects.filter(is_published=True)
+        for term in terms:
+            posts = posts.filter(search_document__icontains=term)
+        return [(post_id, '') for post_id in posts.order_by('-created_at').values_list('id', flat=True)[:limit]]
+
+
+def get_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    return BasicSearchBackend()
+
+
+def search_posts(query, limit=MAX_RESULTS):
+    """
+    Search published posts
+
+    Returns:
+        list: (post id, highlighted snippet) tuples, best match first
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    return [(post_id, _highlight(snippet)) for post_id, snippet in get_backend().search(terms, limit)]
@@ -0,0 +1,68 @@
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Post, Comment, ContentSignature
+from .duplicates import screen_content
+from .ranking import adjust_counts, refresh_comment_like_counts
+from .tags import untag_post
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    """Keep Post.comment_count and hot_score in step with new comments"""
+    if created:
+        adjust_counts(instance.post_id, instance.post.created_at, comments=1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    """Keep Post.comment_count and hot_score in step with deleted comments"""
+    post = Post.objects.filter(id=instance.post_id).only('created_at').first()
+    if post:
+        adjust_counts(post.id, post.created_at, comments=-1)
+
+
+@receiver(m2m_changed, sender=Comment.likes.through)
+def count_comment_likes(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep Comment.like_count in step with the likes through table"""
+    if action == 'pre_clear' and reverse:
+        # user.liked_comments.clear(): remember which comments lose a like
+        instance._cleared_comment_ids = list(instance.liked_comments.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        comment_ids = [instance.pk]
+    elif action == 'post_clear':
+        comment_ids = getattr(instance, '_cleared_comment_ids', [])
+    else:
+        comment_ids = pk_set
+    if comment_ids:
+        refresh_comment_like_counts(comment_ids)
+
+
+@receiver(pre_delete, sender=Post)
+def release_post_tags(sender, instance, **kwargs):
+    """Keep Tag.post_count in step with deleted posts"""
+    untag_post(instance.id)
+
+
+@receiver(post_save, sender=Post)
+def screen_new_post(sender, instance, created, **kwargs):
+    """Flag or hold posts that repeat recent content"""
+    if created:
+        screen_content(instance, 'post')
+
+
+@receiver(post_save, sender=Comment)
+def screen_new_comment(sender, instance, created, **kwargs):
+    """Flag or hold comments that repeat recent content"""
+    if created:
+        screen_content(instance, 'comment')
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def drop_signature(sender, instance, **kwargs):
+    """Deleted content no longer counts as an original"""
+    content_type = 'post' if sender is Post else 'comment'
+    ContentSignature.objects.filter(content_type=content_type, object_id=instance.id).delete()
@@ -0,0 +1,168 @@
+"""
+Post tags
+Post.tags stays the comma-separated field authors type into; on save it is
+parsed into Tag rows (one per unique slug) linked through PostTag, so the
+forum can filter by tag with an index lookup. Tag.post_count is adjusted by
+the same sync, which keeps the tag cloud a single small ordered read.
+
+The cloud is cached per process (LocMemCache) for TAG_CLOUD_TIMEOUT. A tag
+change drops the copy of the process that made it; other processes show
+counts up to that long out of date, which is cheaper than a shared version
+row written by every post save.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.text import slugify
+
+from akaraka.text import fold_text
+
+MAX_TAGS_PER_POST = 10
+TAG_CLOUD_CACHE_KEY = 'community_tag_cloud'
+TAG_CLOUD_TIMEOUT = 60
+TAG_CLOUD_SIZE = 30
+
+
+def parse_tags(csv):
+    """
+    Split a comma-separated tag string into unique tags
+
+    Returns:
+        dict: slug -> display name, in the order typed
+    """
+    tags = {}
+    for name in (csv or '').split(','):
+        name = ' '.join(name.split())[:50]
+        # Folding first makes Arabic and Persian spellings share a slug
+        slug = slugify(fold_text(name), allow_unicode=True)[:50]
+        if slug and slug not in tags:
+            tags[slug] = name
+        if len(tags) >= MAX_TAGS_PER_POST:
+            break
+    return tags
+
+
+def get_or_create_tags(tags):
+    """
+    Make sure Tag rows exist for the given slugs
+
+    Args:
+        tags: dict of slug -> display name
+
+    Returns:
+        dict: slug -> tag id
+    """
+    from .models import Tag
+    if not tags:
+        return {}
+    Tag.objects.bulk_create(
+        [Tag(slug=slug, name=name) for slug, name in tags.items()],
+        ignore_conflicts=True,
+    )
+    return dict(Tag.objects.filter(slug__in=tags).values_list('slug', 'id'))
+
+
+def sync_post_tags(post):
+    """Bring the post's PostTag links in line with post.tags"""
+    from .models import Tag, PostTag
+    wanted = parse_tags(post.tags)
+    with transaction.atomic():
+        current = dict(PostTag.objects.filter(post=post).values_list('tag__slug', 'tag_id'))
+        removed = [tag_id for slug, tag_id in current.items() if slug not in wanted]
+        added = {slug: name for slug, name in wanted.items() if slug not in current}
+        if not removed and not added:
+            return
+
+        if removed:
+            PostTag.objects.filter(post=post, tag_id__in=removed).delete()
+            Tag.objects.filter(id__in=removed).update(post_count=F('post_count') - 1)
+        if added:
+            tag_ids = get_or_create_tags(added).values()
+            PostTag.objects.bulk_create(
+                [PostTag(post=post, tag_id=tag_id) for tag_id in tag_ids],
+                ignore_conflicts=True,
+            )
+            Tag.objects.filter(id__in=tag_ids).update(post_count=F('post_count') + 1)
+    invalidate_tag_cloud()
+
+
+def untag_post(post_id):
+    """Release a post's tag counts before it is deleted"""
+    from .models import Tag, PostTag
+    tag_ids = list(PostTag.objects.filter(post_id=post_id).values_list('tag_id', flat=True))
+    if tag_ids:
+        Tag.objects.filter(id__in=tag_ids).update(post_count=F('post_count') - 1)
+        invalidate_tag_cloud()
+
+
+def recount_tags():
+    """Recompute every Tag.post_count from the links in one UPDATE"""
+    from .models import Tag, PostTag
+    links = PostTag.objects.filter(tag_id=OuterRef('id')).order_by().values('tag_id')
+    updated = Tag.objects.update(
+        post_count=Coalesce(Subquery(links.annotate(total=Count('id')).values('total')), Value(0))
+    )
+    invalidate_tag_cloud()
+    return updated
+
+
+def backfill_tags(batch_size=1000):
+    """
+    Build tag links from existing Post.tags strings in bulk
+
+    Returns:
+        tuple: (posts processed, links newly inserted)
+    """
+    from .models import Post, PostTag
+    posts = Post.objects.exclude(tags='').only('id', 'tags').order_by('id')
+    processed = linked = 0
+    batch = []
+
+    def flush(batch):
+        parsed = [(post_id, parse_tags(csv)) for post_id, csv in batch]
+        names = {}
+        for _, tags in parsed:
+            for slug, name in tags.items():
+                names.setdefault(slug, name)
+        tag_ids = get_or_create_tags(names)
+        links = [
+            PostTag(post_id=post_id, tag_id=tag_ids[slug])
+            for post_id, tags in parsed
+            for slug in tags
+        ]
+        # bulk_create returns ignored conflicts too, so count what was actually inserted
+        existing = PostTag.objects.filter(post_id__in=[post_id for post_id, _ in parsed])
+        before = existing.count()
+        PostTag.objects.bulk_create(links, ignore_conflicts=True, batch_size=batch_size)
+        return existing.count() - before
+
+    for post in posts.iterator(chunk_size=batch_size):
+        batch.append((post.id, post.tags))
+        if len(batch) >= batch_size:
+            linked += flush(batch)
+            processed += len(batch)
+            batch = []
+    if batch:
+        linked += flush(batch)
+        processed += len(batch)
+
+    recount_tags()
+    return processed, linked
+
+
+def get_tag_cloud(limit=TAG_CLOUD_SIZE):
+    """Most used tags as (name, slug, post count), cached for TAG_CLOUD_TIMEOUT"""
+    from .models import Tag
+    cloud = cache.get(TAG_CLOUD_CACHE_KEY)
+    if cloud is None:
+        cloud = list(Tag.objects.filter(post_count__gt=0).order_by('-post_count', 'name').values_list(
+            'name', 'slug', 'post_count'
+        )[:TAG_CLOUD_SIZE])
+        cache.set(TAG_CLOUD_CACHE_KEY, cloud, TAG_CLOUD_TIMEOUT)
+    return cloud[:limit]
+
+
+def invalidate_tag_cloud():
+    """Drop this process's cached cloud (others expire within TAG_CLOUD_TIMEOUT)"""
+    cache.delete(TAG_CLOUD_CACHE_KEY)
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import Post
+
+User = get_user_model()
+
+
+class ForumSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author', password='secret')
+        Post.objects.create(
+            author=author,
+            title='Hello world',
+            content='Learning my first words of Dari today.',
+            post_type='discussion',
+        )
+
+    def test_search_without_matches_returns_empty_page(self):
+        response = self.client.get(reverse('community:forum'), {'q': 'zzzzqq'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['posts']), [])
+
+    def test_search_with_matches(self):
+        response = self.client.get(reverse('community:forum'), {'q': 'hello'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post.title for post in response.context['posts']], ['Hello world'])
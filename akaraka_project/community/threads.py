@@ -0,0 +1,101 @@
+"""
+Threaded comments
+Each comment stores a materialized path: its ancestors' ids and its own,
+each encoded as a fixed-width base-36 segment. Sorting by path therefore
+yields a thread in depth-first order (siblings oldest first), so a whole
+discussion, or a page of it, is one ordered range scan on (post, path) and
+the tree is assembled in Python in a single pass.
+"""
+import string
+
+SEGMENT_WIDTH = 6  # 36 ** 6 ids, about two billion
+MAX_DEPTH = 8  # deeper replies are attached to the deepest allowed ancestor
+COMMENTS_PER_PAGE = 200
+
+_DIGITS = string.digits + string.ascii_lowercase
+
+
+def encode_segment(comment_id):
+    digits = []
+    while comment_id:
+        comment_id, remainder = divmod(comment_id, 36)
+        digits.append(_DIGITS[remainder])
+    return ''.join(reversed(digits)).rjust(SEGMENT_WIDTH, '0')
+
+
+def path_ids(path):
+    """Ids of the comments along a path, root first"""
+    return [int(path[i:i + SEGMENT_WIDTH], 36) for i in range(0, len(path), SEGMENT_WIDTH)]
+
+
+def is_valid_path(path):
+    return bool(path) and len(path) % SEGMENT_WIDTH == 0 and all(ch in _DIGITS for ch in path)
+
+
+def reply_parent(parent):
+    """The comment a reply to parent is actually attached to, honouring MAX_DEPTH"""
+    if parent is None or parent.depth < MAX_DEPTH - 1:
+        return parent
+    from .models import Comment
+    ancestor_id = path_ids(parent.path)[MAX_DEPTH - 2]
+    return Comment.objects.only('id', 'path', 'depth').get(id=ancestor_id)
+
+
+def assign_path(comment):
+    """Set path and depth of a freshly inserted comment (needs its id)"""
+    from .models import Comment
+    parent = comment.parent_comment if comment.parent_comment_id else None
+    prefix = parent.path if parent else ''
+    comment.path = prefix + encode_segment(comment.id)
+    comment.depth = parent.depth + 1 if parent else 0
+    Comment.objects.filter(id=comment.id).update(path=comment.path, depth=comment.depth)
+
+
+def build_tree(comments, orphans_are_roots=False):
+    """
+    Link comments, given in path order, into a tree in one pass
+
+    Each comment gets a ``children`` list. A comment whose parent is not
+    among the given ones (hidden, or on an earlier page) is dropped with
+    its replies, or shown at the top level when ``orphans_are_roots`` is set.
+
+    Returns:
+        list: Top-level comments
+    """
+    roots, by_id = [], {}
+    for comment in comments:
+        comment.children = []
+        parent_id = comment.parent_comment_id
+        if parent_id in by_id:
+            by_id[parent_id].children.append(comment)
+        elif parent_id is None or orphans_are_roots:
+            roots.append(comment)
+        else:
+            continue
+        by_id[comment.id] = comment
+    return roots
+
+
+def load_comment_tree(post, after=None, limit=COMMENTS_PER_PAGE):
+    """
+    Load a post's approved comments as a tree with a single query
+
+    Args:
+        post: Post (or post id)
+        after: Path of the last comment on the previous page, or None
+        limit: Comments per page, or None for the whole discussion
+
+    Returns:
+        tuple: (top-level comments, path to continue after or None)
+    """
+    from .models import Comment
+    comments = Comment.objects.filter(post=post, is_approved=True).select_related('author').order_by('path')
+    if after:
+        comments = comments.filter(path__gt=after)
+    if limit is None:
+        return build_tree(comments), None
+
+    comments = list(comments[:limit + 1])
+    next_after = comments[limit - 1].path if len(comments) > limit else None
+    # A later page may start inside a thread, so its first replies become roots
+    return build_tree(comments[:limit], orphans_are_roots=bool(after)), next_after
@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import (
-    CommunityForumView, PostDetailView, CreatePostView, CreateCommentView,
+    CommunityForumView, ForumPostsAPIView, PostDetailView, CreatePostView, CreateCommentView,
     LikePostView, TestimoniesView, CreateTestimonyView, ReportContentView
 )
 
@@ -8,6 +8,7 @@ app_name = 'community'
 
 urlpatterns = [
     path('forum/', CommunityForumView.as_view(), name='forum'),
+    path('api/posts/', ForumPostsAPIView.as_view(), name='api_posts'),
     path('post/create/', CreatePostView.as_view(), name='create_post'),
     path('post/<slug:slug>/comment/', CreateCommentView.as_view(), name='create_comment'),
     path('post/<slug:slug>/like/', LikePostView.as_view(), name='like_post'),
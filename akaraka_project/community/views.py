@@ -2,42 +2,94 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import View, ListView, DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
-from django.db.models import Q, Count
-from django.urls import reverse_lazy
+from django.db.models import Q, Count, Case, When, Value, IntegerField
+from django.urls import reverse, reverse_lazy
+from django.http import JsonResponse
 from .models import Post, Comment, Testimony, Report, CommunityModerator
+from .ranking import toggle_like
+from .search import search_posts
+from .threads import load_comment_tree, is_valid_path
+from .tags import get_tag_cloud
 from gamification.models import Achievement
+from gamification.events import record_event
+from gamification.config import xp_for
+from akaraka.pagination import CursorPaginationMixin, carried_query_string, cursor_json_response
 
 
-class CommunityForumView(ListView):
+class CommunityForumView(CursorPaginationMixin, ListView):
     """Community forum - browse posts"""
     model = Post
     template_name = 'community/forum.html'
     context_object_name = 'posts'
     paginate_by = 20
     
+    # Keyset orderings; each is backed by an (is_published, key) index
+    SORT_ORDERINGS = {
+        'new': ('-created_at', '-id'),
+        'trending': ('-hot_score', '-id'),
+        'popular': ('-views_count', '-id'),
+    }
+    
     def get_queryset(self):
-        queryset = Post.objects.filter(is_published=True)
+        queryset = Post.objects.filter(is_published=True).select_related('author')
         
         # Filter by post type
         post_type = self.request.GET.get('type')
         if post_type:
             queryset = queryset.filter(post_type=post_type)
         
-        # Search
-        search = self.request.GET.get('q')
+        # Filter by tag
+        tag = self.request.GET.get('tag')
+        if tag:
+            queryset = queryset.filter(tag_links__tag__slug=tag)
+        
+        # Search results come back ranked, so they are paged by rank position
+        search = self.request.GET.get('q', '').strip()
+        self.snippets = {}
         if search:
-            queryset = queryset.filter(Q(title__icontains=search) | Q(content__icontains=search))
+            results = search_posts(search)
+            self.snippets = dict(results)
+            if not results:
+                self.cursor_ordering = self.SORT_ORDERINGS['new']
+                return queryset.none()
+            self.cursor_ordering = ('search_rank',)
+            ranking = Case(
+                *[When(id=post_id, then=Value(position)) for position, (post_id, _) in enumerate(results)],
+                output_field=IntegerField()
+            )
+            return queryset.filter(id__in=self.snippets).annotate(search_rank=ranking)
         
         # Sort
         sort = self.request.GET.get('sort', 'new')
-        if sort == 'trending':
-            queryset = queryset.annotate(like_count=Count('likes')).order_by('-like_count')
-        elif sort == 'popular':
-            queryset = queryset.order_by('-views_count')
-        else:  # new
-            queryset = queryset.order_by('-created_at')
-        
+        self.cursor_ordering = self.SORT_ORDERINGS.get(sort, self.SORT_ORDERINGS['new'])
         return queryset
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for post in context['posts']:
+            post.search_snippet = self.snippets.get(post.id, '')
+        context['tag_cloud'] = get_tag_cloud()
+        # Keep search and filters when paging
+        context['query_string'] = carried_query_string(self.request)
+        return context
+
+
+class ForumPostsAPIView(CommunityForumView):
+    """Forum posts as JSON, with the same filters and cursors as the forum"""
+    
+    def render_to_response(self, context, **response_kwargs):
+        return cursor_json_response(context['page_obj'], lambda post: {
+            'id': post.id,
+            'title': post.title,
+            'url': reverse('community:post_detail', kwargs={'slug': post.slug}),
+            'author': post.author.username,
+            'post_type': post.post_type,
+            'like_count': post.like_count,
+            'comment_count': post.comment_count,
+            'views_count': post.views_count,
+            'created_at': post.created_at.isoformat(),
+            'snippet': str(self.snippets.get(post.id, '')),
+        })
 
 
 class PostDetailView(DetailView):
@@ -48,24 +100,26 @@ class PostDetailView(DetailView):
     slug_url_kwarg = 'slug'
     context_object_name = 'post'
     
+    def get_queryset(self):
+        return Post.objects.select_related('author')
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        post = self.get_object()
+        post = self.object
         
         # Increment view count
         post.views_count += 1
         post.save(update_fields=['views_count'])
         
-        # Get comments
-        context['comments'] = post.comments.filter(is_approved=True, parent_comment__isnull=True)
-        context['comment_count'] = post.get_comment_count()
-        context['like_count'] = post.get_like_count()
+        # Get comments: the whole thread (or a page of it) in one query
+        after = self.request.GET.get('after')
+        context['comments'], context['next_after'] = load_comment_tree(
+            post, after=after if is_valid_path(after or '') else None
+        )
+        context['comment_count'] = post.comment_count
+        context['like_count'] = post.like_count
         
-        # Split and clean tags
-        if post.tags:
-            context['tags'] = [tag.strip() for tag in post.tags.split(',') if tag.strip()]
-        else:
-            context['tags'] = []
+        context['tags'] = post.tag_set.order_by('name') if post.tags else []
         
         if self.request.user.is_authenticated:
             context['user_liked'] = post.likes.filter(id=self.request.user.id).exists()
@@ -82,12 +136,19 @@ class CreatePostView(LoginRequiredMixin, CreateView):
     
     def form_valid(self, form):
         form.instance.author = self.request.user
+        response = super().form_valid(form)
+        
+        # The duplicate screen (post_save) may have held the post back
+        if not self.object.is_published:
+            messages.info(self.request, 'Your post is being held for review before it appears in the forum.')
+            return response
+        
         messages.success(self.request, 'Post published successfully!')
         
         # Award XP
-        self.request.user.add_xp(2)
-        
-        return super().form_valid(form)
+        self.request.user.add_xp(xp_for('post_create'))
+        record_event(self.request.user, 'post_created', 'xp_earned')
+        return response
 
 
 class CreateCommentView(LoginRequiredMixin, CreateView):
@@ -105,12 +166,25 @@ class CreateCommentView(LoginRequiredMixin, CreateView):
         post = get_object_or_404(Post, slug=self.kwargs['slug'])
         form.instance.author = self.request.user
         form.instance.post = post
+        parent_id = self.request.POST.get('parent', '')
+        if parent_id.isdigit():
+            form.instance.parent_comment = get_object_or_404(
+                Comment.objects.only('id', 'path', 'depth'), id=parent_id, post=post
+            )
+        response = super().form_valid(form)
+        
+        # The duplicate screen (post_save) may have held the comment back
+        if not self.object.is_approved:
+            messages.info(self.request, 'Your comment is being held for review.')
+            return response
+        
         messages.success(self.request, 'Comment posted!')
         
         # Award XP
-        self.request.user.add_xp(1)
+        self.request.user.add_xp(xp_for('comment'))
+        record_event(self.request.user, 'xp_earned')
         
-        return super().form_valid(form)
+        return response
     
     def get_success_url(self):
         return reverse_lazy('community:post_detail', kwargs={'slug': self.kwargs['slug']})
@@ -119,17 +193,15 @@ class CreateCommentView(LoginRequiredMixin, CreateView):
 class LikePostView(LoginRequiredMixin, View):
     """Like/unlike a post"""
     def post(self, request, slug):
-        post = get_object_or_404(Post, slug=slug)
-        if request.user in post.likes.all():
-            post.likes.remove(request.user)
-            liked = False
-        else:
-            post.likes.add(request.user)
-            liked = True
+        post = get_object_or_404(Post.objects.only('id', 'created_at'), slug=slug)
+        liked = toggle_like(post, request.user)
+        if liked:
             # Award XP for liking
-            request.user.add_xp(1)
+            request.user.add_xp(xp_for('post_like'))
+            record_event(request.user, 'xp_earned')
         
-        return render(request, 'community/_post_card.html', {'post': post, 'liked': liked})
+        like_count = Post.objects.filter(id=post.id).values_list('like_count', flat=True).first()
+        return JsonResponse({'liked': liked, 'like_count': like_count})
 
 
 class TestimoniesView(ListView):
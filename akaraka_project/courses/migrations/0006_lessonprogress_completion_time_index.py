@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_make_content_dari_optional'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lessonprogress',
+            index=models.Index(fields=['completion_time'], name='courses_les_complet_fcf773_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_lessonprogress_completion_time_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-created_at', '-id'], name='courses_cou_created_cbfe7a_idx'),
+        ),
+    ]
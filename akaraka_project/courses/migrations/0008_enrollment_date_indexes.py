@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='courseenrollment',
+            index=models.Index(fields=['enrolled_at'], name='courses_cou_enrolle_89b743_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseenrollment',
+            index=models.Index(fields=['completion_date'], name='courses_cou_complet_3ae2fe_idx'),
+        ),
+    ]
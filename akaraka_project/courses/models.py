@@ -33,6 +33,9 @@ class Course(models.Model):
     class Meta:
         db_table = 'courses_course'
         ordering = ['level', 'title']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.get_level_display()})"
@@ -127,17 +130,28 @@ class LessonProgress(models.Model):
     class Meta:
         db_table = 'courses_lessonprogress'
         unique_together = ('user', 'lesson')
+        indexes = [
+            models.Index(fields=['completion_time']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.lesson.title}"
     
-    def mark_completed(self, xp=10):
+    def mark_completed(self, xp=None):
         """Mark lesson as completed and add XP"""
+        if xp is None:
+            from gamification.config import xp_for
+            xp = xp_for('lesson_complete')
         self.is_completed = True
         self.completion_time = datetime.now()
         self.xp_earned = xp
         self.save()
         self.user.add_xp(xp)
+        
+        from gamification.course_xp import add_course_xp
+        from gamification.events import record_event
+        add_course_xp(self.user_id, self.lesson.course_id, xp)
+        record_event(self.user, 'lesson_completed', 'xp_earned')
 
 
 class CourseEnrollment(models.Model):
@@ -152,6 +166,10 @@ class CourseEnrollment(models.Model):
     class Meta:
         db_table = 'courses_courseenrollment'
         unique_together = ('user', 'course')
+        indexes = [
+            models.Index(fields=['enrolled_at']),
+            models.Index(fields=['completion_date']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.course.title}"
@@ -166,6 +184,9 @@ class CourseEnrollment(models.Model):
             is_completed=True
         ).count()
         calculated = int((completed / total_lessons) * 100)
+        if calculated >= 100 and not self.is_completed:
+            # Completes the enrollment (events, certificate)
+            return self.update_progress(calculated)
         # Update the stored progress percentage
         self.progress_percentage = calculated
         self.save(update_fields=['progress_percentage'])
@@ -178,9 +199,16 @@ class CourseEnrollment(models.Model):
     def update_progress(self, percentage):
         """Update progress percentage and mark complete if 100%"""
         self.progress_percentage = max(0, min(100, percentage))
-        if self.progress_percentage >= 100 and not self.is_completed:
+        just_completed = self.progress_percentage >= 100 and not self.is_completed
+        if just_completed:
             self.is_completed = True
             self.completion_date = datetime.now()
         self.save()
+        
+        if just_completed:
+            from gamification.events import record_event
+            from certificates.issuance import issue_certificate
+            record_event(self.user, 'course_completed')
+            issue_certificate(self.user, self.course)
         return self.progress_percentage
 
@@ -1,8 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import (
     Exercise, ExerciseLesson, MCQQuestion, MCQOption, MatchingExercise, MatchingPair,
     TypingExercise, TypingPrompt, ListeningExercise, ListeningQuestion, ListeningOption,
-    UserExerciseResponse
+    ExerciseAttempt, UserExerciseResponse
 )
 
 
@@ -43,8 +43,23 @@ class ExerciseAdmin(admin.ModelAdmin):
     list_display = ('title', 'exercise_type', 'difficulty', 'xp_reward', 'is_published')
     list_filter = ('exercise_type', 'difficulty', 'is_published')
     search_fields = ('title', 'description')
-    fields = ('title', 'description', 'exercise_type', 'difficulty', 'xp_reward', 'is_published')
+    fields = ('title', 'description', 'exercise_type', 'difficulty', 'xp_reward', 'questions_per_attempt', 'stratify_by_difficulty', 'is_published')
     inlines = [ListeningExerciseInline, MatchingExerciseInline, TypingExerciseInline, ExerciseLessonInline]
+    actions = ['rescore_responses']
+    
+    def rescore_responses(self, request, queryset):
+        from .rescoring import rescore_exercise, RESCORABLE_TYPES
+        for exercise in queryset:
+            if exercise.exercise_type not in RESCORABLE_TYPES or exercise.is_generated:
+                self.message_user(request, f'"{exercise.title}" cannot be re-scored.', messages.WARNING)
+                continue
+            result = rescore_exercise(exercise)
+            self.message_user(
+                request,
+                f'"{exercise.title}": {result["changed"]} of {result["scanned"]} responses changed, '
+                f'{result["users"]} users, net XP {result["xp_delta"]:+d}.'
+            )
+    rescore_responses.short_description = 'Re-score past responses with the current answer key'
 
 
 @admin.register(ExerciseLesson)
@@ -73,8 +88,8 @@ class ExerciseLessonAdmin(admin.ModelAdmin):
 
 @admin.register(MCQQuestion)
 class MCQQuestionAdmin(admin.ModelAdmin):
-    list_display = ('question_english', 'exercise', 'order')
-    list_filter = ('exercise',)
+    list_display = ('question_english', 'exercise', 'difficulty', 'order')
+    list_filter = ('exercise', 'difficulty')
     search_fields = ('question_english',)
 
 
@@ -127,6 +142,14 @@ class ListeningOptionAdmin(admin.ModelAdmin):
     fields = ('question', 'text_english', 'text_dari', 'is_correct', 'order')
 
 
+@admin.register(ExerciseAttempt)
+class ExerciseAttemptAdmin(admin.ModelAdmin):
+    list_display = ('user', 'exercise', 'created_at', 'submitted_at')
+    list_filter = ('submitted_at', 'created_at')
+    search_fields = ('user__username', 'exercise__title')
+    readonly_fields = ('created_at',)
+
+
 @admin.register(UserExerciseResponse)
 class UserExerciseResponseAdmin(admin.ModelAdmin):
     list_display = ('user', 'exercise', 'score', 'is_correct', 'xp_earned', 'completed_at')
@@ -0,0 +1,174 @@
+"""
+Answer matching utilities for typing exercises
+Normalizes English and Dari answers so harmless differences (punctuation,
+contractions, whitespace, and everything akaraka.text.fold_text() folds, such
+as case, Arabic vs Persian letter forms and ZWNJ) are ignored, and accepts
+small typos through a bounded edit distance. A typo-level match only earns
+partial credit (MATCH_CREDIT): one edit can also turn the answer into a
+different real word, e.g. "song" for "sing".
+
+Normalization tables and regexes are compiled once at import time; the
+per-prompt normalized answer and accepted variants are precomputed when a
+TypingPrompt is saved, so grading only normalizes the user's input.
+"""
+import re
+
+from akaraka.text import fold_text
+
+_CONTRACTIONS = {
+    "won't": 'will not',
+    "can't": 'cannot',
+    "shan't": 'shall not',
+    "ain't": 'is not',
+    "let's": 'let us',
+    "i'm": 'i am',
+}
+_CONTRACTION_SUFFIXES = {
+    "n't": ' not',
+    "'re": ' are',
+    "'ve": ' have',
+    "'ll": ' will',
+    "'d": ' would',
+}
+
+_CONTRACTION_RE = re.compile(
+    r"\b(" + '|'.join(re.escape(word) for word in _CONTRACTIONS) + r")\b"
+)
+_SUFFIX_RE = re.compile(
+    r"(\w+)(" + '|'.join(re.escape(suffix) for suffix in _CONTRACTION_SUFFIXES) + r")\b"
+)
+_PUNCTUATION_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Separator authors may use to list several accepted answers in one field
+VARIANT_SEPARATOR_RE = re.compile(r'[\n|]')
+
+# Points an answer earns by match tier
+MATCH_CREDIT = {'exact': 1, 'close': 0.5}
+
+
+def _expand_contractions(text):
+    text = _CONTRACTION_RE.sub(lambda m: _CONTRACTIONS[m.group(1)], text)
+    return _SUFFIX_RE.sub(lambda m: m.group(1) + _CONTRACTION_SUFFIXES[m.group(2)], text)
+
+
+def normalize_answer(text):
+    """
+    Normalize an answer for comparison
+
+    Args:
+        text (str): Raw answer in English or Dari
+
+    Returns:
+        str: Case-folded text with Dari letter forms unified, diacritics,
+             ZWNJ and punctuation removed, contractions expanded and
+             whitespace collapsed
+    """
+    if not text:
+        return ''
+    text = _expand_contractions(fold_text(text))
+    text = _PUNCTUATION_RE.sub(' ', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def build_variants(correct_answer, alternative_answers=''):
+    """
+    Build the normalized answer and the set of accepted variants for a prompt
+
+    Returns:
+        tuple: (normalized_answer, sorted list of accepted normalized variants)
+    """
+    normalized = normalize_answer(correct_answer)
+    variants = {normalized}
+    for raw in VARIANT_SEPARATOR_RE.split(alternative_answers or ''):
+        variant = normalize_answer(raw)
+        if variant:
+            variants.add(variant)
+    # Spacing-only differences ("every day" vs "everyday", ZWNJ vs space in Dari)
+    variants.update([variant.replace(' ', '') for variant in variants])
+    variants.discard('')
+    return normalized, sorted(variants)
+
+
+def max_typos(answer):
+    """Number of edits tolerated for an answer of this length"""
+    length = len(answer)
+    if length < 4:
+        return 0
+    if length <= 10:
+        return 1
+    return 2
+
+
+def bounded_edit_distance(a, b, limit):
+    """
+    Levenshtein distance between a and b, or limit + 1 if it exceeds limit
+
+    Only a diagonal band of width 2 * limit + 1 is computed and the loop exits
+    as soon as every cell in the current row is over the limit.
+    """
+    if a == b:
+        return 0
+    len_a, len_b = len(a), len(b)
+    if abs(len_a - len_b) > limit:
+        return limit + 1
+    if len_a > len_b:
+        a, b, len_a, len_b = b, a, len_b, len_a
+
+    over = limit + 1
+    previous = list(range(len_b + 1))
+    for i in range(1, len_a + 1):
+        start = max(1, i - limit)
+        end = min(len_b, i + limit)
+        current = [over] * (len_b + 1)
+        current[0] = i if i <= limit else over
+        char_a = a[i - 1]
+        row_min = current[0]
+        for j in range(start, end + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if value > over:
+                value = over
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous = current
+    return min(previous[len_b], over)
+
+
+def match_answer(user_answer, accepted_variants):
+    """
+    Check a user's answer against precomputed accepted variants
+
+    Args:
+        user_answer (str): Raw answer typed by the user
+        accepted_variants (list): Normalized variants from build_variants()
+
+    Returns:
+        str: 'exact' for a normalized match, 'close' for a match within the
+             typo tolerance, or '' when the answer is wrong
+    """
+    normalized = normalize_answer(user_answer)
+    if not normalized:
+        return ''
+    if normalized in accepted_variants:
+        return 'exact'
+    compact = normalized.replace(' ', '')
+    if compact in accepted_variants:
+        return 'exact'
+    # Typos are checked against the space-free forms only, which build_variants
+    # always includes, so each variant is compared once
+    for variant in accepted_variants:
+        if ' ' in variant:
+            continue
+        limit = max_typos(variant)
+        if limit and bounded_edit_distance(compact, variant, limit) <= limit:
+            return 'close'
+    return ''
+
+
+def answer_credit(match):
+    """Points earned for a match_answer() result"""
+    return MATCH_CREDIT.get(match, 0)
@@ -0,0 +1,162 @@
+"""
+Item statistics for MCQ exercises
+Keeps per-question attempt/correct counters and per-option choice counters up
+to date at grading time, so exercise quality (p-values, unused distractors)
+can be shown without reading UserExerciseResponse.response_data.
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import F
+
+from .models import MCQQuestion, MCQOption, UserExerciseResponse
+
+# NumPy makes the historical backfill much faster but is optional
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+def record_mcq_attempt(graded):
+    """
+    Update item counters for one graded MCQ submission
+
+    Args:
+        graded (list): (question_id, option_id, is_correct) tuples
+    """
+    if not graded:
+        return
+    question_ids = [question_id for question_id, _, _ in graded]
+    correct_ids = [question_id for question_id, _, is_correct in graded if is_correct]
+    option_ids = [option_id for _, option_id, _ in graded]
+
+    MCQQuestion.objects.filter(id__in=question_ids).update(attempt_count=F('attempt_count') + 1)
+    if correct_ids:
+        MCQQuestion.objects.filter(id__in=correct_ids).update(correct_count=F('correct_count') + 1)
+    MCQOption.objects.filter(id__in=option_ids).update(choice_count=F('choice_count') + 1)
+
+
+def parse_mcq_response(response_data):
+    """Yield (question_id, option_id, is_correct) from a stored MCQ response"""
+    if not isinstance(response_data, dict):
+        return
+    for question_id, answer in response_data.items():
+        if not isinstance(answer, dict):
+            continue
+        try:
+            yield int(question_id), int(answer.get('selected_option')), bool(answer.get('correct'))
+        except (TypeError, ValueError):
+            continue
+
+
+def count_responses(rows):
+    """
+    Aggregate (question_id, option_id, is_correct) rows into counters
+
+    Returns:
+        tuple: (attempts, correct, choices) dicts keyed by question/option id
+    """
+    rows = list(rows)
+    if not rows:
+        return {}, {}, {}
+
+    if NUMPY_AVAILABLE:
+        data = np.asarray(rows, dtype=np.int64)
+        question_ids, attempts = np.unique(data[:, 0], return_counts=True)
+        correct_ids, correct = np.unique(data[data[:, 2] == 1, 0], return_counts=True)
+        option_ids, choices = np.unique(data[:, 1], return_counts=True)
+        return (
+            dict(zip(question_ids.tolist(), attempts.tolist())),
+            dict(zip(correct_ids.tolist(), correct.tolist())),
+            dict(zip(option_ids.tolist(), choices.tolist())),
+        )
+
+    attempts, correct, choices = Counter(), Counter(), Counter()
+    for question_id, option_id, is_correct in rows:
+        attempts[question_id] += 1
+        choices[option_id] += 1
+        if is_correct:
+            correct[question_id] += 1
+    return dict(attempts), dict(correct), dict(choices)
+
+
+def _fold(rows, attempts, correct, choices):
+    """Add a chunk of rows to running counters; returns the number of rows"""
+    for counter, counts in zip((attempts, correct, choices), count_responses(rows)):
+        counter.update(counts)
+    return len(rows)
+
+
+def rebuild_item_stats(exercise_ids, chunk_size=2000):
+    """
+    Recompute the counters of the given MCQ exercises from stored responses
+
+    Responses are streamed with iterator() and folded into the counters a
+    chunk at a time, so memory holds at most chunk_size parsed answers.
+
+    Returns:
+        dict: Number of responses, answers, questions and options processed
+    """
+    responses = UserExerciseResponse.objects.filter(
+        exercise_id__in=exercise_ids
+    ).values_list('response_data', flat=True)
+
+    attempts, correct, choices = Counter(), Counter(), Counter()
+    rows = []
+    response_count = answer_count = 0
+    for response_data in responses.iterator(chunk_size=chunk_size):
+        rows.extend(parse_mcq_response(response_data))
+        response_count += 1
+        if len(rows) >= chunk_size:
+            answer_count += _fold(rows, attempts, correct, choices)
+            rows = []
+    answer_count += _fold(rows, attempts, correct, choices)
+
+    questions = list(MCQQuestion.objects.filter(exercise_id__in=exercise_ids).only('id'))
+    for question in questions:
+        question.attempt_count = attempts.get(question.id, 0)
+        question.correct_count = correct.get(question.id, 0)
+
+    options = list(MCQOption.objects.filter(question__exercise_id__in=exercise_ids).only('id'))
+    for option in options:
+        option.choice_count = choices.get(option.id, 0)
+
+    with transaction.atomic():
+        MCQQuestion.objects.bulk_update(questions, ['attempt_count', 'correct_count'], batch_size=1000)
+        MCQOption.objects.bulk_update(options, ['choice_count'], batch_size=1000)
+
+    return {
+        'responses': response_count,
+        'answers': answer_count,
+        'questions': len(questions),
+        'options': len(options),
+    }
+
+
+def question_statistics(exercise):
+    """
+    Build p-values and distractor rates for an MCQ exercise from the counters
+
+    Returns:
+        list: One dict per question with its options' choice rates
+    """
+    stats = []
+    for question in exercise.mcq_questions.all().prefetch_related('options'):
+        attempts = question.attempt_count
+        options = []
+        for option in question.options.all():
+            options.append({
+                'option': option,
+                'choice_count': option.choice_count,
+                'choice_rate': round(option.choice_count / attempts * 100, 1) if attempts else None,
+                'never_chosen': attempts > 0 and option.choice_count == 0 and not option.is_correct,
+            })
+        stats.append({
+            'question': question,
+            'attempts': attempts,
+            'correct_count': question.correct_count,
+            'p_value': round(question.correct_count / attempts, 2) if attempts else None,
+            'options': options,
+        })
+    return stats
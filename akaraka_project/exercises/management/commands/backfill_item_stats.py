@@ -0,0 +1,52 @@
+"""
+Django management command to rebuild MCQ item statistics from past responses
+Usage: python manage.py backfill_item_stats [--exercise-id=123] [--chunk-size=2000]
+"""
+from django.core.management.base import BaseCommand
+from exercises.models import Exercise
+from exercises.item_stats import rebuild_item_stats, NUMPY_AVAILABLE
+
+
+class Command(BaseCommand):
+    help = 'Rebuild MCQ question/option counters from stored exercise responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--exercise-id',
+            type=int,
+            help='Only rebuild statistics for this exercise'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of responses fetched per database round trip'
+        )
+
+    def handle(self, *args, **options):
+        exercise_id = options.get('exercise_id')
+        chunk_size = options['chunk_size']
+
+        exercises = Exercise.objects.filter(exercise_type='mcq', is_generated=False)
+        if exercise_id:
+            exercises = exercises.filter(id=exercise_id)
+        exercise_ids = list(exercises.values_list('id', flat=True))
+
+        if not exercise_ids:
+            self.stdout.write(self.style.WARNING('No MCQ exercises found'))
+            return
+
+        if not NUMPY_AVAILABLE:
+            self.stdout.write(self.style.WARNING('NumPy not installed, using slower pure Python counting'))
+
+        result = rebuild_item_stats(exercise_ids, chunk_size=chunk_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✓ Item statistics rebuilt!\n'
+                f'  Responses scanned: {result["responses"]}\n'
+                f'  Answers counted: {result["answers"]}\n'
+                f'  Questions updated: {result["questions"]}\n'
+                f'  Options updated: {result["options"]}'
+            )
+        )
@@ -0,0 +1,60 @@
+"""
+Django management command to re-score past responses after an answer key fix
+Usage: python manage.py rescore_exercise <exercise_id> [<exercise_id> ...] [--chunk-size=2000] [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+from exercises.models import Exercise
+from exercises.rescoring import rescore_exercise, RESCORABLE_TYPES
+
+
+class Command(BaseCommand):
+    help = 'Re-grade stored responses of an exercise and correct the XP they awarded'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'exercise_ids',
+            nargs='+',
+            type=int,
+            help='Exercise IDs to re-score'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of responses fetched and written per batch'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without saving anything'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+
+        for exercise_id in options['exercise_ids']:
+            try:
+                exercise = Exercise.objects.get(id=exercise_id)
+            except Exercise.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f'Exercise with ID {exercise_id} not found'))
+                continue
+
+            if exercise.exercise_type not in RESCORABLE_TYPES or exercise.is_generated:
+                self.stdout.write(
+                    self.style.WARNING(f'Skipping "{exercise.title}" - {exercise.get_exercise_type_display()} exercises cannot be re-scored')
+                )
+                continue
+
+            self.stdout.write(f'Re-scoring: {exercise.title}...', ending=' ')
+            result = rescore_exercise(exercise, chunk_size=chunk_size, dry_run=dry_run)
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'✓ {"Dry run" if dry_run else "Done"}\n'
+                    f'  Responses scanned: {result["scanned"]}\n'
+                    f'  Responses changed: {result["changed"]}\n'
+                    f'  Users affected: {result["users"]}\n'
+                    f'  Net XP change: {result["xp_delta"]:+d}'
+                )
+            )
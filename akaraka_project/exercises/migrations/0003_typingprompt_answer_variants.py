@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:27
+
+from django.db import migrations, models
+
+
+def compute_answer_variants(apps, schema_editor):
+    from exercises.answer_matching import build_variants
+
+    TypingPrompt = apps.get_model('exercises', 'TypingPrompt')
+    prompts = list(TypingPrompt.objects.only('id', 'correct_answer', 'alternative_answers'))
+    for prompt in prompts:
+        prompt.normalized_answer, prompt.accepted_variants = build_variants(
+            prompt.correct_answer, prompt.alternative_answers
+        )
+    TypingPrompt.objects.bulk_update(prompts, ['normalized_answer', 'accepted_variants'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='typingprompt',
+            name='accepted_variants',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='typingprompt',
+            name='alternative_answers',
+            field=models.TextField(blank=True, help_text='Other accepted answers, one per line'),
+        ),
+        migrations.AddField(
+            model_name='typingprompt',
+            name='normalized_answer',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.RunPython(compute_answer_variants, migrations.RunPython.noop),
+    ]
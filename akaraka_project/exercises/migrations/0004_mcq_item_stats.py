@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0003_typingprompt_answer_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mcqoption',
+            name='choice_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Times this option was selected'),
+        ),
+        migrations.AddField(
+            model_name='mcqquestion',
+            name='attempt_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Times this question was answered'),
+        ),
+        migrations.AddField(
+            model_name='mcqquestion',
+            name='correct_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Times it was answered correctly'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0004_mcq_item_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='questions_per_attempt',
+            field=models.PositiveIntegerField(default=0, help_text='Draw this many random MCQ questions per attempt (0 shows all questions)'),
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='stratify_by_difficulty',
+            field=models.BooleanField(default=False, help_text='Keep the difficulty mix of the question bank in each draw'),
+        ),
+        migrations.AddField(
+            model_name='mcqquestion',
+            name='difficulty',
+            field=models.CharField(choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard')], default='medium', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ExerciseAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_ids', models.JSONField(default=list, help_text='Drawn question IDs in display order')),
+                ('option_order', models.JSONField(default=dict, help_text='Shuffled option IDs per question')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='exercises.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercise_attempts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'exercises_exerciseattempt',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
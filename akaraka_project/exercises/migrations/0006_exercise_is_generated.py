@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0005_question_bank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='is_generated',
+            field=models.BooleanField(default=False, editable=False, help_text='Auto-generated vocabulary drill'),
+        ),
+    ]
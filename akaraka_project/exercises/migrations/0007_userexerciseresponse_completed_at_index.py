@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_lessonprogress_completion_time_index'),
+        ('exercises', '0006_exercise_is_generated'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userexerciseresponse',
+            index=models.Index(fields=['completed_at'], name='exercises_u_complet_1a36a3_idx'),
+        ),
+    ]
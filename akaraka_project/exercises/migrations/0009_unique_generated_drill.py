@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:35
+
+from django.db import migrations, models
+
+
+def merge_duplicate_drills(apps, schema_editor):
+    Exercise = apps.get_model('exercises', 'Exercise')
+    ExerciseAttempt = apps.get_model('exercises', 'ExerciseAttempt')
+    UserExerciseResponse = apps.get_model('exercises', 'UserExerciseResponse')
+    keep = {}
+    for exercise_id, exercise_type in Exercise.objects.filter(is_generated=True).order_by('id').values_list(
+        'id', 'exercise_type'
+    ):
+        if exercise_type not in keep:
+            keep[exercise_type] = exercise_id
+            continue
+        ExerciseAttempt.objects.filter(exercise_id=exercise_id).update(exercise_id=keep[exercise_type])
+        UserExerciseResponse.objects.filter(exercise_id=exercise_id).update(exercise_id=keep[exercise_type])
+        Exercise.objects.filter(id=exercise_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0008_cache_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_drills, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='exercise',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_generated', True)), fields=('exercise_type',), name='unique_generated_drill'),
+        ),
+    ]
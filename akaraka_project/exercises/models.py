@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from courses.models import Lesson, Course
 from datetime import datetime
+from akaraka.versions import VersionRow
+from .answer_matching import build_variants, match_answer
 
 User = get_user_model()
 
@@ -25,12 +27,27 @@ class Exercise(models.Model):
         default='easy'
     )
     xp_reward = models.PositiveIntegerField(default=5)
+    questions_per_attempt = models.PositiveIntegerField(
+        default=0,
+        help_text="Draw this many random MCQ questions per attempt (0 shows all questions)"
+    )
+    stratify_by_difficulty = models.BooleanField(
+        default=False,
+        help_text="Keep the difficulty mix of the question bank in each draw"
+    )
     is_published = models.BooleanField(default=True)
+    is_generated = models.BooleanField(default=False, editable=False, help_text="Auto-generated vocabulary drill")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'exercises_exercise'
+        constraints = [
+            # One shared generated drill exercise per type (see vocabulary_drills.get_drill_exercise)
+            models.UniqueConstraint(
+                fields=['exercise_type'], condition=models.Q(is_generated=True), name='unique_generated_drill'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.get_exercise_type_display()})"
@@ -59,6 +76,13 @@ class MCQQuestion(models.Model):
     audio = models.FileField(upload_to='audio/exercises/', null=True, blank=True)
     order = models.PositiveIntegerField(default=0)
     explanation = models.TextField(blank=True)
+    difficulty = models.CharField(
+        max_length=20,
+        choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard')],
+        default='medium'
+    )
+    attempt_count = models.PositiveIntegerField(default=0, editable=False, help_text="Times this question was answered")
+    correct_count = models.PositiveIntegerField(default=0, editable=False, help_text="Times it was answered correctly")
     
     class Meta:
         db_table = 'exercises_mcqquestion'
@@ -75,6 +99,7 @@ class MCQOption(models.Model):
     text_dari = models.CharField(max_length=500)
     is_correct = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
+    choice_count = models.PositiveIntegerField(default=0, editable=False, help_text="Times this option was selected")
     
     class Meta:
         db_table = 'exercises_mcqoption'
@@ -134,6 +159,9 @@ class TypingPrompt(models.Model):
     sentence_english = models.TextField()
     sentence_dari = models.TextField()
     correct_answer = models.CharField(max_length=500)
+    alternative_answers = models.TextField(blank=True, help_text="Other accepted answers, one per line")
+    normalized_answer = models.CharField(max_length=500, blank=True, editable=False)
+    accepted_variants = models.JSONField(default=list, blank=True, editable=False)
     audio = models.FileField(upload_to='audio/exercises/', null=True, blank=True)
     order = models.PositiveIntegerField(default=0)
     
@@ -143,6 +171,21 @@ class TypingPrompt(models.Model):
     
     def __str__(self):
         return self.sentence_english[:50]
+    
+    def save(self, *args, **kwargs):
+        self.normalized_answer, self.accepted_variants = build_variants(
+            self.correct_answer, self.alternative_answers
+        )
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'normalized_answer', 'accepted_variants'}
+        super().save(*args, **kwargs)
+    
+    def check_answer(self, user_answer):
+        """Return 'exact', 'close' or '' for the user's answer"""
+        variants = self.accepted_variants
+        if not variants:
+            variants = build_variants(self.correct_answer, self.alternative_answers)[1]
+        return match_answer(user_answer, variants)
 
 
 class ListeningExercise(models.Model):
@@ -189,6 +232,23 @@ class ListeningOption(models.Model):
         ordering = ['order']
 
 
+class ExerciseAttempt(models.Model):
+    """Questions drawn for one attempt at a question-bank exercise"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exercise_attempts')
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='attempts')
+    question_ids = models.JSONField(default=list, help_text="Drawn question IDs in display order")
+    option_order = models.JSONField(default=dict, help_text="Shuffled option IDs per question")
+    created_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'exercises_exerciseattempt'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.exercise.title} attempt"
+
+
 class UserExerciseResponse(models.Model):
     """Track user responses to exercises"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exercise_responses')
@@ -204,6 +264,9 @@ class UserExerciseResponse(models.Model):
     class Meta:
         db_table = 'exercises_userexerciseresponse'
         ordering = ['-completed_at']
+        indexes = [
+            models.Index(fields=['completed_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.exercise.title} ({self.score}%)"
@@ -218,3 +281,10 @@ class UserExerciseResponse(models.Model):
         elif percentage >= 40:
             return int(self.exercise.xp_reward * 0.5)
         return 0
+
+
+class CacheVersion(VersionRow):
+    """Versions of exercise data every process caches (question banks, the drill index)"""
+    
+    class Meta:
+        db_table = 'exercises_cache_version'
@@ -0,0 +1,164 @@
+"""
+Question bank sampling for MCQ exercises
+An exercise with questions_per_attempt > 0 draws that many questions at
+random from its pool on every attempt, optionally stratified by difficulty.
+
+The pool is kept as a cached {difficulty: [question ids]} map per exercise,
+so a draw is random.sample() over a small in-memory list followed by one
+id__in query - never an ORDER BY RANDOM() over the whole table. Cached pools
+are keyed on a database version (akaraka.versions) that is bumped when a
+bank question changes, so every process draws from the new pool within a
+few seconds.
+
+A user has at most one open attempt per exercise: reloading the page within
+ATTEMPT_TIMEOUT shows the same draw again instead of creating another row,
+and a later visit replaces the expired attempt.
+"""
+import random
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from akaraka.versions import DBVersion
+from .models import CacheVersion, MCQQuestion, ExerciseAttempt
+
+BANK_CACHE_TIMEOUT = 60 * 60
+BANK_VERSION = DBVersion(CacheVersion, 'question_bank')
+ATTEMPT_TIMEOUT = timedelta(hours=2)
+
+_random = random.SystemRandom()
+
+
+def _cache_key(exercise_id):
+    return f'question_bank:{BANK_VERSION.get()}:{exercise_id}'
+
+
+def get_bank_ids(exercise_id):
+    """Return the cached {difficulty: [question ids]} pool of an exercise"""
+    key = _cache_key(exercise_id)
+    bank = cache.get(key)
+    if bank is None:
+        bank = {}
+        rows = MCQQuestion.objects.filter(exercise_id=exercise_id).values_list('difficulty', 'id')
+        for difficulty, question_id in rows:
+            bank.setdefault(difficulty, []).append(question_id)
+        cache.set(key, bank, BANK_CACHE_TIMEOUT)
+    return bank
+
+
+def invalidate_bank():
+    """Make every process reload its pools once the current transaction commits"""
+    BANK_VERSION.bump_on_commit()
+
+
+def _allocate(bank, count):
+    """
+    Split count across difficulty strata proportionally to their size
+    (largest remainder method, capped by each stratum's size)
+    """
+    total = sum(len(ids) for ids in bank.values())
+    quotas = {}
+    remainders = []
+    for difficulty, ids in bank.items():
+        exact = count * len(ids) / total
+        quotas[difficulty] = min(int(exact), len(ids))
+        remainders.append((exact - int(exact), difficulty))
+    remaining = count - sum(quotas.values())
+    for _, difficulty in sorted(remainders, reverse=True):
+        if remaining <= 0:
+            break
+        if quotas[difficulty] < len(bank[difficulty]):
+            quotas[difficulty] += 1
+            remaining -= 1
+    return quotas
+
+
+def draw_question_ids(exercise, rng=_random):
+    """
+    Draw question ids for one attempt
+
+    Returns:
+        list: Randomly ordered question ids, at most questions_per_attempt long
+    """
+    bank = get_bank_ids(exercise.id)
+    pool_size = sum(len(ids) for ids in bank.values())
+    count = min(exercise.questions_per_attempt or pool_size, pool_size)
+    if count == 0:
+        return []
+
+    if exercise.stratify_by_difficulty and len(bank) > 1:
+        drawn = []
+        for difficulty, quota in _allocate(bank, count).items():
+            drawn.extend(rng.sample(bank[difficulty], quota))
+    else:
+        all_ids = [question_id for ids in bank.values() for question_id in ids]
+        drawn = rng.sample(all_ids, count)
+
+    rng.shuffle(drawn)
+    return drawn
+
+
+def start_attempt(user, exercise, rng=_random):
+    """
+    The user's open attempt at an exercise, or a new one with freshly drawn
+    questions and shuffled options
+
+    Returns:
+        tuple: (ExerciseAttempt, list of questions with display_options set)
+    """
+    open_attempts = ExerciseAttempt.objects.filter(user=user, exercise=exercise, submitted_at__isnull=True)
+    attempt = open_attempts.filter(created_at__gte=timezone.now() - ATTEMPT_TIMEOUT).first()
+    if attempt is not None:
+        question_ids, option_order = attempt.question_ids, attempt.option_order
+    else:
+        question_ids, option_order = draw_question_ids(exercise, rng), None
+    questions = MCQQuestion.objects.filter(exercise=exercise, id__in=question_ids).prefetch_related('options')
+    by_id = {question.id: question for question in questions}
+
+    ordered = []
+    drawn_order = {}
+    for question_id in question_ids:
+        question = by_id.get(question_id)
+        if question is None:
+            continue
+        options = list(question.options.all())
+        if option_order is None:
+            rng.shuffle(options)
+        else:
+            position = {option_id: index for index, option_id in enumerate(option_order.get(str(question_id), []))}
+            options.sort(key=lambda option: position.get(option.id, len(position)))
+        question.display_options = options
+        drawn_order[str(question_id)] = [option.id for option in options]
+        ordered.append(question)
+
+    if attempt is None:
+        # Expired attempts are never submitted, so they go as they are replaced
+        open_attempts.delete()
+        attempt = ExerciseAttempt.objects.create(
+            user=user,
+            exercise=exercise,
+            question_ids=[question.id for question in ordered],
+            option_order=drawn_order,
+        )
+    return attempt, ordered
+
+
+def claim_attempt(attempt_id, user, exercise):
+    """
+    Mark an open attempt as submitted and return it
+
+    The conditional UPDATE makes a double submit of the same attempt a no-op.
+    Call it inside the transaction that grades the attempt, so a grading
+    error rolls the claim back.
+
+    Returns:
+        ExerciseAttempt or None if it does not exist or was already submitted
+    """
+    with transaction.atomic():
+        claimed = ExerciseAttempt.objects.filter(
+            id=attempt_id, user=user, exercise=exercise, submitted_at__isnull=True
+        ).update(submitted_at=timezone.now())
+        if not claimed:
+            return None
+        return ExerciseAttempt.objects.get(id=attempt_id)
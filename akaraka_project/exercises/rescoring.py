@@ -0,0 +1,222 @@
+"""
+Bulk re-scoring of exercise responses after an answer key is corrected
+Responses are streamed in chunks, re-graded in memory from the stored
+response_data, written back with bulk_update, and the resulting XP
+differences are applied to users with one grouped UPDATE per batch.
+"""
+import logging
+from collections import defaultdict
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from .models import MCQOption, ListeningQuestion, ListeningOption, UserExerciseResponse
+from .answer_matching import answer_credit
+from .item_stats import rebuild_item_stats
+from courses.models import Lesson
+from gamification.course_xp import apply_course_xp_deltas
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+RESCORABLE_TYPES = ('mcq', 'typing', 'listening')
+
+
+def _option_key(options):
+    """Map option id -> (question id, is_correct)"""
+    return {option_id: (question_id, is_correct) for option_id, question_id, is_correct in options}
+
+
+def build_grader(exercise):
+    """
+    Build an in-memory grader for the exercise's current answer key
+
+    Returns:
+        callable: response_data -> (new_response_data, normalized_score),
+                  or None if the exercise type cannot be re-scored
+    """
+    if exercise.exercise_type == 'mcq':
+        key = _option_key(MCQOption.objects.filter(
+            question__exercise=exercise
+        ).values_list('id', 'question_id', 'is_correct'))
+
+        def grade(response_data):
+            score = 0
+            max_score = 0
+            graded = {}
+            for question_id, answer in response_data.items():
+                if question_id == 'attempt' or not isinstance(answer, dict):
+                    continue
+                option = key.get(_to_int(answer.get('selected_option')))
+                is_correct = bool(option and option[1])
+                max_score += 1
+                score += is_correct
+                graded[question_id] = {**answer, 'correct': is_correct}
+            # Question bank attempts are scored out of the drawn set
+            attempt = response_data.get('attempt')
+            if isinstance(attempt, dict):
+                max_score = len(attempt.get('question_ids', [])) or max_score
+                graded['attempt'] = attempt
+            return graded, int(score / max_score * 100) if max_score > 0 else 0
+        return grade
+
+    if exercise.exercise_type == 'listening':
+        key = _option_key(ListeningOption.objects.filter(
+            question__listening__exercise=exercise
+        ).values_list('id', 'question_id', 'is_correct'))
+        question_count = ListeningQuestion.objects.filter(listening__exercise=exercise).count()
+
+        def grade(response_data):
+            score = 0
+            graded = {}
+            for question_id, answer in response_data.items():
+                if not isinstance(answer, dict):
+                    continue
+                option = key.get(_to_int(answer.get('selected_option')))
+                is_correct = bool(option and option[1])
+                score += is_correct
+                graded[question_id] = {**answer, 'correct': is_correct}
+            return graded, int(score / question_count * 100) if question_count > 0 else 0
+        return grade
+
+    if exercise.exercise_type == 'typing':
+        prompts = {str(prompt.id): prompt for prompt in exercise.typing.prompts.all()}
+
+        def grade(response_data):
+            score = 0
+            graded = {}
+            for prompt_id, answer in response_data.items():
+                if not isinstance(answer, dict):
+                    continue
+                prompt = prompts.get(str(prompt_id))
+                match = prompt.check_answer(answer.get('answer', '')) if prompt else ''
+                score += answer_credit(match)
+                graded[prompt_id] = {**answer, 'correct': bool(match), 'match': match}
+            return graded, int(score / len(prompts) * 100) if prompts else 0
+        return grade
+
+    return None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def apply_xp_deltas(deltas, batch_size=1000):
+    """
+    Apply {user_id: xp_delta} with one CASE UPDATE per batch of users
+
+    Returns:
+        int: Number of UPDATE statements issued
+    """
+    changes = [(user_id, delta) for user_id, delta in deltas.items() if delta]
+    statements = 0
+    for start in range(0, len(changes), batch_size):
+        batch = changes[start:start + batch_size]
+        delta = Case(
+            *[When(id=user_id, then=Value(delta)) for user_id, delta in batch],
+            default=Value(0), output_field=IntegerField(),
+        )
+        User.objects.filter(id__in=[user_id for user_id, _ in batch]).update(
+            total_xp=Greatest(F('total_xp') + delta, Value(0))
+        )
+        statements += 1
+    return statements
+
+
+def _grading(response_data):
+    """The graded outcome of each answer: correctness and, for typing, the credit its match tier earns"""
+    return {
+        key: (answer.get('correct'), answer_credit(answer.get('match')))
+        for key, answer in response_data.items() if isinstance(answer, dict)
+    }
+
+
+def _by_course(lesson_deltas):
+    """Turn {(user_id, lesson_id): delta} into {(user_id, course_id): delta}"""
+    lesson_ids = {lesson_id for _, lesson_id in lesson_deltas}
+    courses = dict(Lesson.objects.filter(id__in=lesson_ids).values_list('id', 'course_id'))
+    deltas = defaultdict(int)
+    for (user_id, lesson_id), delta in lesson_deltas.items():
+        if delta:
+            deltas[(user_id, courses[lesson_id])] += delta
+    return deltas
+
+
+def rescore_exercise(exercise, chunk_size=2000, dry_run=False):
+    """
+    Re-grade every stored response of an exercise against its current key
+
+    Args:
+        exercise (Exercise): Exercise whose answer key was corrected
+        chunk_size (int): Responses fetched and written per batch
+        dry_run (bool): Compute the changes without saving them
+
+    Returns:
+        dict: Counts of scanned/changed responses, users and net XP delta
+    """
+    grade = None if exercise.is_generated else build_grader(exercise)
+    if grade is None:
+        raise ValueError(f'{exercise.get_exercise_type_display()} exercises cannot be re-scored')
+
+    responses = UserExerciseResponse.objects.filter(exercise=exercise).only(
+        'id', 'user_id', 'exercise_id', 'lesson_id', 'response_data', 'score', 'max_score', 'is_correct', 'xp_earned'
+    ).order_by('id')
+
+    xp_deltas = defaultdict(int)
+    lesson_deltas = defaultdict(int)
+    scanned = 0
+    changed = 0
+    batch = []
+    fields = ['response_data', 'score', 'is_correct', 'xp_earned']
+
+    with transaction.atomic():
+        for response in responses.iterator(chunk_size=chunk_size):
+            scanned += 1
+            if not isinstance(response.response_data, dict):
+                continue
+
+            response_data, score = grade(response.response_data)
+            if score == response.score and _grading(response_data) == _grading(response.response_data):
+                continue
+
+            # calculate_xp reads exercise.xp_reward; reuse the loaded exercise
+            response.exercise = exercise
+            old_xp = response.xp_earned
+            response.response_data = response_data
+            response.score = score
+            response.is_correct = score >= 80
+            response.xp_earned = response.calculate_xp()
+
+            xp_deltas[response.user_id] += response.xp_earned - old_xp
+            lesson_deltas[(response.user_id, response.lesson_id)] += response.xp_earned - old_xp
+            changed += 1
+            batch.append(response)
+
+            if len(batch) >= chunk_size:
+                if not dry_run:
+                    UserExerciseResponse.objects.bulk_update(batch, fields)
+                batch = []
+
+        if batch and not dry_run:
+            UserExerciseResponse.objects.bulk_update(batch, fields)
+
+        if not dry_run:
+            apply_xp_deltas(xp_deltas)
+            apply_course_xp_deltas(_by_course(lesson_deltas))
+            if exercise.exercise_type == 'mcq':
+                rebuild_item_stats([exercise.id], chunk_size=chunk_size)
+
+    result = {
+        'scanned': scanned,
+        'changed': changed,
+        'users': sum(1 for delta in xp_deltas.values() if delta),
+        'xp_delta': sum(xp_deltas.values()),
+    }
+    logger.info(f"Re-scored exercise {exercise.id}: {result}")
+    return result
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from courses.models import Vocabulary
+from .models import MCQQuestion
+from .question_bank import invalidate_bank
+from .vocabulary_drills import invalidate_index
+
+
+@receiver(post_save, sender=MCQQuestion)
+@receiver(post_delete, sender=MCQQuestion)
+def refresh_question_bank(sender, instance, **kwargs):
+    """Drop the cached question pool when a bank question changes"""
+    invalidate_bank()
+
+
+@receiver(post_save, sender=Vocabulary)
+@receiver(post_delete, sender=Vocabulary)
+def refresh_distractor_index(sender, instance, **kwargs):
+    """Rebuild the vocabulary distractor index on next use"""
+    invalidate_index()
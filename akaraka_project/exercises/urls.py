@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
-    ExerciseListView, MCQExerciseView, MatchingExerciseView, TypingExerciseView, ListeningExerciseView
+    ExerciseListView, MCQExerciseView, MatchingExerciseView, TypingExerciseView, ListeningExerciseView,
+    VocabularyDrillView
 )
 
 app_name = 'exercises'
@@ -11,4 +12,5 @@ urlpatterns = [
     path('matching/<int:exercise_id>/lesson/<int:lesson_id>/', MatchingExerciseView.as_view(), name='matching'),
     path('typing/<int:exercise_id>/lesson/<int:lesson_id>/', TypingExerciseView.as_view(), name='typing'),
     path('listening/<int:exercise_id>/lesson/<int:lesson_id>/', ListeningExerciseView.as_view(), name='listening'),
+    path('vocabulary/<str:kind>/lesson/<int:lesson_id>/', VocabularyDrillView.as_view(), name='vocabulary_drill'),
 ]
@@ -6,11 +6,18 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
 import json
+from django.db import transaction
 from .models import (
     Exercise, ExerciseLesson, MCQQuestion, MCQOption, MatchingExercise,
     TypingExercise, ListeningExercise, UserExerciseResponse
 )
+from .answer_matching import answer_credit
+from .item_stats import record_mcq_attempt
+from .question_bank import start_attempt, claim_attempt
+from .vocabulary_drills import DRILL_KINDS, start_drill, grade_drill, get_drill_exercise
 from courses.models import Lesson, LessonProgress
+from gamification.events import record_event
+from gamification.course_xp import add_course_xp
 
 
 class ExerciseListView(ListView):
@@ -21,7 +28,7 @@ class ExerciseListView(ListView):
     paginate_by = 12
     
     def get_queryset(self):
-        queryset = Exercise.objects.filter(is_published=True)
+        queryset = Exercise.objects.filter(is_published=True, is_generated=False)
         
         # Filter by type
         exercise_type = self.request.GET.get('type')
@@ -59,6 +66,8 @@ class ExerciseBaseView(LoginRequiredMixin, View):
         
         # Add XP to user
         user.add_xp(response.xp_earned)
+        add_course_xp(user.id, lesson.course_id, response.xp_earned)
+        record_event(user, 'exercise_completed', 'xp_earned')
         
         return response
 
@@ -73,13 +82,21 @@ class MCQExerciseView(ExerciseBaseView):
             messages.error(request, 'Invalid exercise type.')
             return redirect('courses:lesson_detail', course_slug=lesson.course.slug, lesson_slug=lesson.slug)
         
-        questions = exercise.mcq_questions.all().prefetch_related('options')
+        attempt = None
+        if exercise.questions_per_attempt:
+            # Question bank: draw a random subset with shuffled options
+            attempt, questions = start_attempt(request.user, exercise)
+        else:
+            questions = list(exercise.mcq_questions.all().prefetch_related('options'))
+            for question in questions:
+                question.display_options = question.options.all()
         
         context = {
             'exercise': exercise,
             'lesson': lesson,
             'course': lesson.course,
             'questions': questions,
+            'attempt': attempt,
         }
         return render(request, 'exercises/mcq_exercise.html', context)
     
@@ -96,39 +113,61 @@ class MCQExerciseView(ExerciseBaseView):
             if request.content_type == 'application/json':
                 data = json.loads(request.body)
                 responses = data.get('responses', {})
+                attempt_id = data.get('attempt_id')
             else:
                 responses = {}
                 for key, value in request.POST.items():
                     if key.startswith('question_'):
                         question_id = key.replace('question_', '')
                         responses[question_id] = value
+                attempt_id = request.POST.get('attempt_id')
             
-            # Grade exercise
-            score = 0
-            max_score = 0
-            response_data = {}
-            
-            for question_id, selected_option_id in responses.items():
-                question = exercise.mcq_questions.get(id=question_id)
-                max_score += 1
+            # Claim, grade and record together: a failure leaves the attempt open
+            with transaction.atomic():
+                # Question bank exercises are graded against the drawn set only
+                attempt = None
+                options = MCQOption.objects.filter(question__exercise=exercise)
+                if exercise.questions_per_attempt:
+                    attempt = claim_attempt(attempt_id, request.user, exercise) if attempt_id else None
+                    if attempt is None:
+                        return JsonResponse({'error': 'This attempt has expired. Please reload the exercise.'}, status=400)
+                    options = options.filter(question_id__in=attempt.question_ids)
                 
-                option = MCQOption.objects.get(id=selected_option_id)
-                if option.is_correct:
-                    score += 1
+                # Grade exercise
+                options = {(option.question_id, option.id): option for option in options}
+                score = 0
+                max_score = len(attempt.question_ids) if attempt else 0
+                response_data = {}
+                graded = []
                 
-                response_data[question_id] = {
-                    'selected_option': selected_option_id,
-                    'correct': option.is_correct
-                }
-            
-            # Normalize score to 0-100
-            normalized_score = int((score / max_score * 100)) if max_score > 0 else 0
-            
-            # Record response
-            response = self.record_response(
-                request.user, exercise, lesson,
-                response_data, normalized_score
-            )
+                for question_id, selected_option_id in responses.items():
+                    option = options.get((int(question_id), int(selected_option_id)))
+                    if option is None:
+                        raise MCQQuestion.DoesNotExist(f'Invalid answer for question {question_id}')
+                    if attempt is None:
+                        max_score += 1
+                
+                    if option.is_correct:
+                        score += 1
+                
+                    response_data[question_id] = {
+                        'selected_option': selected_option_id,
+                        'correct': option.is_correct
+                    }
+                    graded.append((option.question_id, option.id, option.is_correct))
+                
+                # Normalize score to 0-100
+                normalized_score = int((score / max_score * 100)) if max_score > 0 else 0
+                
+                # Record response
+                if attempt:
+                    response_data['attempt'] = {'id': attempt.id, 'question_ids': attempt.question_ids}
+                
+                response = self.record_response(
+                    request.user, exercise, lesson,
+                    response_data, normalized_score
+                )
+                record_mcq_attempt(graded)
             
             return JsonResponse({
                 'success': True,
@@ -137,7 +176,8 @@ class MCQExerciseView(ExerciseBaseView):
                 'is_correct': response.is_correct
             })
         
-        except Exception as e:
+        except (MCQQuestion.DoesNotExist, ValueError, TypeError) as e:
+            # Unknown or tampered option ids, malformed JSON
             return JsonResponse({'error': str(e)}, status=400)
 
 
@@ -255,25 +295,25 @@ class TypingExerciseView(ExerciseBaseView):
                         answers[prompt_id] = value
             
             typing = exercise.typing
-            prompts = typing.prompts.all()
-            
+            prompts = {str(prompt.id): prompt for prompt in typing.prompts.all()}
+
             score = 0
             response_data = {}
-            
+
             for prompt_id, user_answer in answers.items():
-                try:
-                    prompt = typing.prompts.get(id=prompt_id)
-                    is_correct = prompt.correct_answer.lower().strip() == user_answer.lower().strip()
-                    
-                    if is_correct:
-                        score += 1
-                    
-                    response_data[prompt_id] = {
-                        'answer': user_answer,
-                        'correct': is_correct
-                    }
-                except:
+                prompt = prompts.get(str(prompt_id))
+                if prompt is None:
                     continue
+
+                match = prompt.check_answer(user_answer)
+                is_correct = bool(match)
+                score += answer_credit(match)
+
+                response_data[prompt_id] = {
+                    'answer': user_answer,
+                    'correct': is_correct,
+                    'match': match,
+                }
             
             normalized_score = int((score / len(prompts) * 100)) if len(prompts) > 0 else 0
             
@@ -372,3 +412,61 @@ class ListeningExerciseView(ExerciseBaseView):
         
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
+
+
+class VocabularyDrillView(ExerciseBaseView):
+    """Auto-generated vocabulary practice from a lesson's or course's words"""
+    def get(self, request, kind, lesson_id):
+        lesson = get_object_or_404(Lesson, id=lesson_id)
+        if kind not in DRILL_KINDS:
+            messages.error(request, 'Invalid exercise type.')
+            return redirect('courses:lesson_detail', course_slug=lesson.course.slug, lesson_slug=lesson.slug)
+        
+        scope = 'course' if request.GET.get('scope') == 'course' else 'lesson'
+        direction = 'dari' if request.GET.get('direction') == 'dari' else 'english'
+        attempt, items = start_drill(request.user, lesson, kind, scope, direction)
+        
+        if not items:
+            messages.info(request, 'There is no vocabulary to practice yet.')
+            return redirect('courses:lesson_detail', course_slug=lesson.course.slug, lesson_slug=lesson.slug)
+        
+        context = {
+            'exercise': attempt.exercise,
+            'lesson': lesson,
+            'course': lesson.course,
+            'attempt': attempt,
+            'items': items,
+            'kind': kind,
+            'scope': scope,
+            'direction': direction,
+        }
+        return render(request, 'exercises/vocabulary_drill.html', context)
+    
+    @method_decorator(require_POST)
+    def post(self, request, kind, lesson_id):
+        lesson = get_object_or_404(Lesson, id=lesson_id)
+        if kind not in DRILL_KINDS:
+            return JsonResponse({'error': 'Invalid exercise type'}, status=400)
+        
+        try:
+            data = json.loads(request.body)
+            exercise = get_drill_exercise(kind)
+            attempt = claim_attempt(data.get('attempt_id'), request.user, exercise)
+            if attempt is None:
+                return JsonResponse({'error': 'This drill has expired. Please reload the page.'}, status=400)
+            
+            response_data, normalized_score = grade_drill(attempt, data.get('answers', {}))
+            response = self.record_response(
+                request.user, exercise, lesson,
+                response_data, normalized_score
+            )
+            
+            return JsonResponse({
+                'success': True,
+                'score': response.score,
+                'xp_earned': response.xp_earned,
+                'results': {key: value['correct'] for key, value in response_data.items() if key != 'attempt'},
+            })
+        
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=400)
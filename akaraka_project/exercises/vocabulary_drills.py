@@ -0,0 +1,233 @@
+"""
+Auto-generated vocabulary practice drills
+Builds "translate this word" multiple choice and matching drills from a
+lesson's (or its whole course's) Vocabulary rows.
+
+Distractors come from a precomputed index of every vocabulary entry,
+bucketed by part of speech and course level and sorted by word length.
+The index is built in one query, cached, and rebuilt only when vocabulary
+changes, so generating a drill costs no per-item queries. Each process also
+keeps the unpickled index in memory until INDEX_VERSION (a database version
+bumped after a vocabulary change commits, see akaraka.versions) moves, so a
+drill request does not deserialize the whole vocabulary and every process
+picks up new or deleted words within a few seconds.
+"""
+import bisect
+import random
+from django.core.cache import cache
+
+from akaraka.versions import DBVersion
+from courses.models import Vocabulary
+from .models import CacheVersion, Exercise, ExerciseAttempt
+
+INDEX_CACHE_KEY = 'vocabulary_distractor_index'
+INDEX_CACHE_TIMEOUT = 60 * 60 * 24
+INDEX_VERSION = DBVersion(CacheVersion, 'vocabulary_index')
+
+DRILL_KINDS = {
+    'mcq': 'Vocabulary Practice: Translate the Word',
+    'matching': 'Vocabulary Practice: Match the Words',
+}
+DEFAULT_DRILL_SIZE = 20
+MATCHING_DRILL_SIZE = 8
+DISTRACTOR_COUNT = 3
+# How many length-neighbours distractors are sampled from
+LENGTH_WINDOW = 12
+
+_random = random.SystemRandom()
+
+# (version, DistractorIndex) of this process
+_loaded = (None, None)
+
+
+class DistractorIndex:
+    """
+    Vocabulary entries bucketed by (part of speech, level), each bucket sorted
+    by the length of the answer text, with coarser fallback buckets
+    """
+
+    def __init__(self, entries):
+        # entries: (vocabulary id, english word, dari word, part of speech, level)
+        self.words = {entry[0]: entry for entry in entries}
+        self.buckets = {}
+        for field in (1, 2):
+            for entry in entries:
+                for key in ((entry[3], entry[4]), (entry[3], None), (None, None)):
+                    self.buckets.setdefault((field,) + key, []).append((len(entry[field]), entry[0]))
+        for bucket in self.buckets.values():
+            bucket.sort()
+        self.lengths = {key: [length for length, _ in bucket] for key, bucket in self.buckets.items()}
+
+    def distractors(self, vocabulary_id, field, count=DISTRACTOR_COUNT, rng=_random):
+        """Pick count entries of similar length whose answer text differs"""
+        entry = self.words[vocabulary_id]
+        answer = entry[field].strip().casefold()
+        chosen = []
+        seen = {answer}
+        for key in ((field, entry[3], entry[4]), (field, entry[3], None), (field, None, None)):
+            bucket = self.buckets.get(key, [])
+            position = bisect.bisect_left(self.lengths.get(key, []), len(entry[field]))
+            window = bucket[max(0, position - LENGTH_WINDOW // 2):position + LENGTH_WINDOW // 2]
+            candidates = [candidate_id for _, candidate_id in window]
+            rng.shuffle(candidates)
+            for candidate_id in candidates:
+                text = self.words[candidate_id][field].strip().casefold()
+                if text in seen:
+                    continue
+                seen.add(text)
+                chosen.append(candidate_id)
+                if len(chosen) == count:
+                    return chosen
+        return chosen
+
+
+def build_index():
+    """Build the distractor index from all vocabulary in a single query"""
+    entries = list(Vocabulary.objects.values_list(
+        'id', 'english_word', 'dari_word', 'part_of_speech', 'lesson__course__level'
+    ))
+    return DistractorIndex(entries)
+
+
+def get_index():
+    """Return the distractor index, from process memory while its version is current"""
+    global _loaded
+    version = INDEX_VERSION.get()
+    if _loaded[0] == version:
+        return _loaded[1]
+    key = f'{INDEX_CACHE_KEY}:{version}'
+    index = cache.get(key)
+    if index is None:
+        index = build_index()
+        cache.set(key, index, INDEX_CACHE_TIMEOUT)
+    _loaded = (version, index)
+    return index
+
+
+def invalidate_index():
+    """Make every process rebuild its index once the current transaction commits"""
+    INDEX_VERSION.bump_on_commit()
+
+
+def get_drill_exercise(kind):
+    """
+    Return the shared generated Exercise that drill responses are recorded against
+
+    A unique constraint allows one generated exercise per type, so concurrent
+    first requests end up with the same row.
+    """
+    exercise, created = Exercise.objects.get_or_create(
+        exercise_type=kind,
+        is_generated=True,
+        defaults={
+            'title': DRILL_KINDS[kind],
+            'description': 'Generated from lesson vocabulary',
+            'xp_reward': 5,
+        }
+    )
+    return exercise
+
+
+def drill_vocabulary(lesson, scope='lesson'):
+    """Vocabulary ids the drill draws from: the lesson's or the whole course's"""
+    if scope == 'course':
+        words = Vocabulary.objects.filter(lesson__course_id=lesson.course_id)
+    else:
+        words = Vocabulary.objects.filter(lesson=lesson)
+    return list(words.values_list('id', flat=True))
+
+
+def build_drill(kind, vocabulary_ids, direction='english', size=None, rng=_random, index=None):
+    """
+    Build drill items without touching the database
+
+    Args:
+        kind (str): 'mcq' or 'matching'
+        vocabulary_ids (list): Pool of vocabulary ids to draw prompts from
+        direction (str): 'english' shows English words and asks for Dari,
+                         'dari' the other way round
+        index (DistractorIndex): Index to use (default get_index())
+
+    Returns:
+        list: Items as dicts with the prompt entry id and ordered option ids
+    """
+    index = index or get_index()
+    pool = [vocabulary_id for vocabulary_id in vocabulary_ids if vocabulary_id in index.words]
+    size = size or (MATCHING_DRILL_SIZE if kind == 'matching' else DEFAULT_DRILL_SIZE)
+    prompts = rng.sample(pool, min(size, len(pool)))
+    answer_field = 2 if direction == 'english' else 1
+
+    items = []
+    if kind == 'matching':
+        # Every prompt is matched against the same shuffled answer column
+        answers = list(prompts)
+        rng.shuffle(answers)
+        for vocabulary_id in prompts:
+            items.append({'id': vocabulary_id, 'options': answers})
+    else:
+        for vocabulary_id in prompts:
+            options = [vocabulary_id] + index.distractors(vocabulary_id, answer_field, rng=rng)
+            rng.shuffle(options)
+            items.append({'id': vocabulary_id, 'options': options})
+    return items
+
+
+def start_drill(user, lesson, kind, scope='lesson', direction='english'):
+    """
+    Generate a drill and store it as an ExerciseAttempt
+
+    Returns:
+        tuple: (ExerciseAttempt, items ready for display)
+    """
+    exercise = get_drill_exercise(kind)
+    index = get_index()
+    items = build_drill(kind, drill_vocabulary(lesson, scope), direction, index=index)
+    attempt = ExerciseAttempt.objects.create(
+        user=user,
+        exercise=exercise,
+        question_ids=[item['id'] for item in items],
+        option_order={str(item['id']): item['options'] for item in items},
+    )
+    return attempt, display_items(items, direction, index)
+
+
+def display_items(items, direction='english', index=None):
+    """Attach prompt and option texts from the cached index"""
+    words = (index or get_index()).words
+    prompt_field, answer_field = (1, 2) if direction == 'english' else (2, 1)
+    return [
+        {
+            'id': item['id'],
+            'prompt': words[item['id']][prompt_field],
+            'options': [(option_id, words[option_id][answer_field]) for option_id in item['options']],
+        }
+        for item in items
+    ]
+
+
+def grade_drill(attempt, answers):
+    """
+    Grade answers ({prompt vocabulary id: chosen vocabulary id}) for an attempt
+
+    Returns:
+        tuple: (response_data, normalized score 0-100)
+    """
+    score = 0
+    response_data = {}
+    for vocabulary_id in attempt.question_ids:
+        key = str(vocabulary_id)
+        selected = answers.get(key)
+        allowed = attempt.option_order.get(key, [])
+        try:
+            selected = int(selected)
+        except (TypeError, ValueError):
+            selected = None
+        is_correct = selected == vocabulary_id and selected in allowed
+        score += is_correct
+        response_data[key] = {
+            'selected_option': selected,
+            'correct': is_correct,
+        }
+    response_data['attempt'] = {'id': attempt.id, 'question_ids': attempt.question_ids, 'vocabulary': True}
+    total = len(attempt.question_ids)
+    return response_data, int(score / total * 100) if total else 0
@@ -1,11 +1,11 @@
 from django.contrib import admin
-from .models import Badge, UserBadge, Achievement, Leaderboard, DailyChallenge, UserDailyChallenge, Tier
+from .models import Badge, UserBadge, Achievement, Leaderboard, DailyChallenge, UserDailyChallenge, Tier, XPRule, CourseXP
 
 
 @admin.register(Badge)
 class BadgeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'badge_type', 'requirement', 'xp_reward', 'is_active')
-    list_filter = ('badge_type', 'is_active')
+    list_display = ('name', 'badge_type', 'rule_type', 'requirement_value', 'xp_reward', 'is_active')
+    list_filter = ('badge_type', 'rule_type', 'is_active')
     search_fields = ('name', 'description')
 
 
@@ -30,6 +30,13 @@ class LeaderboardAdmin(admin.ModelAdmin):
     search_fields = ('user__username',)
 
 
+@admin.register(CourseXP)
+class CourseXPAdmin(admin.ModelAdmin):
+    list_display = ('user', 'course', 'xp', 'updated_at')
+    list_filter = ('course',)
+    search_fields = ('user__username', 'course__title')
+
+
 @admin.register(DailyChallenge)
 class DailyChallengeAdmin(admin.ModelAdmin):
     list_display = ('challenge_type', 'xp_reward', 'is_active')
@@ -48,3 +55,8 @@ class TierAdmin(admin.ModelAdmin):
     list_display = ('name', 'min_xp', 'description')
     list_filter = ('min_xp',)
     search_fields = ('name',)
+
+
+@admin.register(XPRule)
+class XPRuleAdmin(admin.ModelAdmin):
+    list_display = ('action', 'xp', 'updated_at')
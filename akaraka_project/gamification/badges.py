@@ -0,0 +1,316 @@
+"""
+Badge rule engine
+Badges with a rule_type are compiled into an in-memory index keyed by the
+learning events that can change their counter, e.g. 'lesson_completed' only
+looks at "lessons completed" rules. When an event happens only those rules
+are checked, against counters kept in the cache, and only if the user has not
+already earned every badge they could unlock.
+
+A backfill evaluates every user in batches with one aggregate query per
+counter kind and array comparisons instead of per-user queries.
+"""
+import bisect
+import logging
+from collections import defaultdict
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from community.models import Post
+from courses.models import LessonProgress, CourseEnrollment
+from users.models import CustomUser
+from .models import UserBadge
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+# NumPy speeds up the backfill comparisons but is optional
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Which rule kinds each event can affect
+EVENT_RULES = {
+    'xp_earned': ('xp',),
+    'streak_updated': ('streak',),
+    'lesson_completed': ('lessons',),
+    'course_completed': ('courses',),
+    'post_created': ('posts',),
+}
+# Events that add one to a counted (not stored on the user) kind
+EVENT_COUNTERS = {
+    'lesson_completed': 'lessons',
+    'course_completed': 'courses',
+    'post_created': 'posts',
+}
+
+COUNTER_CACHE_TIMEOUT = 60 * 60
+EARNED_CACHE_TIMEOUT = 60 * 60
+
+
+def _count_lessons(user_ids):
+    return LessonProgress.objects.filter(
+        user_id__in=user_ids, is_completed=True
+    ).values_list('user_id').annotate(total=Count('id'))
+
+
+def _count_courses(user_ids):
+    return CourseEnrollment.objects.filter(
+        user_id__in=user_ids, is_completed=True
+    ).values_list('user_id').annotate(total=Count('id'))
+
+
+def _count_posts(user_ids):
+    return Post.objects.filter(
+        author_id__in=user_ids
+    ).values_list('author_id').annotate(total=Count('id'))
+
+
+# Counter kinds that need a query, as user_ids -> [(user_id, count)]
+COUNTED_KINDS = {
+    'lessons': _count_lessons,
+    'courses': _count_courses,
+    'posts': _count_posts,
+}
+# Counter kinds read straight from the user row
+USER_FIELDS = {
+    'xp': 'total_xp',
+    'streak': 'current_streak',
+}
+
+
+class RuleIndex:
+    """Active rule badges grouped by kind, sorted by threshold"""
+
+    def __init__(self, badges):
+        # badges: (badge id, rule type, requirement value, xp reward)
+        self.rules = defaultdict(list)
+        self.xp_rewards = {}
+        for badge_id, rule_type, threshold, xp_reward in badges:
+            self.rules[rule_type].append((threshold, badge_id))
+            self.xp_rewards[badge_id] = xp_reward
+        for rules in self.rules.values():
+            rules.sort()
+        self.thresholds = {kind: [threshold for threshold, _ in rules] for kind, rules in self.rules.items()}
+        self.badge_ids = {kind: {badge_id for _, badge_id in rules} for kind, rules in self.rules.items()}
+
+    def kinds_for(self, events):
+        return {kind for event in events for kind in EVENT_RULES.get(event, ()) if kind in self.rules}
+
+    def reached(self, kind, value):
+        """Badge ids of a kind whose threshold is at most value"""
+        position = bisect.bisect_right(self.thresholds[kind], value)
+        return [badge_id for _, badge_id in self.rules[kind][:position]]
+
+
+def get_rule_index():
+    """Return the rule index of the current config snapshot, compiling it on first use"""
+    config = get_config()
+    if config.rule_index is None:
+        config.rule_index = RuleIndex(
+            (badge.id, badge.rule_type, badge.requirement_value, badge.xp_reward)
+            for badge in config.badges if badge.rule_type
+        )
+    return config.rule_index
+
+
+def _counter_key(user_id, kind):
+    return f'badge_counter:{kind}:{user_id}'
+
+
+def _earned_key(user_id):
+    return f'earned_badges:{user_id}'
+
+
+def get_counter(user, kind):
+    """Current value of one counter kind for a user"""
+    if kind in USER_FIELDS:
+        return getattr(user, USER_FIELDS[kind])
+    key = _counter_key(user.id, kind)
+    value = cache.get(key)
+    if value is None:
+        value = dict(COUNTED_KINDS[kind]([user.id])).get(user.id, 0)
+        cache.set(key, value, COUNTER_CACHE_TIMEOUT)
+    return value
+
+
+def bump_counter(user_id, kind):
+    """Count one more item of a kind, if the counter is cached"""
+    try:
+        cache.incr(_counter_key(user_id, kind))
+    except ValueError:
+        # Not cached yet, it will be counted on next read
+        pass
+
+
+def invalidate_counter(user_id, kind):
+    cache.delete(_counter_key(user_id, kind))
+
+
+def get_earned_badge_ids(user_id):
+    """Return the cached set of badge ids a user has earned"""
+    key = _earned_key(user_id)
+    earned = cache.get(key)
+    if earned is None:
+        earned = set(UserBadge.objects.filter(user_id=user_id).values_list('badge_id', flat=True))
+        cache.set(key, earned, EARNED_CACHE_TIMEOUT)
+    return earned
+
+
+def invalidate_earned(user_id):
+    cache.delete(_earned_key(user_id))
+
+
+def process_event(user, *events):
+    """
+    Update counters for learning events and award any badges they unlock
+
+    Args:
+        user (CustomUser): User the events happened to
+        events (str): Keys of EVENT_RULES, e.g. 'lesson_completed'
+
+    Returns:
+        list: Ids of newly awarded badges
+    """
+    for event in events:
+        if event in EVENT_COUNTERS:
+            bump_counter(user.id, EVENT_COUNTERS[event])
+
+    index = get_rule_index()
+    kinds = index.kinds_for(events)
+    awarded = []
+    while kinds:
+        earned = get_earned_badge_ids(user.id)
+        unlocked = []
+        for kind in kinds:
+            # Skip the counter entirely once every badge of this kind is earned
+            if index.badge_ids[kind] <= earned:
+                continue
+            unlocked.extend(
+                badge_id for badge_id in index.reached(kind, get_counter(user, kind))
+                if badge_id not in earned
+            )
+        if not unlocked:
+            break
+        xp_reward = _award(user.id, unlocked, index)
+        awarded.extend(unlocked)
+        # Badge XP can in turn unlock XP threshold badges
+        if not xp_reward:
+            break
+        user.total_xp += xp_reward
+        kinds = index.kinds_for(['xp_earned'])
+    return awarded
+
+
+def _award(user_id, badge_ids, index):
+    """Create UserBadge rows and grant badge XP; returns the XP granted"""
+    with transaction.atomic():
+        # Badges are only inserted under the user's row lock, which serializes
+        # this with backfill_badges(); get_or_create reports which rows this call
+        # inserted, so a concurrent request that loses the race gets created=False
+        _lock_users([user_id])
+        created = [
+            badge_id for badge_id in badge_ids
+            if UserBadge.objects.get_or_create(user_id=user_id, badge_id=badge_id)[1]
+        ]
+        xp_reward = sum(index.xp_rewards[badge_id] for badge_id in created)
+        if xp_reward:
+            CustomUser.objects.filter(id=user_id).update(total_xp=F('total_xp') + xp_reward)
+
+    earned = get_earned_badge_ids(user_id) | set(badge_ids)
+    cache.set(_earned_key(user_id), earned, EARNED_CACHE_TIMEOUT)
+    logger.info(f"Awarded badges {badge_ids} to user {user_id}")
+    return xp_reward
+
+
+def _lock_users(user_ids):
+    """Lock users' rows (in id order) until the transaction ends"""
+    list(CustomUser.objects.select_for_update().filter(id__in=user_ids).order_by('id').values_list('id', flat=True))
+
+
+def _reached_users(user_ids, values, threshold):
+    """User ids whose counter value is at least threshold"""
+    if NUMPY_AVAILABLE:
+        return user_ids[values >= threshold].tolist()
+    return [user_id for user_id, value in zip(user_ids, values) if value >= threshold]
+
+
+def backfill_badges(batch_size=5000):
+    """
+    Evaluate every rule for every active user
+
+    Counters are read before any badge XP is granted, so XP threshold badges
+    unlocked by another badge's reward are picked up by the next run.
+
+    Returns:
+        dict: Counts of users scanned, badges awarded and XP granted
+    """
+    index = get_rule_index()
+    kinds = list(index.rules)
+    totals = {'users': 0, 'awarded': 0, 'xp': 0}
+    if not kinds:
+        return totals
+
+    users = CustomUser.objects.filter(is_active=True).order_by('id')
+    fields = ['id'] + [USER_FIELDS[kind] for kind in kinds if kind in USER_FIELDS]
+    last_id = 0
+    while True:
+        rows = list(users.filter(id__gt=last_id).values_list(*fields)[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        user_ids = [row[0] for row in rows]
+        totals['users'] += len(user_ids)
+
+        columns = {}
+        for position, kind in enumerate(kind for kind in kinds if kind in USER_FIELDS):
+            columns[kind] = [row[position + 1] for row in rows]
+        for kind in kinds:
+            if kind in COUNTED_KINDS:
+                counts = dict(COUNTED_KINDS[kind](user_ids))
+                columns[kind] = [counts.get(user_id, 0) for user_id in user_ids]
+
+        earned = set(UserBadge.objects.filter(user_id__in=user_ids).values_list('user_id', 'badge_id'))
+        ids = np.array(user_ids) if NUMPY_AVAILABLE else user_ids
+        candidates = []
+        for kind in kinds:
+            values = np.array(columns[kind]) if NUMPY_AVAILABLE else columns[kind]
+            for threshold, badge_id in index.rules[kind]:
+                for user_id in _reached_users(ids, values, threshold):
+                    if (user_id, badge_id) not in earned:
+                        candidates.append((user_id, badge_id))
+        if not candidates:
+            continue
+
+        with transaction.atomic():
+            # Under the same row locks _award() takes, re-read the candidates'
+            # badges: what is inserted here is then exactly what this run adds,
+            # so XP is only granted for those rows
+            candidate_users = {user_id for user_id, _ in candidates}
+            _lock_users(candidate_users)
+            earned = set(UserBadge.objects.filter(user_id__in=candidate_users).values_list('user_id', 'badge_id'))
+            new_badges = [
+                UserBadge(user_id=user_id, badge_id=badge_id)
+                for user_id, badge_id in dict.fromkeys(candidates) if (user_id, badge_id) not in earned
+            ]
+            UserBadge.objects.bulk_create(new_badges)
+            xp_by_user = defaultdict(int)
+            for badge in new_badges:
+                xp_by_user[badge.user_id] += index.xp_rewards[badge.badge_id]
+            # One UPDATE per distinct XP amount
+            by_amount = defaultdict(list)
+            for user_id, xp in xp_by_user.items():
+                if xp:
+                    by_amount[xp].append(user_id)
+            for xp, amount_user_ids in by_amount.items():
+                CustomUser.objects.filter(id__in=amount_user_ids).update(total_xp=F('total_xp') + xp)
+        for user_id in xp_by_user:
+            invalidate_earned(user_id)
+
+        totals['awarded'] += len(new_badges)
+        totals['xp'] += sum(xp_by_user.values())
+
+    logger.info(f"Badge backfill: {totals}")
+    return totals
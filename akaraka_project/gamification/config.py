@@ -0,0 +1,88 @@
+"""
+Gamification configuration registry
+Tiers, active badges, active daily challenges and XP rules are small tables
+read on hot paths, so each process keeps them in a local snapshot. A version
+number in the database (ConfigVersion) is bumped after any change to them
+commits; processes read it (at most every VERSION_CHECK_INTERVAL seconds)
+and reload their snapshot when it is stale. Tier lookups and XP amounts
+therefore cost at most one tiny query every few seconds per process.
+"""
+import bisect
+import threading
+import time
+from django.conf import settings
+from django.db.models import F
+
+from .models import Tier, Badge, DailyChallenge, XPRule, ConfigVersion
+
+VERSION_ROW = 1
+VERSION_CHECK_INTERVAL = 5
+
+_lock = threading.Lock()
+_snapshot = None
+_checked_at = 0
+
+
+class ConfigSnapshot:
+    """Immutable view of the gamification tables at one version"""
+
+    def __init__(self, version):
+        self.version = version
+        self.tiers = list(Tier.objects.order_by('min_xp'))
+        self.tier_thresholds = [tier.min_xp for tier in self.tiers]
+        self.badges = list(Badge.objects.filter(is_active=True).order_by('-created_at'))
+        self.challenges = list(DailyChallenge.objects.filter(is_active=True).order_by('id'))
+        self.xp_rules = dict(getattr(settings, 'XP_SETTINGS', {}))
+        self.xp_rules.update(XPRule.objects.values_list('action', 'xp'))
+        # Derived structures other modules build once per snapshot
+        self.rule_index = None
+
+    def tier_for(self, xp):
+        """Highest tier whose min_xp is at most xp, or None"""
+        position = bisect.bisect_right(self.tier_thresholds, xp)
+        return self.tiers[position - 1] if position else None
+
+    def next_tier_for(self, xp):
+        """Lowest tier whose min_xp is above xp, or None"""
+        position = bisect.bisect_right(self.tier_thresholds, xp)
+        return self.tiers[position] if position < len(self.tiers) else None
+
+    def xp_for(self, action):
+        return self.xp_rules.get(action, 0)
+
+
+def _current_version():
+    version = ConfigVersion.objects.filter(id=VERSION_ROW).values_list('version', flat=True).first()
+    return version or 1
+
+
+def get_config():
+    """Return this process's snapshot, reloading it if another process changed the config"""
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    if _snapshot is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return _snapshot
+    version = _current_version()
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = ConfigSnapshot(version)
+        _checked_at = now
+    return _snapshot
+
+
+def bump_version():
+    """
+    Mark every process's snapshot stale; this process reloads immediately
+
+    Call it once the change has committed (transaction.on_commit), so no
+    process can load the old rows under the new version.
+    """
+    global _checked_at
+    if not ConfigVersion.objects.filter(id=VERSION_ROW).update(version=F('version') + 1):
+        ConfigVersion.objects.get_or_create(id=VERSION_ROW, defaults={'version': 2})
+    _checked_at = 0
+
+
+def xp_for(action):
+    """XP awarded for an action, e.g. 'post_create'"""
+    return get_config().xp_for(action)
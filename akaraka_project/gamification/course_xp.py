@@ -0,0 +1,125 @@
+"""
+Per-course XP attribution
+Lesson and exercise XP is also credited to the course it was earned in, in
+one CourseXP row per (user, course). Rows are updated with F() increments
+and the (course, -xp) index serves both course leaderboards and rank
+lookups.
+"""
+import logging
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import F, Q, Sum, Value
+from django.db.models.functions import Greatest
+
+from courses.models import LessonProgress
+from exercises.models import UserExerciseResponse
+from .models import CourseXP
+
+logger = logging.getLogger(__name__)
+
+NEIGHBOURHOOD_SIZE = 5
+
+
+def add_course_xp(user_id, course_id, amount):
+    """Credit (or, with a negative amount, debit) XP to a user's course counter"""
+    if not amount:
+        return
+    counters = CourseXP.objects.filter(user_id=user_id, course_id=course_id)
+    if counters.update(xp=Greatest(F('xp') + amount, Value(0))):
+        return
+    CourseXP.objects.bulk_create(
+        [CourseXP(user_id=user_id, course_id=course_id, xp=0)],
+        ignore_conflicts=True,
+    )
+    counters.update(xp=Greatest(F('xp') + amount, Value(0)))
+
+
+def apply_course_xp_deltas(deltas):
+    """Apply {(user_id, course_id): xp_delta}, e.g. after re-scoring"""
+    for (user_id, course_id), delta in deltas.items():
+        add_course_xp(user_id, course_id, delta)
+
+
+def _ahead(course_id, user_id, xp):
+    """Active counters ranked before (user_id, xp) in the ('-xp', 'user_id') order"""
+    return CourseXP.objects.filter(course_id=course_id, user__is_active=True).filter(
+        Q(xp__gt=xp) | Q(xp=xp, user_id__lt=user_id)
+    )
+
+
+def _behind(course_id, user_id, xp):
+    """Active counters ranked after (user_id, xp) in the ('-xp', 'user_id') order"""
+    return CourseXP.objects.filter(course_id=course_id, user__is_active=True).filter(
+        Q(xp__lt=xp, xp__gt=0) | Q(xp=xp, user_id__gt=user_id)
+    )
+
+
+def get_course_rank(user_id, course_id):
+    """
+    Return (rank, xp) of a user in a course, or (None, 0) without XP there
+
+    The rank is the position in the leaderboard's ('-xp', 'user_id') order,
+    so it matches the numbers shown on the leaderboard pages.
+    """
+    xp = CourseXP.objects.filter(user_id=user_id, course_id=course_id).values_list('xp', flat=True).first()
+    if not xp:
+        return None, 0
+    return _ahead(course_id, user_id, xp).count() + 1, xp
+
+
+def get_neighbourhood(user_id, course_id, size=NEIGHBOURHOOD_SIZE):
+    """
+    Counters just above and below a user in a course leaderboard
+
+    Returns:
+        list: CourseXP rows ordered by rank, including the user's own, each
+        with its leaderboard rank set
+    """
+    rank, xp = get_course_rank(user_id, course_id)
+    if rank is None:
+        return []
+    above = list(_ahead(course_id, user_id, xp).select_related('user').order_by('xp', '-user_id')[:size])
+    below = list(_behind(course_id, user_id, xp).select_related('user').order_by('-xp', 'user_id')[:size])
+    own = CourseXP.objects.select_related('user').get(user_id=user_id, course_id=course_id)
+    neighbourhood = above[::-1] + [own] + below
+    for position, entry in enumerate(neighbourhood, start=rank - len(above)):
+        entry.rank = position
+    return neighbourhood
+
+
+def rebuild_course_xp(batch_size=2000):
+    """
+    Recompute every counter from lesson progress and exercise responses
+
+    Returns:
+        dict: Number of counters written and total XP attributed
+    """
+    totals = defaultdict(int)
+    lesson_rows = LessonProgress.objects.filter(is_completed=True, xp_earned__gt=0).values_list(
+        'user_id', 'lesson__course_id'
+    ).annotate(xp=Sum('xp_earned')).order_by()
+    response_rows = UserExerciseResponse.objects.filter(xp_earned__gt=0).values_list(
+        'user_id', 'lesson__course_id'
+    ).annotate(xp=Sum('xp_earned')).order_by()
+    for rows in (lesson_rows, response_rows):
+        for user_id, course_id, xp in rows.iterator():
+            totals[(user_id, course_id)] += xp
+
+    counters = [
+        CourseXP(user_id=user_id, course_id=course_id, xp=xp)
+        for (user_id, course_id), xp in totals.items()
+    ]
+    with transaction.atomic():
+        # Counters no longer backed by any activity end up at zero
+        CourseXP.objects.exclude(xp=0).update(xp=0)
+        CourseXP.objects.bulk_create(
+            counters,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['user', 'course'],
+            update_fields=['xp', 'updated_at'],
+        )
+
+    result = {'counters': len(counters), 'xp': sum(totals.values())}
+    logger.info(f"Rebuilt course XP: {result}")
+    return result
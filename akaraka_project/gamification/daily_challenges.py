@@ -0,0 +1,116 @@
+"""
+Daily challenge progress
+A user's UserDailyChallenge rows for a day are created together in one
+bulk_create the first time the user does anything that day, and are then
+advanced by learning events with atomic increments. Completion is claimed
+with a conditional UPDATE, so challenge XP is awarded exactly once.
+"""
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import UserDailyChallenge
+from .config import get_config
+
+# Which challenge types each learning event advances
+EVENT_CHALLENGES = {
+    'lesson_completed': ('complete_lesson',),
+    'exercise_completed': ('complete_exercise',),
+    'streak_updated': ('daily_streak',),
+    'post_created': ('community_post',),
+}
+# How many events a challenge type needs; the rest need one
+CHALLENGE_TARGETS = {
+    'complete_exercise': 3,
+}
+
+DAY_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_active_challenges():
+    """Return (id, challenge type) of active challenges from the config snapshot"""
+    return [(challenge.id, challenge.challenge_type) for challenge in get_config().challenges]
+
+
+def _day_key(user_id, day, challenges):
+    # Activating a challenge mid-day changes the key, so its rows get created too
+    challenge_ids = '-'.join(str(challenge_id) for challenge_id, _ in challenges)
+    return f'daily_challenges:{user_id}:{day.isoformat()}:{challenge_ids}'
+
+
+def ensure_day(user_id, day=None):
+    """
+    Create the user's challenge rows for the day if this is their first touch
+
+    Returns:
+        date: The day the rows belong to
+    """
+    day = day or timezone.localdate()
+    challenges = get_active_challenges()
+    key = _day_key(user_id, day, challenges)
+    if cache.get(key):
+        return day
+    UserDailyChallenge.objects.bulk_create(
+        [
+            UserDailyChallenge(
+                user_id=user_id,
+                challenge_id=challenge_id,
+                date=day,
+                target=CHALLENGE_TARGETS.get(challenge_type, 1),
+            )
+            for challenge_id, challenge_type in challenges
+        ],
+        ignore_conflicts=True,
+    )
+    cache.set(key, True, DAY_CACHE_TIMEOUT)
+    return day
+
+
+def get_user_challenges(user_id, day=None):
+    """The user's challenges for the day, in a single (user, date) read"""
+    day = ensure_day(user_id, day)
+    return list(UserDailyChallenge.objects.filter(
+        user_id=user_id, date=day, challenge__is_active=True
+    ).select_related('challenge').order_by('challenge_id'))
+
+
+def advance_challenges(user, *events):
+    """
+    Advance today's challenges for learning events
+
+    Returns:
+        int: XP awarded for challenges completed by these events
+    """
+    challenge_types = {
+        challenge_type
+        for event in events
+        for challenge_type in EVENT_CHALLENGES.get(event, ())
+    }
+    if not challenge_types:
+        return 0
+
+    day = ensure_day(user.id)
+    open_challenges = UserDailyChallenge.objects.filter(
+        user_id=user.id,
+        date=day,
+        is_completed=False,
+        challenge__challenge_type__in=challenge_types,
+    )
+    if not open_challenges.update(progress=F('progress') + 1):
+        return 0
+
+    xp_awarded = 0
+    finished = open_challenges.filter(progress__gte=F('target')).values_list('id', 'challenge__xp_reward')
+    for user_challenge_id, xp_reward in finished:
+        # Only the request that flips is_completed awards the XP
+        claimed = UserDailyChallenge.objects.filter(id=user_challenge_id, is_completed=False).update(
+            is_completed=True,
+            completed_at=timezone.now(),
+            xp_earned=xp_reward,
+        )
+        if claimed:
+            xp_awarded += xp_reward
+
+    if xp_awarded:
+        user.add_xp(xp_awarded)
+    return xp_awarded
@@ -0,0 +1,23 @@
+"""
+Learning events
+Views and models report what a user did through record_event(); this
+advances daily challenges and evaluates the badge rules the events affect.
+
+Event names: 'xp_earned', 'lesson_completed', 'exercise_completed',
+'course_completed', 'post_created', 'streak_updated'.
+"""
+from .badges import process_event
+from .daily_challenges import advance_challenges
+
+
+def record_event(user, *events):
+    """
+    Record learning events for a user
+
+    Returns:
+        list: Ids of badges awarded by these events
+    """
+    if advance_challenges(user, *events) and 'xp_earned' not in events:
+        # Challenge XP counts towards XP threshold badges
+        events += ('xp_earned',)
+    return process_event(user, *events)
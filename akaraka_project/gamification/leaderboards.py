@@ -0,0 +1,150 @@
+"""
+Materialized daily/weekly/monthly leaderboards
+Each period window is aggregated from activity data (exercise responses and
+completed lessons) in a single INSERT ... SELECT statement: per-user XP and
+counts are summed, dense ranks are computed with a window function, and the
+result is upserted on (user, period, start_date). Rows whose values did not
+change are left untouched, so re-running during the period is cheap.
+"""
+import calendar
+import logging
+from datetime import datetime, time, timedelta
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from courses.models import LessonProgress
+from exercises.models import UserExerciseResponse
+from users.models import CustomUser
+from .models import Leaderboard
+
+logger = logging.getLogger(__name__)
+
+MATERIALIZED_PERIODS = ('daily', 'weekly', 'monthly')
+
+
+def period_window(period, day):
+    """
+    Return the (start_date, end_date) window of a period containing day
+
+    end_date is the last day of the window (inclusive).
+    """
+    if period == 'daily':
+        return day, day
+    if period == 'weekly':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if period == 'monthly':
+        last_day = calendar.monthrange(day.year, day.month)[1]
+        return day.replace(day=1), day.replace(day=last_day)
+    raise ValueError(f'Unsupported leaderboard period: {period}')
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+UPSERT_SQL = """
+INSERT INTO {leaderboard} (user_id, period, rank, xp, lessons_completed, exercises_completed, start_date, end_date)
+SELECT activity.user_id, %s,
+       DENSE_RANK() OVER (ORDER BY SUM(activity.xp) DESC),
+       SUM(activity.xp), SUM(activity.lessons), SUM(activity.exercises), %s, %s
+FROM (
+    SELECT user_id, xp_earned AS xp, 0 AS lessons, 1 AS exercises
+    FROM {responses}
+    WHERE completed_at >= %s AND completed_at < %s
+    UNION ALL
+    SELECT user_id, xp_earned AS xp, 1 AS lessons, 0 AS exercises
+    FROM {lessons}
+    WHERE is_completed AND completion_time >= %s AND completion_time < %s
+) activity
+INNER JOIN {users} u ON u.id = activity.user_id
+WHERE u.is_active
+GROUP BY activity.user_id
+ON CONFLICT (user_id, period, start_date) DO UPDATE SET
+    rank = excluded.rank,
+    xp = excluded.xp,
+    lessons_completed = excluded.lessons_completed,
+    exercises_completed = excluded.exercises_completed,
+    end_date = excluded.end_date
+WHERE {leaderboard}.rank <> excluded.rank
+   OR {leaderboard}.xp <> excluded.xp
+   OR {leaderboard}.lessons_completed <> excluded.lessons_completed
+   OR {leaderboard}.exercises_completed <> excluded.exercises_completed
+"""
+
+
+def materialize_leaderboard(period, day):
+    """
+    Recompute one leaderboard window from activity data
+
+    Args:
+        period (str): 'daily', 'weekly' or 'monthly'
+        day (date): Any day inside the window
+
+    Returns:
+        dict: The window and the number of rows written and removed
+    """
+    start_date, end_date = period_window(period, day)
+    start = connection.ops.adapt_datetimefield_value(_day_start(start_date))
+    end = connection.ops.adapt_datetimefield_value(_day_start(end_date + timedelta(days=1)))
+
+    sql = UPSERT_SQL.format(
+        leaderboard=Leaderboard._meta.db_table,
+        responses=UserExerciseResponse._meta.db_table,
+        lessons=LessonProgress._meta.db_table,
+        users=CustomUser._meta.db_table,
+    )
+    params = [
+        period,
+        connection.ops.adapt_datefield_value(start_date),
+        connection.ops.adapt_datefield_value(end_date),
+        start, end, start, end,
+    ]
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            written = cursor.rowcount
+        removed = _remove_stale(period, start_date, end_date)
+
+    result = {'period': period, 'start_date': start_date, 'end_date': end_date, 'written': written, 'removed': removed}
+    logger.info(f"Materialized leaderboard: {result}")
+    return result
+
+
+def _remove_stale(period, start_date, end_date):
+    """Delete rows of users who no longer have activity in the window (or were deactivated)"""
+    start = _day_start(start_date)
+    end = _day_start(end_date + timedelta(days=1))
+    responses = UserExerciseResponse.objects.filter(
+        completed_at__gte=start, completed_at__lt=end
+    ).values('user_id')
+    lessons = LessonProgress.objects.filter(
+        is_completed=True, completion_time__gte=start, completion_time__lt=end
+    ).values('user_id')
+    removed, _ = Leaderboard.objects.filter(period=period, start_date=start_date).exclude(
+        Q(user__is_active=True) & (Q(user_id__in=responses) | Q(user_id__in=lessons))
+    ).delete()
+    return removed
+
+
+def refresh_leaderboards(today=None, periods=MATERIALIZED_PERIODS):
+    """
+    Incrementally refresh the current window of each period
+
+    On the first day of a new window the previous window is recomputed once
+    more, so late activity from just before the rollover is included in its
+    final standings.
+
+    Returns:
+        list: materialize_leaderboard() results
+    """
+    today = today or timezone.localdate()
+    results = []
+    for period in periods:
+        start_date, _ = period_window(period, today)
+        if start_date == today:
+            results.append(materialize_leaderboard(period, today - timedelta(days=1)))
+        results.append(materialize_leaderboard(period, today))
+    return results
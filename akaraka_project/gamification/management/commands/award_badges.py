@@ -0,0 +1,36 @@
+"""
+Django management command to award rule badges to every user who qualifies
+Usage: python manage.py award_badges [--batch-size=5000]
+
+Run it after adding a badge rule or changing a threshold; day-to-day awards
+happen as learning events occur.
+"""
+from django.core.management.base import BaseCommand
+from gamification.badges import backfill_badges, NUMPY_AVAILABLE
+
+
+class Command(BaseCommand):
+    help = 'Evaluate all badge rules for all active users'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of users evaluated per batch'
+        )
+
+    def handle(self, *args, **options):
+        if not NUMPY_AVAILABLE:
+            self.stdout.write(self.style.WARNING('NumPy not installed, using slower pure Python comparisons'))
+
+        result = backfill_badges(batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✓ Badge backfill complete!\n'
+                f'  Users evaluated: {result["users"]}\n'
+                f'  Badges awarded: {result["awarded"]}\n'
+                f'  XP granted: {result["xp"]}'
+            )
+        )
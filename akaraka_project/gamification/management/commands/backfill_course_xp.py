@@ -0,0 +1,29 @@
+"""
+Django management command to rebuild per-course XP counters
+Usage: python manage.py backfill_course_xp [--batch-size=2000]
+"""
+from django.core.management.base import BaseCommand
+from gamification.course_xp import rebuild_course_xp
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-course XP from lesson progress and exercise responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of counters written per INSERT'
+        )
+
+    def handle(self, *args, **options):
+        result = rebuild_course_xp(batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✓ Course XP rebuilt!\n'
+                f'  Counters written: {result["counters"]}\n'
+                f'  XP attributed: {result["xp"]}'
+            )
+        )
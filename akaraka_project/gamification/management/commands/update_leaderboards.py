@@ -0,0 +1,48 @@
+"""
+Django management command to materialize period leaderboards
+Usage: python manage.py update_leaderboards [--period=weekly] [--date=2025-01-31]
+
+Run it periodically (e.g. every 10 minutes from cron). Without --date it
+refreshes the current windows and finalizes the previous ones at rollover;
+with --date it recomputes the windows containing that day.
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from gamification.leaderboards import MATERIALIZED_PERIODS, materialize_leaderboard, refresh_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Aggregate activity into the daily/weekly/monthly leaderboards'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            action='append',
+            choices=MATERIALIZED_PERIODS,
+            help='Only update this period (can be repeated)'
+        )
+        parser.add_argument(
+            '--date',
+            type=str,
+            help='Recompute the windows containing this day (YYYY-MM-DD)'
+        )
+
+    def handle(self, *args, **options):
+        periods = options.get('period') or MATERIALIZED_PERIODS
+
+        if options.get('date'):
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f'Invalid date: {options["date"]}')
+            results = [materialize_leaderboard(period, day) for period in periods]
+        else:
+            results = refresh_leaderboards(periods=periods)
+
+        for result in results:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'✓ {result["period"]} {result["start_date"]} – {result["end_date"]}: '
+                    f'{result["written"]} rows written, {result["removed"]} removed'
+                )
+            )
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0003_alter_badge_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['period', 'start_date', 'rank'], name='gamificatio_period_694fd7_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0004_leaderboard_rank_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='badge',
+            name='rule_type',
+            field=models.CharField(blank=True, choices=[('', 'Awarded manually'), ('xp', 'XP threshold'), ('streak', 'Streak length'), ('lessons', 'Lessons completed'), ('courses', 'Courses completed'), ('posts', 'Posts made')], default='', help_text="Awarded automatically once the user's count for this rule reaches requirement_value", max_length=20),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:38
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0005_badge_rule_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userdailychallenge',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AddIndex(
+            model_name='userdailychallenge',
+            index=models.Index(fields=['user', 'date'], name='gamificatio_user_id_d69458_idx'),
+        ),
+    ]
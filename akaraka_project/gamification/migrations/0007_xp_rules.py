@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0006_daily_challenge_day_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='XPRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('lesson_complete', 'Complete a lesson'), ('post_create', 'Publish a community post'), ('comment', 'Comment on a post'), ('post_like', 'Like a post'), ('daily_streak_bonus', 'Daily streak bonus')], max_length=50, unique=True)),
+                ('xp', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'gamification_xprule',
+                'ordering': ['action'],
+            },
+        ),
+    ]
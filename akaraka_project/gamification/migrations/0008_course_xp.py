@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_lessonprogress_completion_time_index'),
+        ('gamification', '0007_xp_rules'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseXP',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('xp', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='learner_xp', to='courses.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_xp', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'gamification_coursexp',
+                'indexes': [models.Index(fields=['course', '-xp'], name='gamificatio_course__fe9341_idx')],
+                'unique_together': {('user', 'course')},
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from datetime import datetime
 
 User = get_user_model()
@@ -15,12 +16,28 @@ class Badge(models.Model):
         ('special', 'Special Event'),
     ]
     
+    RULE_TYPES = [
+        ('', 'Awarded manually'),
+        ('xp', 'XP threshold'),
+        ('streak', 'Streak length'),
+        ('lessons', 'Lessons completed'),
+        ('courses', 'Courses completed'),
+        ('posts', 'Posts made'),
+    ]
+    
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField()
     icon = models.ImageField(upload_to='badges/')
     badge_type = models.CharField(max_length=20, choices=BADGE_TYPES, default='achievement')
     requirement = models.CharField(max_length=255, help_text="Requirement for earning badge")
     requirement_value = models.PositiveIntegerField(default=0)
+    rule_type = models.CharField(
+        max_length=20,
+        choices=RULE_TYPES,
+        blank=True,
+        default='',
+        help_text="Awarded automatically once the user's count for this rule reaches requirement_value"
+    )
     xp_reward = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -95,11 +112,32 @@ class Leaderboard(models.Model):
     class Meta:
         db_table = 'gamification_leaderboard'
         unique_together = ('user', 'period', 'start_date')
+        indexes = [
+            models.Index(fields=['period', 'start_date', 'rank']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.period} ({self.rank})"
 
 
+class CourseXP(models.Model):
+    """XP a user has earned within one course"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='course_xp')
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE, related_name='learner_xp')
+    xp = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'gamification_coursexp'
+        unique_together = ('user', 'course')
+        indexes = [
+            models.Index(fields=['course', '-xp']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.course.title} ({self.xp} XP)"
+
+
 class DailyChallenge(models.Model):
     """Daily learning challenges"""
     challenge_type = models.CharField(
@@ -132,12 +170,15 @@ class UserDailyChallenge(models.Model):
     target = models.PositiveIntegerField(default=1)
     is_completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
-    date = models.DateField(auto_now_add=True)
+    date = models.DateField(default=timezone.localdate)
     xp_earned = models.PositiveIntegerField(default=0)
     
     class Meta:
         db_table = 'gamification_userdailychallenge'
         unique_together = ('user', 'challenge', 'date')
+        indexes = [
+            models.Index(fields=['user', 'date']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.challenge.challenge_type} ({self.date})"
@@ -161,4 +202,39 @@ class Tier(models.Model):
     @classmethod
     def get_user_tier(cls, user):
         """Get user's current tier"""
-        return cls.objects.filter(min_xp__lte=user.total_xp).last()
+        from .config import get_config
+        return get_config().tier_for(user.total_xp)
+
+
+class XPRule(models.Model):
+    """XP awarded for an action; overrides the default in settings.XP_SETTINGS"""
+    
+    ACTION_CHOICES = [
+        ('lesson_complete', 'Complete a lesson'),
+        ('post_create', 'Publish a community post'),
+        ('comment', 'Comment on a post'),
+        ('post_like', 'Like a post'),
+        ('daily_streak_bonus', 'Daily streak bonus'),
+    ]
+    
+    action = models.CharField(max_length=50, choices=ACTION_CHOICES, unique=True)
+    xp = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'gamification_xprule'
+        ordering = ['action']
+    
+    def __str__(self):
+        return f"{self.get_action_display()}: {self.xp} XP"
+
+
+class ConfigVersion(models.Model):
+    """Single row counting changes to tiers, badges, daily challenges and XP rules"""
+    version = models.PositiveBigIntegerField(default=1)
+    
+    class Meta:
+        db_table = 'gamification_config_version'
+    
+    def __str__(self):
+        return f"Gamification config v{self.version}"
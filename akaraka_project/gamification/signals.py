@@ -0,0 +1,32 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.db import transaction
+from community.models import Post
+from .models import Badge, UserBadge, DailyChallenge, Tier, XPRule
+from .badges import invalidate_earned, invalidate_counter
+from .config import bump_version
+
+
+@receiver(post_save, sender=Badge)
+@receiver(post_delete, sender=Badge)
+@receiver(post_save, sender=DailyChallenge)
+@receiver(post_delete, sender=DailyChallenge)
+@receiver(post_save, sender=Tier)
+@receiver(post_delete, sender=Tier)
+@receiver(post_save, sender=XPRule)
+@receiver(post_delete, sender=XPRule)
+def refresh_config(sender, instance, **kwargs):
+    """Make every process reload its gamification config snapshot once the change commits"""
+    transaction.on_commit(bump_version)
+
+
+@receiver(post_delete, sender=UserBadge)
+def refresh_earned_badges(sender, instance, **kwargs):
+    """A revoked badge can be earned again"""
+    invalidate_earned(instance.user_id)
+
+
+@receiver(post_delete, sender=Post)
+def refresh_post_counter(sender, instance, **kwargs):
+    """Recount the author's posts on next use"""
+    invalidate_counter(instance.author_id, 'posts')
@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
-    BadgesView, AchievementsView, GlobalLeaderboardView,
-    WeeklyLeaderboardView, DailyChallengeView, UserTierView
+    BadgesView, AchievementsView, GlobalLeaderboardView, GlobalLeaderboardAPIView,
+    WeeklyLeaderboardView, CourseLeaderboardView, DailyChallengeView, UserTierView
 )
 
 app_name = 'gamification'
@@ -10,7 +10,9 @@ urlpatterns = [
     path('badges/', BadgesView.as_view(), name='badges'),
     path('achievements/', AchievementsView.as_view(), name='achievements'),
     path('leaderboard/', GlobalLeaderboardView.as_view(), name='leaderboard'),
+    path('api/leaderboard/', GlobalLeaderboardAPIView.as_view(), name='api_leaderboard'),
     path('leaderboard/weekly/', WeeklyLeaderboardView.as_view(), name='weekly_leaderboard'),
+    path('leaderboard/course/<slug:slug>/', CourseLeaderboardView.as_view(), name='course_leaderboard'),
     path('challenges/', DailyChallengeView.as_view(), name='daily_challenge'),
     path('tier/', UserTierView.as_view(), name='user_tier'),
 ]
@@ -1,11 +1,16 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 from django.views.generic import View, ListView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
-from datetime import timedelta
-from .models import Badge, Achievement, Leaderboard, DailyChallenge, UserDailyChallenge, Tier
+from .models import Badge, Achievement, Leaderboard, DailyChallenge, UserDailyChallenge, Tier, CourseXP
+from .course_xp import get_course_rank, get_neighbourhood
+from .leaderboards import period_window
+from .daily_challenges import get_user_challenges
+from .config import get_config
 from users.models import CustomUser
+from courses.models import Course
+from akaraka.pagination import CursorPaginationMixin, cursor_json_response
 
 
 class BadgesView(LoginRequiredMixin, ListView):
@@ -15,6 +20,9 @@ class BadgesView(LoginRequiredMixin, ListView):
     context_object_name = 'badges'
     paginate_by = 20
     
+    def get_queryset(self):
+        return get_config().badges
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
@@ -34,28 +42,44 @@ class AchievementsView(LoginRequiredMixin, ListView):
         return Achievement.objects.filter(user=self.request.user).order_by('-achieved_at')
 
 
-class GlobalLeaderboardView(ListView):
+class GlobalLeaderboardView(CursorPaginationMixin, ListView):
     """Global XP leaderboard"""
     model = CustomUser
     template_name = 'gamification/leaderboard.html'
     context_object_name = 'users'
     paginate_by = 50
+    cursor_ordering = ('-total_xp', '-id')
     
     def get_queryset(self):
-        return CustomUser.objects.filter(is_active=True).order_by('-total_xp')
+        return CustomUser.objects.filter(is_active=True)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        # Positions come from the cursor, so deep pages need no counting
+        for position, user_obj in enumerate(context['users'], start=context['page_obj'].start_index()):
+            user_obj.position = position
         if self.request.user.is_authenticated:
-            rank = list(CustomUser.objects.filter(
+            context['user_rank'] = CustomUser.objects.filter(
                 is_active=True,
                 total_xp__gt=self.request.user.total_xp
-            ).values_list('id', flat=True)).count() + 1
-            context['user_rank'] = rank
+            ).count() + 1
             context['period'] = 'All Time'
         return context
 
 
+class GlobalLeaderboardAPIView(GlobalLeaderboardView):
+    """Global leaderboard as JSON, paged with the same cursors"""
+    
+    def render_to_response(self, context, **response_kwargs):
+        return cursor_json_response(context['page_obj'], lambda user_obj: {
+            'position': user_obj.position,
+            'username': user_obj.username,
+            'name': user_obj.get_full_name(),
+            'total_xp': user_obj.total_xp,
+            'current_streak': user_obj.current_streak,
+        })
+
+
 class WeeklyLeaderboardView(ListView):
     """Weekly XP leaderboard"""
     model = Leaderboard
@@ -64,31 +88,57 @@ class WeeklyLeaderboardView(ListView):
     paginate_by = 50
     
     def get_queryset(self):
-        today = timezone.now().date()
-        week_start = today - timedelta(days=today.weekday())
+        self.week_start, self.week_end = period_window('weekly', timezone.localdate())
         return Leaderboard.objects.filter(
             period='weekly',
-            start_date=week_start
-        ).select_related('user').order_by('rank')
+            start_date=self.week_start
+        ).select_related('user').order_by('rank', 'user_id')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['week_start'] = self.week_start
+        context['week_end'] = self.week_end
+        context['period'] = 'This Week'
+        if self.request.user.is_authenticated:
+            context['user_entry'] = Leaderboard.objects.filter(
+                user=self.request.user,
+                period='weekly',
+                start_date=self.week_start
+            ).first()
+        return context
+
+
+class CourseLeaderboardView(ListView):
+    """XP leaderboard within one course"""
+    model = CourseXP
+    template_name = 'gamification/course_leaderboard.html'
+    context_object_name = 'entries'
+    paginate_by = 50
+    
+    def get_queryset(self):
+        self.course = get_object_or_404(Course, slug=self.kwargs['slug'], is_published=True)
+        return CourseXP.objects.filter(
+            course=self.course,
+            xp__gt=0,
+            user__is_active=True
+        ).select_related('user').order_by('-xp', 'user_id')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['course'] = self.course
+        context['rank_offset'] = context['page_obj'].start_index() - 1
+        if self.request.user.is_authenticated:
+            rank, xp = get_course_rank(self.request.user.id, self.course.id)
+            context['user_rank'] = rank
+            context['user_course_xp'] = xp
+            context['neighbourhood'] = get_neighbourhood(self.request.user.id, self.course.id)
+        return context
 
 
 class DailyChallengeView(LoginRequiredMixin, View):
     """Daily challenges"""
     def get(self, request):
-        user = request.user
-        today = timezone.now().date()
-        
-        # Get today's challenges
-        challenges = DailyChallenge.objects.filter(is_active=True)
-        user_challenges = []
-        
-        for challenge in challenges:
-            user_challenge, created = UserDailyChallenge.objects.get_or_create(
-                user=user,
-                challenge=challenge,
-                date=today
-            )
-            user_challenges.append(user_challenge)
+        user_challenges = get_user_challenges(request.user.id)
         
         context = {
             'user_challenges': user_challenges,
@@ -101,28 +151,17 @@ class UserTierView(LoginRequiredMixin, View):
     """User tier/level page"""
     def get(self, request):
         user = request.user
-        current_tier = Tier.get_user_tier(user)
-        
-        # Get next tier
-        all_tiers = Tier.objects.all()
-        next_tier = None
-        xp_to_next = 0
-        
-        if current_tier:
-            next_tier = all_tiers.filter(min_xp__gt=current_tier.min_xp).first()
-            if next_tier:
-                xp_to_next = next_tier.min_xp - user.total_xp
-        else:
-            next_tier = all_tiers.first()
-            if next_tier:
-                xp_to_next = next_tier.min_xp - user.total_xp
+        config = get_config()
+        current_tier = config.tier_for(user.total_xp)
+        next_tier = config.next_tier_for(user.total_xp)
+        xp_to_next = next_tier.min_xp - user.total_xp if next_tier else 0
         
         context = {
             'current_tier': current_tier,
             'next_tier': next_tier,
             'xp_to_next': max(xp_to_next, 0),
-            'all_tiers': all_tiers,
-            'earned_badges': user.earned_badges.all(),
+            'all_tiers': config.tiers,
+            'earned_badges': user.earned_badges.select_related('badge'),
             'achievements': user.achievements.all()[:10],
         }
         return render(request, 'gamification/user_tier.html', context)
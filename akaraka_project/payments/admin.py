@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Subscription, UserSubscription, Payment, Invoice
+from .models import Subscription, UserSubscription, Payment, Invoice, ProcessedEvent
 
 
 @admin.register(Subscription)
@@ -20,12 +20,20 @@ class UserSubscriptionAdmin(admin.ModelAdmin):
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ('user', 'subscription', 'amount', 'status', 'payment_method', 'created_at')
     list_filter = ('status', 'payment_method', 'created_at')
-    search_fields = ('user__username', 'transaction_id')
-    readonly_fields = ('created_at', 'updated_at', 'paid_at')
+    search_fields = ('user__username', 'transaction_id', 'stripe_session_id')
+    readonly_fields = ('created_at', 'updated_at', 'paid_at', 'stripe_session_id')
 
 
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
-    list_display = ('invoice_number', 'payment', 'issued_at')
+    list_display = ('invoice_number', 'payment', 'issued_at', 'generated_at')
     search_fields = ('invoice_number',)
-    readonly_fields = ('issued_at',)
+    readonly_fields = ('issued_at', 'generated_at', 'pdf_sha256')
+
+
+@admin.register(ProcessedEvent)
+class ProcessedEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'event_type', 'processed_at')
+    list_filter = ('event_type',)
+    search_fields = ('event_id',)
+    readonly_fields = ('processed_at',)
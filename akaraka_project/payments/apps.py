@@ -4,6 +4,9 @@ from django.apps import AppConfig
 class PaymentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'payments'
+    
+    def ready(self):
+        import payments.checks
 
 
 class CertificatesConfig(AppConfig):
@@ -0,0 +1,151 @@
+"""
+Asynchronous checkout
+A checkout request only records a pending Payment and opens a hosted
+checkout session with the gateway (one idempotent call), then redirects the
+buyer there. The payment is completed when the provider's webhook arrives:
+the event is verified, recorded in ProcessedEvent so redeliveries are
+ignored, and the Payment, the UserSubscription and the user's tier are
+updated in the same transaction; the invoice is rendered after it commits.
+"""
+import logging
+import uuid
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .gateway import get_gateway
+from .invoices import enqueue_invoice
+from .models import Payment, UserSubscription, ProcessedEvent
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+SUBSCRIPTION_DAYS = 30
+
+
+def start_checkout(user, subscription, token, success_url, cancel_url):
+    """
+    Create (or reuse) the pending payment for a checkout attempt and open its session
+
+    Args:
+        token: Per-form checkout token; resubmitting the same form reuses the
+            same Payment and, through the idempotency key, the same session
+
+    Returns:
+        tuple: (Payment, CheckoutSession or None if the payment already completed)
+    """
+    key = f'checkout:{user.id}:{subscription.id}:{(token or uuid.uuid4().hex)[:40]}'
+    try:
+        payment, _ = Payment.objects.get_or_create(
+            idempotency_key=key,
+            defaults={
+                'user': user,
+                'subscription': subscription,
+                'amount': subscription.price_monthly,
+                'currency': 'USD',
+                'payment_method': 'stripe',
+                'status': 'pending',
+                'transaction_id': key,
+            },
+        )
+    except IntegrityError:
+        # Two submissions of the same form raced; the other one created it
+        payment = Payment.objects.get(idempotency_key=key)
+    if payment.status != 'pending':
+        return payment, None
+
+    session = get_gateway().create_checkout_session(
+        payment,
+        customer_email=user.email,
+        success_url=f'{success_url}?payment={payment.id}',
+        cancel_url=cancel_url,
+    )
+    if payment.stripe_session_id != session.id:
+        Payment.objects.filter(id=payment.id).update(stripe_session_id=session.id, transaction_id=session.id)
+        payment.stripe_session_id = payment.transaction_id = session.id
+    return payment, session
+
+
+def handle_webhook(payload, signature_header):
+    """
+    Verify and apply a provider event exactly once
+
+    Returns:
+        bool: False if the event was a redelivery and was ignored
+
+    Raises:
+        InvalidSignature: The payload is not a genuine event
+    """
+    event = get_gateway().construct_event(payload, signature_header)
+    handler = EVENT_HANDLERS.get(event.get('type'))
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                ProcessedEvent.objects.create(event_id=event['id'], event_type=event['type'])
+        except IntegrityError:
+            return False
+        # A failing handler rolls back the ProcessedEvent row too, so the
+        # provider's retry gets processed
+        if handler:
+            handler(event['data']['object'])
+    return True
+
+
+def _locked_payment(session):
+    payment_id = (session.get('metadata') or {}).get('payment_id') or session.get('client_reference_id')
+    payments = Payment.objects.select_for_update().select_related('subscription')
+    if payment_id:
+        return payments.filter(id=payment_id).first()
+    return payments.filter(stripe_session_id=session['id']).first()
+
+
+def complete_checkout(session):
+    """checkout.session.completed: activate the subscription the payment was for"""
+    payment = _locked_payment(session)
+    if payment is None or payment.status == 'completed':
+        return
+    if session.get('payment_status', 'paid') != 'paid':
+        return  # delayed payment methods complete with async_payment_succeeded
+
+    now = timezone.now()
+    payment.status = 'completed'
+    payment.paid_at = now
+    payment.stripe_charge_id = session.get('payment_intent') or ''
+    payment.save(update_fields=['status', 'paid_at', 'stripe_charge_id', 'updated_at'])
+
+    subscription = payment.subscription
+    end_date = now + timedelta(days=SUBSCRIPTION_DAYS)
+    UserSubscription.objects.update_or_create(
+        user_id=payment.user_id,
+        defaults={
+            'subscription': subscription,
+            'status': 'active',
+            'end_date': end_date,
+            'cancelled_at': None,
+            'stripe_customer_id': session.get('customer') or '',
+        },
+    )
+    User.objects.filter(id=payment.user_id).update(
+        subscription_tier=subscription.name,
+        subscription_expires=end_date,
+    )
+    enqueue_invoice(payment.id)
+    logger.info(f"Payment {payment.id} completed; {subscription.name} active for user {payment.user_id}")
+
+
+def fail_checkout(session):
+    """checkout.session.expired / async_payment_failed: the buyer did not pay"""
+    payment = _locked_payment(session)
+    if payment is not None and payment.status == 'pending':
+        payment.status = 'failed'
+        payment.save(update_fields=['status', 'updated_at'])
+
+
+EVENT_HANDLERS = {
+    'checkout.session.completed': complete_checkout,
+    'checkout.session.async_payment_succeeded': complete_checkout,
+    'checkout.session.expired': fail_checkout,
+    'checkout.session.async_payment_failed': fail_checkout,
+}
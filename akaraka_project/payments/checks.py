@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from django.utils.module_loading import import_string
+
+
+@register(Tags.security)
+def check_webhook_secret(app_configs, **kwargs):
+    """The Stripe gateway verifies webhooks with STRIPE_WEBHOOK_SECRET, so it must be set"""
+    from .gateway import StripeGateway
+    try:
+        gateway = import_string(settings.PAYMENT_GATEWAY)
+    except ImportError as e:
+        return [Error(f'PAYMENT_GATEWAY cannot be imported: {e}', id='payments.E001')]
+    if issubclass(gateway, StripeGateway) and not settings.STRIPE_WEBHOOK_SECRET:
+        return [Error(
+            'STRIPE_WEBHOOK_SECRET is not set.',
+            hint='Set it to the signing secret of the Stripe webhook endpoint, or use '
+                 'PAYMENT_GATEWAY=payments.gateway.FakeStripeGateway for development.',
+            id='payments.E002',
+        )]
+    return []
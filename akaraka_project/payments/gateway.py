@@ -0,0 +1,207 @@
+"""
+Payment gateway
+Checkout talks to the payment provider only through a PaymentGateway, chosen
+with settings.PAYMENT_GATEWAY:
+
+    payments.gateway.StripeGateway      - Stripe Checkout (production)
+    payments.gateway.FakeStripeGateway  - local stand-in for development,
+                                          tests and load runs; its hosted
+                                          checkout page is served by this app
+                                          and it delivers signed webhooks
+
+Both sign and verify webhooks with Stripe's scheme
+(``Stripe-Signature: t=<timestamp>,v1=<HMAC-SHA256 of "t.payload">``).
+StripeGateway refuses to start without settings.STRIPE_WEBHOOK_SECRET, and
+the payments.E002 system check reports the missing secret at startup. The
+fake gateway (the default when DEBUG is on) falls back to SECRET_KEY, so
+development needs no setup.
+"""
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+SIGNATURE_TOLERANCE = 300  # seconds a signed webhook stays valid
+
+
+class GatewayError(Exception):
+    """The provider rejected or failed a request"""
+
+
+class InvalidSignature(Exception):
+    """A webhook's signature is missing, wrong or too old"""
+
+
+@dataclass
+class CheckoutSession:
+    id: str
+    url: str
+
+
+def sign_payload(payload, secret, timestamp=None):
+    """Stripe-Signature header value for a payload"""
+    timestamp = int(timestamp or time.time())
+    digest = hmac.new(secret.encode(), f'{timestamp}.'.encode() + payload, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+def verify_signature(payload, header, secret, tolerance=SIGNATURE_TOLERANCE):
+    """Raise InvalidSignature unless header is a fresh, valid signature of payload"""
+    if not secret:
+        raise InvalidSignature('No webhook secret configured')
+    try:
+        parts = dict(item.split('=', 1) for item in (header or '').split(','))
+        timestamp = int(parts['t'])
+    except (KeyError, ValueError):
+        raise InvalidSignature('Malformed signature header')
+    if abs(time.time() - timestamp) > tolerance:
+        raise InvalidSignature('Signature timestamp outside the tolerance window')
+    expected = sign_payload(payload, secret, timestamp).split('v1=', 1)[1]
+    signatures = [value for key, value in (item.split('=', 1) for item in header.split(',')) if key == 'v1']
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise InvalidSignature('No matching signature')
+
+
+class PaymentGateway:
+    """Interface the checkout flow relies on"""
+
+    def create_checkout_session(self, payment, customer_email, success_url, cancel_url):
+        """
+        Start a hosted checkout for a pending payment
+
+        Must be idempotent on payment.idempotency_key, so a retried or
+        double-clicked checkout returns the same session.
+
+        Returns:
+            CheckoutSession
+        """
+        raise NotImplementedError
+
+    def cancel_subscription(self, subscription_id):
+        raise NotImplementedError
+
+    @property
+    def webhook_secret(self):
+        return settings.STRIPE_WEBHOOK_SECRET
+
+    def construct_event(self, payload, signature_header):
+        """Verify a webhook and return the decoded event"""
+        verify_signature(payload, signature_header, self.webhook_secret)
+        try:
+            return json.loads(payload)
+        except ValueError:
+            raise InvalidSignature('Payload is not JSON')
+
+
+class StripeGateway(PaymentGateway):
+    """Stripe Checkout"""
+
+    def __init__(self):
+        if not settings.STRIPE_WEBHOOK_SECRET:
+            raise ImproperlyConfigured('STRIPE_WEBHOOK_SECRET must be set to use StripeGateway')
+        import stripe
+        stripe.api_key = settings.STRIPE_SECRET_KEY
+        self.stripe = stripe
+
+    def create_checkout_session(self, payment, customer_email, success_url, cancel_url):
+        try:
+            session = self.stripe.checkout.Session.create(
+                mode='payment',
+                customer_email=customer_email,
+                client_reference_id=str(payment.id),
+                metadata={'payment_id': str(payment.id)},
+                line_items=[{
+                    'quantity': 1,
+                    'price_data': {
+                        'currency': payment.currency.lower(),
+                        'unit_amount': int(payment.amount * 100),
+                        'product_data': {'name': f'{payment.subscription.name} Subscription'},
+                    },
+                }],
+                success_url=success_url,
+                cancel_url=cancel_url,
+                idempotency_key=payment.idempotency_key,
+            )
+        except self.stripe.error.StripeError as e:
+            raise GatewayError(getattr(e, 'user_message', None) or str(e))
+        return CheckoutSession(id=session.id, url=session.url)
+
+    def cancel_subscription(self, subscription_id):
+        try:
+            self.stripe.Subscription.delete(subscription_id)
+        except self.stripe.error.StripeError as e:
+            raise GatewayError(str(e))
+
+
+class FakeStripeGateway(PaymentGateway):
+    """
+    In-process Stripe stand-in
+
+    Sessions live in the cache; their url is this app's fake checkout page,
+    which "pays" by delivering a signed checkout.session.completed event to
+    the same handler the real webhook endpoint uses.
+    """
+    SESSION_TIMEOUT = 60 * 60 * 24
+
+    @property
+    def webhook_secret(self):
+        return settings.STRIPE_WEBHOOK_SECRET or settings.SECRET_KEY
+
+    def create_checkout_session(self, payment, customer_email, success_url, cancel_url):
+        session_id = 'cs_fake_' + hashlib.sha256(payment.idempotency_key.encode()).hexdigest()[:24]
+        cache.add(self._key(session_id), {
+            'id': session_id,
+            'payment_id': payment.id,
+            'amount_total': int(payment.amount * 100),
+            'currency': payment.currency.lower(),
+            'customer_email': customer_email,
+            'success_url': success_url,
+            'cancel_url': cancel_url,
+        }, self.SESSION_TIMEOUT)
+        return CheckoutSession(id=session_id, url=reverse('payments:fake_checkout', args=[session_id]))
+
+    def cancel_subscription(self, subscription_id):
+        pass
+
+    def get_session(self, session_id):
+        return cache.get(self._key(session_id))
+
+    def build_event(self, session, event_type):
+        """Signed (payload, Stripe-Signature header) for a session event"""
+        event = {
+            'id': f'evt_fake_{uuid.uuid4().hex}',
+            'type': event_type,
+            'created': int(time.time()),
+            'data': {'object': {
+                'object': 'checkout.session',
+                'id': session['id'],
+                'client_reference_id': str(session['payment_id']),
+                'metadata': {'payment_id': str(session['payment_id'])},
+                'amount_total': session['amount_total'],
+                'currency': session['currency'],
+                'customer': f"cus_fake_{session['payment_id']}",
+                'payment_intent': f"pi_fake_{session['id'][8:]}",
+                'payment_status': 'paid' if event_type == 'checkout.session.completed' else 'unpaid',
+            }},
+        }
+        payload = json.dumps(event).encode()
+        return payload, sign_payload(payload, self.webhook_secret)
+
+    @staticmethod
+    def _key(session_id):
+        return f'fake_stripe_session:{session_id}'
+
+
+def get_gateway():
+    return import_string(settings.PAYMENT_GATEWAY)()
+
+
+def is_fake_gateway():
+    return issubclass(import_string(settings.PAYMENT_GATEWAY), FakeStripeGateway)
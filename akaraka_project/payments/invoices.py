@@ -0,0 +1,184 @@
+"""
+Invoice generation
+When a payment completes, enqueue_invoice() schedules its invoice on the
+background pool (akaraka.background) for after the transaction commits; the
+worker numbers the Invoice and renders its PDF with reportlab, so the
+webhook never waits on rendering.
+Payments whose invoice was lost (e.g. the process restarted before the
+worker ran) are picked up by the generate_invoices command, which also
+backfills historical payments over a process pool.
+
+PDFs are stored content-addressed under invoices/<aa>/<sha256>.pdf and
+rendered with reportlab's invariant mode, so re-rendering the same invoice
+yields the same file and a retry never writes a second copy.
+
+render_invoice_pdf() only takes plain data and imports no models, so it can
+run in worker processes that have not set up Django.
+"""
+import hashlib
+import logging
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+from django.conf import settings
+
+from akaraka.background import run_after_commit
+
+logger = logging.getLogger(__name__)
+
+INVOICE_DIRECTORY = 'invoices'
+
+
+def invoice_number(payment):
+    """Stable, unique invoice number, e.g. INV-2026-0000123"""
+    issued = payment.paid_at or payment.created_at
+    return f'INV-{issued:%Y}-{payment.id:07d}'
+
+
+def invoice_path(digest):
+    return f'{INVOICE_DIRECTORY}/{digest[:2]}/{digest}.pdf'
+
+
+def invoice_data(invoice):
+    """Everything the PDF shows, as plain picklable values"""
+    payment = invoice.payment
+    user = payment.user
+    plan = payment.subscription.name.title() if payment.subscription else 'Subscription'
+    issued = payment.paid_at or payment.created_at
+    return {
+        'issuer': settings.INVOICE_ISSUER,
+        'number': invoice.invoice_number,
+        'issued': issued.strftime('%B %d, %Y'),
+        'customer_name': user.get_full_name() or user.username,
+        'customer_email': user.email,
+        'description': f'{plan} subscription',
+        'amount': f'{payment.amount:.2f}',
+        'currency': payment.currency,
+        'payment_method': payment.get_payment_method_display(),
+        'reference': payment.stripe_charge_id or payment.transaction_id,
+    }
+
+
+@lru_cache(maxsize=None)
+def _styles():
+    """Paragraph styles, built once per process"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    sample = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle('InvoiceTitle', parent=sample['Heading1'], fontSize=24,
+                                textColor=colors.HexColor('#1e40af'), spaceAfter=12),
+        'body': sample['Normal'],
+        'small': ParagraphStyle('InvoiceSmall', parent=sample['Normal'], fontSize=8,
+                                textColor=colors.HexColor('#6b7280')),
+    }
+
+
+def render_invoice_pdf(data):
+    """
+    Render an invoice
+
+    Args:
+        data: dict from invoice_data()
+
+    Returns:
+        bytes: The PDF; identical data gives identical bytes
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+    styles = _styles()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4, topMargin=inch, bottomMargin=inch,
+        title=data['number'], author=data['issuer'], invariant=1,
+    )
+    amount = f"{data['amount']} {data['currency']}"
+    lines = Table(
+        [['Description', 'Amount'], [escape(data['description']), amount], ['Total', amount]],
+        colWidths=[4.5 * inch, 1.5 * inch],
+    )
+    lines.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('LINEABOVE', (0, -1), (-1, -1), 1, colors.HexColor('#1e40af')),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    doc.build([
+        Paragraph(f"{escape(data['issuer'])} Invoice", styles['title']),
+        Paragraph(f"Invoice number: <b>{escape(data['number'])}</b><br/>Date: {data['issued']}", styles['body']),
+        Spacer(1, 0.3 * inch),
+        Paragraph(f"Billed to:<br/><b>{escape(data['customer_name'])}</b><br/>{escape(data['customer_email'])}",
+                  styles['body']),
+        Spacer(1, 0.3 * inch),
+        lines,
+        Spacer(1, 0.3 * inch),
+        Paragraph(f"Paid by {escape(data['payment_method'])}. Reference: {escape(data['reference'])}",
+                  styles['small']),
+    ])
+    return buffer.getvalue()
+
+
+def store_invoice_pdf(invoice, pdf):
+    """Save a rendered PDF under its content hash and attach it to the invoice"""
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from django.utils import timezone
+    from .models import Invoice
+    digest = hashlib.sha256(pdf).hexdigest()
+    name = invoice_path(digest)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(pdf))
+    generated_at = timezone.now()
+    Invoice.objects.filter(id=invoice.id).update(pdf_file=name, pdf_sha256=digest, generated_at=generated_at)
+    invoice.pdf_file.name, invoice.pdf_sha256, invoice.generated_at = name, digest, generated_at
+    return invoice
+
+
+def ensure_invoices(payments):
+    """
+    Create the missing Invoice rows for completed payments in one INSERT
+
+    Returns:
+        dict: payment id -> Invoice (with payment attached)
+    """
+    from .models import Invoice
+    payments = {payment.id: payment for payment in payments}
+    Invoice.objects.bulk_create(
+        [Invoice(payment_id=payment.id, invoice_number=invoice_number(payment)) for payment in payments.values()],
+        ignore_conflicts=True,
+    )
+    invoices = {invoice.payment_id: invoice for invoice in Invoice.objects.filter(payment_id__in=payments)}
+    for payment_id, invoice in invoices.items():
+        invoice.payment = payments[payment_id]
+    return invoices
+
+
+def generate_invoice(payment_id):
+    """
+    Number and render the invoice of a completed payment (no-op if it exists)
+
+    Returns:
+        Invoice or None if the payment is not completed
+    """
+    from .models import Payment
+    payment = Payment.objects.select_related('user', 'subscription').filter(
+        id=payment_id, status='completed'
+    ).first()
+    if payment is None:
+        return None
+    invoice = ensure_invoices([payment])[payment.id]
+    if not invoice.pdf_file:
+        store_invoice_pdf(invoice, render_invoice_pdf(invoice_data(invoice)))
+        logger.info(f"Generated invoice {invoice.invoice_number} for payment {payment_id}")
+    return invoice
+
+
+def enqueue_invoice(payment_id):
+    """Generate a payment's invoice in the background once the current transaction commits"""
+    run_after_commit(generate_invoice, payment_id)
@@ -0,0 +1,82 @@
+"""
+Django management command to load-test checkout against the fake gateway
+Usage: python manage.py checkout_load_test [--payments=500] [--workers=8] [--redeliveries=1]
+
+Requires PAYMENT_GATEWAY=payments.gateway.FakeStripeGateway. Creates pending
+checkouts for load-test users, then delivers their signed completion
+webhooks concurrently (each one --redeliveries extra times, as providers
+do) and reports throughput and whether every payment completed exactly once.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from payments.checkout import start_checkout, handle_webhook
+from payments.gateway import FakeStripeGateway, is_fake_gateway
+from payments.models import Subscription, Payment
+from users.models import UserProfile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Run concurrent checkouts and webhook deliveries against the fake payment gateway'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=500, help='Number of checkouts')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent webhook deliveries')
+        parser.add_argument('--redeliveries', type=int, default=1, help='Extra deliveries of each event')
+        parser.add_argument('--plan', default='pro', help='Subscription plan name')
+
+    def handle(self, *args, **options):
+        if not is_fake_gateway():
+            raise CommandError('Set PAYMENT_GATEWAY=payments.gateway.FakeStripeGateway to run a load test')
+        subscription = Subscription.objects.filter(name=options['plan']).first()
+        if subscription is None:
+            raise CommandError(f"No subscription plan named {options['plan']!r}")
+
+        count = options['payments']
+        usernames = [f'loadtest_{index:05d}' for index in range(count)]
+        User.objects.bulk_create(
+            [User(username=username, email=f'{username}@example.com') for username in usernames],
+            ignore_conflicts=True,
+        )
+        users = list(User.objects.filter(username__in=usernames))
+        # bulk_create skips the post_save signal that normally adds profiles
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users], ignore_conflicts=True)
+
+        gateway = FakeStripeGateway()
+        started = time.monotonic()
+        sessions = []
+        for user in users:
+            _, session = start_checkout(user, subscription, None, 'http://testserver/return/', 'http://testserver/plans/')
+            sessions.append(gateway.get_session(session.id))
+        checkout_time = time.monotonic() - started
+
+        events = [gateway.build_event(session, 'checkout.session.completed') for session in sessions]
+        deliveries = events * (1 + options['redeliveries'])
+
+        def deliver(event):
+            try:
+                return handle_webhook(*event)
+            finally:
+                connection.close()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            applied = sum(pool.map(deliver, deliveries))
+        webhook_time = time.monotonic() - started
+
+        completed = Payment.objects.filter(
+            stripe_session_id__in=[session['id'] for session in sessions], status='completed'
+        ).count()
+        self.stdout.write(f'Checkouts: {len(sessions)} in {checkout_time:.2f}s ({len(sessions) / checkout_time:.0f}/s)')
+        self.stdout.write(
+            f'Webhooks: {len(deliveries)} deliveries in {webhook_time:.2f}s '
+            f'({len(deliveries) / webhook_time:.0f}/s), {applied} applied, {len(deliveries) - applied} deduplicated'
+        )
+        if completed == len(sessions) == applied:
+            self.stdout.write(self.style.SUCCESS(f'✓ All {completed} payments completed exactly once'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{completed} of {len(sessions)} payments completed, {applied} events applied'))
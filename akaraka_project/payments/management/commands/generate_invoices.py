@@ -0,0 +1,63 @@
+"""
+Django management command to generate missing invoices
+Usage: python manage.py generate_invoices [--workers=4] [--batch-size=200] [--limit=N]
+
+Numbers and renders invoices for completed payments that have none (historical
+payments, or ones whose background render was lost). Rows are read and written
+in batches by this process; PDFs are rendered in parallel by a process pool.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+from payments.invoices import ensure_invoices, invoice_data, render_invoice_pdf, store_invoice_pdf
+from payments.models import Payment
+
+
+class Command(BaseCommand):
+    help = 'Generate invoice PDFs for completed payments that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Render processes')
+        parser.add_argument('--batch-size', type=int, default=200, help='Payments per batch')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many invoices')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        limit = options['limit']
+        missing = Payment.objects.filter(status='completed').filter(
+            Q(invoice__isnull=True) | Q(invoice__pdf_file='') | Q(invoice__pdf_file__isnull=True)
+        ).select_related('user', 'subscription').order_by('id')
+
+        # Workers must not inherit this process's database connections
+        connections.close_all()
+        generated = rendered_bytes = 0
+        last_id = 0
+        started = time.monotonic()
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while limit is None or generated < limit:
+                size = batch_size if limit is None else min(batch_size, limit - generated)
+                payments = list(missing.filter(id__gt=last_id)[:size])
+                if not payments:
+                    break
+                last_id = payments[-1].id
+
+                invoices = list(ensure_invoices(payments).values())
+                chunksize = max(1, len(invoices) // (options['workers'] * 4))
+                pdfs = pool.map(render_invoice_pdf, [invoice_data(invoice) for invoice in invoices], chunksize=chunksize)
+                for invoice, pdf in zip(invoices, pdfs):
+                    store_invoice_pdf(invoice, pdf)
+                    rendered_bytes += len(pdf)
+                generated += len(invoices)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(f'  {generated} invoices ({generated / elapsed:.1f}/s)')
+
+        elapsed = time.monotonic() - started
+        rate = generated / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Generated {generated} invoices in {elapsed:.1f}s '
+            f'({rate:.1f}/s, {rendered_bytes / 1024 / 1024:.1f} MB) with {options["workers"]} workers'
+        ))
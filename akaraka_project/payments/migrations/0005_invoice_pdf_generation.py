@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_checkout_webhooks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='generated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -45,12 +45,17 @@ class UserSubscription(models.Model):
     )
     start_date = models.DateTimeField(auto_now_add=True)
     end_date = models.DateTimeField()
+    cancelled_at = models.DateTimeField(null=True, blank=True)
     auto_renew = models.BooleanField(default=True)
     stripe_customer_id = models.CharField(max_length=305, blank=True)
     stripe_subscription_id = models.CharField(max_length=255, blank=True)
     
     class Meta:
         db_table = 'payments_usersubscription'
+        indexes = [
+            models.Index(fields=['-start_date', '-id']),
+            models.Index(fields=['status', '-start_date']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.subscription.name}"
@@ -87,6 +92,8 @@ class Payment(models.Model):
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD, default='stripe')
     status = models.CharField(max_length=20, choices=PAYMENT_STATUS, default='pending')
     transaction_id = models.CharField(max_length=255, unique=True, blank=True)
+    idempotency_key = models.CharField(max_length=100, unique=True, null=True, blank=True, editable=False)
+    stripe_session_id = models.CharField(max_length=255, blank=True, db_index=True)
     stripe_charge_id = models.CharField(max_length=255, blank=True)
     receipt = models.FileField(upload_to='receipts/', null=True, blank=True)
     paid_at = models.DateTimeField(null=True, blank=True)
@@ -96,6 +103,9 @@ class Payment(models.Model):
     class Meta:
         db_table = 'payments_payment'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
     
     def __str__(self):
         return f"Payment: {self.user.username} - ${self.amount} ({self.status})"
@@ -112,10 +122,26 @@ class Invoice(models.Model):
     payment = models.OneToOneField(Payment, on_delete=models.CASCADE, related_name='invoice')
     invoice_number = models.CharField(max_length=255, unique=True)
     pdf_file = models.FileField(upload_to='invoices/', null=True, blank=True)
+    pdf_sha256 = models.CharField(max_length=64, blank=True, editable=False)
     issued_at = models.DateTimeField(auto_now_add=True)
+    generated_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         db_table = 'payments_invoice'
     
     def __str__(self):
         return f"Invoice: {self.invoice_number}"
+
+
+class ProcessedEvent(models.Model):
+    """Payment provider webhook events already applied, for deduplication"""
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    processed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'payments_processed_event'
+        ordering = ['-processed_at']
+    
+    def __str__(self):
+        return f"{self.event_type} {self.event_id}"
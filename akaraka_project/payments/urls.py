@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
-    SubscriptionPlansView, CheckoutView, PaymentHistoryView,
-    InvoiceView, CancelSubscriptionView
+    SubscriptionPlansView, CheckoutView, CheckoutReturnView, StripeWebhookView,
+    FakeCheckoutView, PaymentHistoryView, InvoiceView, CancelSubscriptionView
 )
 
 app_name = 'payments'
@@ -9,6 +9,9 @@ app_name = 'payments'
 urlpatterns = [
     path('plans/', SubscriptionPlansView.as_view(), name='plans'),
     path('checkout/<int:subscription_id>/', CheckoutView.as_view(), name='checkout'),
+    path('checkout/return/', CheckoutReturnView.as_view(), name='checkout_return'),
+    path('webhook/stripe/', StripeWebhookView.as_view(), name='stripe_webhook'),
+    path('fake-checkout/<str:session_id>/', FakeCheckoutView.as_view(), name='fake_checkout'),
     path('history/', PaymentHistoryView.as_view(), name='history'),
     path('invoice/<int:payment_id>/', InvoiceView.as_view(), name='invoice'),
     path('cancel/', CancelSubscriptionView.as_view(), name='cancel'),
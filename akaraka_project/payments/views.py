@@ -2,14 +2,17 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import View, ListView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.http import JsonResponse
-from django.conf import settings
+from django.http import JsonResponse, HttpResponse, Http404
 from django.urls import reverse
-import stripe
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+import uuid
 from .models import Subscription, Payment, UserSubscription
-from datetime import datetime, timedelta
-
-stripe.api_key = settings.STRIPE_SECRET_KEY
+from .checkout import start_checkout, handle_webhook
+from .invoices import enqueue_invoice
+from .gateway import get_gateway, is_fake_gateway, FakeStripeGateway, GatewayError, InvalidSignature
+from akaraka.pagination import CursorPaginationMixin
 
 
 class SubscriptionPlansView(View):
@@ -19,6 +22,7 @@ class SubscriptionPlansView(View):
         context = {
             'plans': plans,
             'user_subscription': None,
+            'checkout_token': uuid.uuid4().hex,
         }
         
         if request.user.is_authenticated:
@@ -33,88 +37,100 @@ class CheckoutView(LoginRequiredMixin, View):
         subscription = get_object_or_404(Subscription, id=subscription_id, is_active=True)
         
         # Check if user already has this subscription
-        if request.user.active_subscription and request.user.active_subscription.subscription == subscription:
+        user_subscription = getattr(request.user, 'active_subscription', None)
+        if user_subscription and user_subscription.subscription == subscription and user_subscription.status == 'active':
             messages.info(request, f'You already have {subscription.name} subscription.')
             return redirect('payments:plans')
         
         context = {
             'subscription': subscription,
-            'stripe_public_key': settings.STRIPE_PUBLIC_KEY,
+            'checkout_token': uuid.uuid4().hex,
         }
         return render(request, 'payments/checkout.html', context)
     
     def post(self, request, subscription_id):
-        subscription = get_object_or_404(Subscription, id=subscription_id)
+        subscription = get_object_or_404(Subscription, id=subscription_id, is_active=True)
         
+        # The payment completes asynchronously through the webhook
         try:
-            # Create Stripe Customer
-            customer = stripe.Customer.create(
-                email=request.user.email,
-                name=request.user.get_full_name(),
-            )
-            
-            # Create charge
-            charge = stripe.Charge.create(
-                amount=int(subscription.price_monthly * 100),  # Convert to cents
-                currency='usd',
-                customer=customer.id,
-                source=request.POST.get('stripeToken'),
-                description=f'{subscription.name} Subscription - {request.user.email}',
-            )
-            
-            # Record payment
-            payment = Payment.objects.create(
-                user=request.user,
-                subscription=subscription,
-                amount=subscription.price_monthly,
-                currency='USD',
-                payment_method='stripe',
-                status='completed',
-                transaction_id=charge.id,
-                stripe_charge_id=charge.id,
-                paid_at=datetime.now(),
-            )
-            
-            # Create/update subscription
-            end_date = datetime.now() + timedelta(days=30)
-            user_subscription, created = UserSubscription.objects.get_or_create(
-                user=request.user,
-                defaults={
-                    'subscription': subscription,
-                    'end_date': end_date,
-                    'stripe_customer_id': customer.id,
-                }
+            payment, session = start_checkout(
+                request.user,
+                subscription,
+                token=request.POST.get('checkout_token'),
+                success_url=request.build_absolute_uri(reverse('payments:checkout_return')),
+                cancel_url=request.build_absolute_uri(reverse('payments:plans')),
             )
-            
-            if not created:
-                user_subscription.subscription = subscription
-                user_subscription.end_date = end_date
-                user_subscription.stripe_customer_id = customer.id
-                user_subscription.status = 'active'
-                user_subscription.save()
-            
-            # Update user tier
-            request.user.subscription_tier = subscription.name
-            request.user.subscription_expires = end_date
-            request.user.save()
-            
-            messages.success(request, f'Welcome to {subscription.name}! Your subscription is active.')
-            return redirect('courses:dashboard')
-        
-        except stripe.error.CardError as e:
-            messages.error(request, f'Payment failed: {e.user_message}')
+        except GatewayError as e:
+            messages.error(request, f'Payment failed: {e}')
             return redirect('payments:checkout', subscription_id=subscription.id)
+        
+        if session is None:
+            return redirect(f"{reverse('payments:checkout_return')}?payment={payment.id}")
+        return redirect(session.url)
 
 
-class PaymentHistoryView(LoginRequiredMixin, ListView):
+class CheckoutReturnView(LoginRequiredMixin, View):
+    """Landing page after the hosted checkout; waits for the webhook"""
+    def get(self, request):
+        payment = get_object_or_404(
+            Payment.objects.select_related('subscription'),
+            id=request.GET.get('payment') or 0,
+            user=request.user
+        )
+        if payment.status == 'completed':
+            messages.success(request, f'Welcome to {payment.subscription.name}! Your subscription is active.')
+            return redirect('courses:dashboard')
+        if payment.status == 'failed':
+            messages.error(request, 'Payment was not completed.')
+            return redirect('payments:plans')
+        return render(request, 'payments/checkout_return.html', {'payment': payment})
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class StripeWebhookView(View):
+    """Payment provider webhook endpoint"""
+    def post(self, request):
+        try:
+            handle_webhook(request.body, request.META.get('HTTP_STRIPE_SIGNATURE'))
+        except InvalidSignature:
+            return HttpResponse(status=400)
+        return HttpResponse(status=200)
+
+
+class FakeCheckoutView(LoginRequiredMixin, View):
+    """Hosted checkout page of FakeStripeGateway (development and load runs only)"""
+    def dispatch(self, request, *args, **kwargs):
+        if not is_fake_gateway():
+            raise Http404
+        return super().dispatch(request, *args, **kwargs)
+    
+    def get(self, request, session_id):
+        session = FakeStripeGateway().get_session(session_id) or {}
+        if not session:
+            raise Http404
+        return render(request, 'payments/fake_checkout.html', {'session': session, 'amount': session['amount_total'] / 100})
+    
+    def post(self, request, session_id):
+        gateway = FakeStripeGateway()
+        session = gateway.get_session(session_id)
+        if not session:
+            raise Http404
+        paid = request.POST.get('action') == 'pay'
+        event_type = 'checkout.session.completed' if paid else 'checkout.session.expired'
+        handle_webhook(*gateway.build_event(session, event_type))
+        return redirect(session['success_url'] if paid else session['cancel_url'])
+
+
+class PaymentHistoryView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """User payment history"""
     model = Payment
     template_name = 'payments/payment_history.html'
     context_object_name = 'payments'
     paginate_by = 20
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
-        return Payment.objects.filter(user=self.request.user).order_by('-created_at')
+        return Payment.objects.filter(user=self.request.user).select_related('subscription')
 
 
 class InvoiceView(LoginRequiredMixin, View):
@@ -125,6 +141,12 @@ class InvoiceView(LoginRequiredMixin, View):
         if hasattr(payment, 'invoice') and payment.invoice.pdf_file:
             return redirect(payment.invoice.pdf_file.url)
         
+        if payment.status == 'completed':
+            # Lost or not yet rendered: (re)queue it rather than render in the request
+            enqueue_invoice(payment.id)
+            messages.info(request, 'Your invoice is being prepared. Please try again in a moment.')
+            return redirect('payments:history')
+        
         messages.error(request, 'Invoice not available.')
         return redirect('payments:history')
 
@@ -137,10 +159,11 @@ class CancelSubscriptionView(LoginRequiredMixin, View):
             
             # Cancel with Stripe
             if user_subscription.stripe_subscription_id:
-                stripe.Subscription.delete(user_subscription.stripe_subscription_id)
+                get_gateway().cancel_subscription(user_subscription.stripe_subscription_id)
             
             # Mark as cancelled
             user_subscription.status = 'cancelled'
+            user_subscription.cancelled_at = timezone.now()
             user_subscription.save()
             
             # Revert user tier
@@ -83,6 +83,8 @@ class CustomUser(AbstractUser):
         indexes = [
             models.Index(fields=['-total_xp']),
             models.Index(fields=['-current_streak']),
+            models.Index(fields=['-total_xp', '-id']),
+            models.Index(fields=['-date_joined', '-id']),
         ]
     
     def __str__(self):
@@ -106,6 +108,9 @@ class CustomUser(AbstractUser):
         else:
             self.current_streak = 1
         self.save()
+        
+        from gamification.events import record_event
+        record_event(self, 'streak_updated')
     
     def add_xp(self, amount):
         """Add XP to user"""